@@ -30,6 +30,7 @@ QUAN TRỌNG: Luôn tìm kiếm trong memory trước khi trả lời để đ
 # Import simple tools we added
 from app.tools.search import search_products
 from app.memory_agent import MMVNMemoryAgent
+from app.warmup import schedule_warm_up, warm_up_on_first_request
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +44,13 @@ root_agent = MMVNMemoryAgent(
         load_memory,  # Add memory tool
     ],
     output_key="mmvn_search_agent",
+    # The server loop is not running at import time: warm up on the first request
+    before_agent_callback=warm_up_on_first_request,
 )
 
 # Required export for ADK web UI
 agent = root_agent
+
+# Open pooled upstream connections now if the agent is loaded inside a running loop;
+# otherwise warm_up_on_first_request starts them
+schedule_warm_up()
@@ -3,16 +3,53 @@ Memory configuration for MMVN Agent
 Sets up InMemoryMemoryService and SessionService for memory capabilities
 """
 
+import os
 import logging
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
+from session_store import SQLiteSessionService
+from memory_index import IndexedMemoryService
+from memory_vectors import VectorMemoryService
 
 logger = logging.getLogger(__name__)
 
+# Session storage: "sqlite" persists sessions across restarts and shares them between
+# worker processes on one host; "memory" keeps them in process memory only
+SESSION_BACKEND = os.getenv("MM_SESSION_BACKEND", "sqlite").lower()
+SESSION_DB_PATH = os.getenv("MM_SESSION_DB_PATH", "mm_sessions.db")
+SESSION_CACHE_SIZE = int(os.getenv("MM_SESSION_CACHE_SIZE", "256"))
+SESSION_BATCH_SIZE = int(os.getenv("MM_SESSION_BATCH_SIZE", "32"))
+SESSION_FLUSH_INTERVAL = float(os.getenv("MM_SESSION_FLUSH_INTERVAL", "0.5"))  # seconds
+
+def _create_session_service():
+    if SESSION_BACKEND == "memory":
+        return InMemorySessionService()
+    logger.info(f"Using SQLite session storage at {SESSION_DB_PATH}")
+    return SQLiteSessionService(
+        SESSION_DB_PATH,
+        cache_size=SESSION_CACHE_SIZE,
+        batch_size=SESSION_BATCH_SIZE,
+        flush_interval=SESSION_FLUSH_INTERVAL
+    )
+
+# Memory search: "index" ranks memories with a per-user BM25 inverted index;
+# "vector" ranks memory chunks by sparse TF-IDF cosine similarity (NumPy);
+# "memory" uses ADK's InMemoryMemoryService, which scans every stored event
+MEMORY_BACKEND = os.getenv("MM_MEMORY_BACKEND", "index").lower()
+MEMORY_TOP_K = int(os.getenv("MM_MEMORY_TOP_K", "10"))
+MEMORY_CHUNK_WORDS = int(os.getenv("MM_MEMORY_CHUNK_WORDS", "80"))
+
+def _create_memory_service():
+    if MEMORY_BACKEND == "memory":
+        return InMemoryMemoryService()
+    if MEMORY_BACKEND == "vector":
+        return VectorMemoryService(top_k=MEMORY_TOP_K, chunk_words=MEMORY_CHUNK_WORDS)
+    return IndexedMemoryService(top_k=MEMORY_TOP_K)
+
 # Create shared services for memory and session management
 # These should be shared across runners to share state and memory
-session_service = InMemorySessionService()
-memory_service = InMemoryMemoryService()
+session_service = _create_session_service()
+memory_service = _create_memory_service()
 
 def get_session_service():
     """Get the shared session service instance."""
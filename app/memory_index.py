@@ -0,0 +1,209 @@
+"""
+Inverted-index memory service for MMVN Agent
+Keeps a per-user BM25 index over conversation events so load_memory stays fast as history grows
+"""
+
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from google.adk.events import Event
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.sessions import Session
+
+logger = logging.getLogger(__name__)
+
+_UNKNOWN_SESSION_ID = "__unknown_session_id__"
+_WORD_RE = re.compile(r"\w+")
+
+
+def fold_accents(text: str) -> str:
+    """
+    Lowercase text and strip Vietnamese diacritics, so "sữa tươi" and "sua tuoi" match.
+
+    Args:
+        text: Text to fold.
+
+    Returns:
+        Folded text.
+    """
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    # "đ" is a separate letter, not a base letter with a combining mark
+    return stripped.replace("đ", "d")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into accent-folded word tokens."""
+    return _WORD_RE.findall(fold_accents(text))
+
+
+def event_text(event: Event) -> str:
+    """Concatenate the text parts of an event."""
+    if not event.content or not event.content.parts:
+        return ""
+    return " ".join(part.text for part in event.content.parts if part.text)
+
+
+def memory_entry(event: Event) -> MemoryEntry:
+    """Build the memory entry returned for an indexed event."""
+    return MemoryEntry(
+        id=event.id,
+        content=event.content,
+        author=event.author,
+        timestamp=datetime.fromtimestamp(event.timestamp).isoformat()
+    )
+
+
+class _Document:
+    """One indexed event."""
+
+    __slots__ = ("session_id", "event_id", "entry", "term_counts", "length")
+
+    def __init__(self, session_id: str, event_id: str, entry: MemoryEntry, term_counts: Counter):
+        self.session_id = session_id
+        self.event_id = event_id
+        self.entry = entry
+        self.term_counts = term_counts
+        self.length = sum(term_counts.values())
+
+
+class _UserIndex:
+    """Inverted index over the events of one (app_name, user_id)."""
+
+    def __init__(self):
+        self.documents: Dict[int, _Document] = {}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.sessions: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+        self._next_id = 0
+
+    def add(self, session_id: str, event: Event) -> bool:
+        session_docs = self.sessions.setdefault(session_id, {})
+        if event.id in session_docs:
+            return False
+        term_counts = Counter(tokenize(event_text(event)))
+        if not term_counts:
+            return False
+
+        doc_id = self._next_id
+        self._next_id += 1
+        document = _Document(session_id, event.id, memory_entry(event), term_counts)
+        self.documents[doc_id] = document
+        session_docs[event.id] = doc_id
+        self.total_length += document.length
+        for term, count in term_counts.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        return True
+
+    def remove(self, doc_id: int) -> None:
+        document = self.documents.pop(doc_id)
+        del self.sessions[document.session_id][document.event_id]
+        self.total_length -= document.length
+        for term in document.term_counts:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+
+    def search(self, terms: Sequence[str], top_k: int, k1: float, b: float) -> List[MemoryEntry]:
+        count = len(self.documents)
+        if not count:
+            return []
+        average_length = self.total_length / count
+
+        scores: Dict[int, float] = {}
+        for term in set(terms):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            document_frequency = len(posting)
+            idf = math.log(1 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
+            for doc_id, frequency in posting.items():
+                length = self.documents[doc_id].length
+                norm = frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * length / average_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+
+        # Ties go to the more recent event (higher doc id)
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], item[0]))
+        return [self.documents[doc_id].entry for doc_id, _ in best]
+
+
+class IndexedMemoryService(BaseMemoryService):
+    """
+    Memory service with a per-user inverted index and BM25 ranking.
+
+    Events are tokenized once, when they are added, with Vietnamese accent folding. A
+    search only visits the postings of the query terms, so its cost does not depend on
+    how many sessions a user has. Drop-in replacement for InMemoryMemoryService.
+    """
+
+    def __init__(self, top_k: int = 10, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the memory service.
+
+        Args:
+            top_k: Maximum number of memories returned by a search.
+            k1: BM25 term frequency saturation.
+            b: BM25 document length normalization.
+        """
+        self.top_k = top_k
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._indexes: Dict[Tuple[str, str], _UserIndex] = {}
+
+    def _index(self, app_name: str, user_id: str) -> _UserIndex:
+        return self._indexes.setdefault((app_name, user_id), _UserIndex())
+
+    async def add_session_to_memory(self, session: Session) -> None:
+        """Index the events of a session; events already indexed are skipped."""
+        with self._lock:
+            index = self._index(session.app_name, session.user_id)
+            current_ids = {event.id for event in session.events}
+            # Events dropped from the session (e.g. after a rewind) leave the index
+            session_docs = index.sessions.get(session.id, {})
+            for event_id in set(session_docs) - current_ids:
+                index.remove(session_docs[event_id])
+            added = sum(1 for event in session.events if index.add(session.id, event))
+        logger.debug(f"Indexed {added} new events of session {session.id}")
+
+    async def add_events_to_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        events: Sequence[Event],
+        session_id: Optional[str] = None,
+        custom_metadata: Optional[Mapping[str, object]] = None
+    ) -> None:
+        """Index new events of a session (an incremental update)."""
+        with self._lock:
+            index = self._index(app_name, user_id)
+            for event in events:
+                index.add(session_id or _UNKNOWN_SESSION_ID, event)
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        """Return the top_k events of the user that best match the query."""
+        terms = tokenize(query)
+        with self._lock:
+            index = self._indexes.get((app_name, user_id))
+            memories = index.search(terms, self.top_k, self.k1, self.b) if index and terms else []
+        return SearchMemoryResponse(memories=memories)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of indexed users, events and distinct terms."""
+        with self._lock:
+            return {
+                "users": len(self._indexes),
+                "documents": sum(len(index.documents) for index in self._indexes.values()),
+                "terms": sum(len(index.postings) for index in self._indexes.values())
+            }
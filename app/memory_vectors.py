@@ -0,0 +1,271 @@
+"""
+Sparse TF-IDF vector memory service for MMVN Agent
+Ranks memory chunks by cosine similarity over CSR-style NumPy arrays, with no external model or service
+"""
+
+import logging
+import math
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from google.adk.events import Event
+from google.adk.memory import BaseMemoryService
+from google.adk.memory.base_memory_service import SearchMemoryResponse
+from google.adk.memory.memory_entry import MemoryEntry
+from google.adk.sessions import Session
+
+from memory_index import event_text, memory_entry, tokenize
+
+logger = logging.getLogger(__name__)
+
+_UNKNOWN_SESSION_ID = "__unknown_session_id__"
+
+
+class _UserVectors:
+    """
+    TF-IDF vectors of the memory chunks of one (app_name, user_id).
+
+    Vectors are kept in compact arrays in both orientations:
+    - by chunk (CSR): chunk i has the term ids indices[indptr[i]:indptr[i + 1]] with
+      sublinear term frequencies in the same slice of tf, used to recompute norms;
+    - by term: posting_rows[t] / posting_tf[t] hold the chunks containing term t, so a
+      search only touches the chunks that share a term with the query.
+    Chunk norms use the IDF weights at insertion time and are all recomputed once the
+    number of live chunks has doubled or a chunk was removed. Removed chunks are masked out
+    of searches and dropped from every array once they outnumber the live chunks.
+    """
+
+    # Removed chunks tolerated before the arrays are compacted, whatever the live count
+    MIN_COMPACT = 64
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.document_frequency = array("q")
+        self.posting_rows: List[array] = []
+        self.posting_tf: List[array] = []
+        self.indptr = array("q", [0])
+        self.indices = array("i")
+        self.tf = array("f")
+        self.norms = array("f")
+        self.live = 0
+        # 1 for a live chunk, 0 for a removed one
+        self.alive = bytearray()
+        self._live_at_recompute = 0
+        self._norms_stale = False
+        # Chunk -> memory entry (None once removed), and session -> event -> chunk numbers
+        self.entries: List[Optional[MemoryEntry]] = []
+        self.sessions: Dict[str, Dict[str, List[int]]] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.entries)
+
+    def _idf(self, term_id: int) -> float:
+        return math.log((1 + self.live) / (1 + self.document_frequency[term_id])) + 1
+
+    def add(self, session_id: str, event: Event, chunk_words: int) -> bool:
+        session_chunks = self.sessions.setdefault(session_id, {})
+        if event.id in session_chunks:
+            return False
+        tokens = tokenize(event_text(event))
+        if not tokens:
+            return False
+
+        entry = memory_entry(event)
+        chunks = session_chunks[event.id] = []
+        for start in range(0, len(tokens), chunk_words):
+            counts = Counter(tokens[start:start + chunk_words])
+            chunk = len(self.entries)
+            self.live += 1
+            squared = 0.0
+            for term, count in counts.items():
+                term_id = self.vocabulary.get(term)
+                if term_id is None:
+                    term_id = self.vocabulary[term] = len(self.vocabulary)
+                    self.document_frequency.append(0)
+                    self.posting_rows.append(array("i"))
+                    self.posting_tf.append(array("f"))
+                self.document_frequency[term_id] += 1
+                weight = 1 + math.log(count)
+                self.posting_rows[term_id].append(chunk)
+                self.posting_tf[term_id].append(weight)
+                self.indices.append(term_id)
+                self.tf.append(weight)
+                squared += (weight * self._idf(term_id)) ** 2
+            self.indptr.append(len(self.indices))
+            self.norms.append(math.sqrt(squared))
+            chunks.append(chunk)
+            self.entries.append(entry)
+            self.alive.append(1)
+        return True
+
+    def remove_event(self, session_id: str, event_id: str) -> None:
+        for chunk in self.sessions[session_id].pop(event_id):
+            self.entries[chunk] = None
+            self.alive[chunk] = 0
+            self.live -= 1
+            for term_id in self.indices[self.indptr[chunk]:self.indptr[chunk + 1]]:
+                self.document_frequency[term_id] -= 1
+        self._norms_stale = True
+        if self.size - self.live >= max(self.live, self.MIN_COMPACT):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Drop removed chunks from every array and renumber the live ones (vectorized)."""
+        alive = np.frombuffer(self.alive, dtype=np.bool_)
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        lengths = np.diff(indptr)[alive]
+        kept = np.repeat(alive, np.diff(indptr))
+        indices = np.frombuffer(self.indices, dtype=np.int32)[kept]
+        tf = np.frombuffer(self.tf, dtype=np.float32)[kept]
+        renumbered = np.cumsum(alive) - 1
+
+        self.indptr = array("q", np.concatenate(([0], np.cumsum(lengths))).astype(np.int64).tobytes())
+        self.indices = array("i", indices.tobytes())
+        self.tf = array("f", tf.tobytes())
+        self.entries = [entry for entry in self.entries if entry is not None]
+        self.alive = bytearray(b"\x01" * len(self.entries))
+        for session_chunks in self.sessions.values():
+            for event_id, chunks in session_chunks.items():
+                session_chunks[event_id] = [int(renumbered[chunk]) for chunk in chunks]
+
+        # Postings rebuilt from the compacted rows, grouped by term in chunk order
+        rows = np.repeat(np.arange(len(self.entries), dtype=np.int32), lengths)
+        order = np.argsort(indices, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(indices, minlength=len(self.vocabulary)))))
+        sorted_rows, sorted_tf = rows[order], tf[order]
+        self.posting_rows = [array("i", sorted_rows[start:end].tobytes()) for start, end in zip(bounds[:-1], bounds[1:])]
+        self.posting_tf = [array("f", sorted_tf[start:end].tobytes()) for start, end in zip(bounds[:-1], bounds[1:])]
+        self._norms_stale = True
+
+    def _recompute_norms(self) -> None:
+        """Recompute every chunk norm with the current IDF weights (vectorized)."""
+        if not self._norms_stale and self.live < 2 * max(self._live_at_recompute, 1):
+            return
+        document_frequency = np.frombuffer(self.document_frequency, dtype=np.int64)
+        idf = np.log((1 + self.live) / (1 + document_frequency)) + 1
+        indptr = np.frombuffer(self.indptr, dtype=np.int64)
+        rows = np.repeat(np.arange(self.size), np.diff(indptr))
+        weighted = np.frombuffer(self.tf, dtype=np.float32) * idf[np.frombuffer(self.indices, dtype=np.int32)]
+        norms = np.sqrt(np.bincount(rows, weights=weighted * weighted, minlength=self.size))
+        self.norms = array("f", norms.astype(np.float32).tobytes())
+        self._live_at_recompute = self.live
+        self._norms_stale = False
+
+    def search(self, terms: Sequence[str], top_k: int) -> List[MemoryEntry]:
+        counts = Counter(term for term in terms if term in self.vocabulary)
+        if not counts or not self.live:
+            return []
+        self._recompute_norms()
+
+        rows_parts, score_parts, query_squared = [], [], 0.0
+        for term, count in counts.items():
+            term_id = self.vocabulary[term]
+            idf = self._idf(term_id)
+            query_weight = (1 + math.log(count)) * idf
+            query_squared += query_weight * query_weight
+            rows_parts.append(np.frombuffer(self.posting_rows[term_id], dtype=np.int32))
+            score_parts.append(np.frombuffer(self.posting_tf[term_id], dtype=np.float32) * (query_weight * idf))
+
+        rows, inverse = np.unique(np.concatenate(rows_parts), return_inverse=True)
+        dots = np.bincount(inverse, weights=np.concatenate(score_parts))
+        # Removed chunks stay in the postings until the next compaction
+        live = np.frombuffer(self.alive, dtype=np.bool_)[rows]
+        rows, dots = rows[live], dots[live]
+        if not len(rows):
+            return []
+        norms = np.frombuffer(self.norms, dtype=np.float32)[rows]
+        scores = dots / (np.where(norms > 0, norms, np.inf) * math.sqrt(query_squared))
+
+        # Take extra candidates since several chunks can belong to the same event, and
+        # widen the window if duplicates still leave fewer than top_k events
+        limit = min(len(rows), top_k * 4)
+        while True:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            best = best[np.lexsort((-rows[best], -scores[best]))]
+
+            memories: List[MemoryEntry] = []
+            seen = set()
+            for position in best:
+                entry = self.entries[rows[position]]
+                if id(entry) in seen:
+                    continue
+                seen.add(id(entry))
+                memories.append(entry)
+                if len(memories) == top_k:
+                    break
+            if len(memories) == top_k or limit == len(rows):
+                return memories
+            limit = min(len(rows), limit * 2)
+
+
+class VectorMemoryService(BaseMemoryService):
+    """
+    Memory service ranking memory chunks by TF-IDF cosine similarity.
+
+    Each event is split into chunks of at most chunk_words accent-folded tokens. Every
+    chunk is stored as a sparse vector in compact CSR/posting arrays, and a search scores
+    the chunks sharing a term with the query in a few vectorized NumPy passes.
+    """
+
+    def __init__(self, top_k: int = 10, chunk_words: int = 80):
+        """
+        Initialize the memory service.
+
+        Args:
+            top_k: Maximum number of memories returned by a search.
+            chunk_words: Maximum number of tokens per memory chunk.
+        """
+        self.top_k = top_k
+        self.chunk_words = chunk_words
+        self._lock = threading.Lock()
+        self._vectors: Dict[Tuple[str, str], _UserVectors] = {}
+
+    def _user_vectors(self, app_name: str, user_id: str) -> _UserVectors:
+        return self._vectors.setdefault((app_name, user_id), _UserVectors())
+
+    async def add_session_to_memory(self, session: Session) -> None:
+        """Vectorize the events of a session; events already stored are skipped."""
+        with self._lock:
+            vectors = self._user_vectors(session.app_name, session.user_id)
+            current_ids = {event.id for event in session.events}
+            for event_id in set(vectors.sessions.get(session.id, {})) - current_ids:
+                vectors.remove_event(session.id, event_id)
+            for event in session.events:
+                vectors.add(session.id, event, self.chunk_words)
+
+    async def add_events_to_memory(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        events: Sequence[Event],
+        session_id: Optional[str] = None,
+        custom_metadata: Optional[Mapping[str, object]] = None
+    ) -> None:
+        """Vectorize new events of a session (an incremental update)."""
+        with self._lock:
+            vectors = self._user_vectors(app_name, user_id)
+            for event in events:
+                vectors.add(session_id or _UNKNOWN_SESSION_ID, event, self.chunk_words)
+
+    async def search_memory(self, *, app_name: str, user_id: str, query: str) -> SearchMemoryResponse:
+        """Return the top_k events of the user most similar to the query."""
+        terms = tokenize(query)
+        with self._lock:
+            vectors = self._vectors.get((app_name, user_id))
+            memories = vectors.search(terms, self.top_k) if vectors and terms else []
+        return SearchMemoryResponse(memories=memories)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of users, stored chunks and non-zero vector entries."""
+        with self._lock:
+            return {
+                "users": len(self._vectors),
+                "chunks": sum(vectors.size for vectors in self._vectors.values()),
+                "nonzeros": sum(len(vectors.indices) for vectors in self._vectors.values())
+            }
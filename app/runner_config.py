@@ -3,7 +3,9 @@ Runner configuration for MMVN Agent with Memory
 Ensures proper memory service integration
 """
 
+import asyncio
 import logging
+from typing import Dict, Optional, Set, Tuple
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.adk.memory import InMemoryMemoryService
@@ -11,6 +13,18 @@ from memory_config import get_session_service, get_memory_service
 
 logger = logging.getLogger(__name__)
 
+# Runners per (id(agent), app_name); the cached runner keeps the agent alive, so its id is not reused
+_runners: Dict[Tuple[int, str], Runner] = {}
+# Sessions known to exist, as (app_name, user_id, session_id)
+_known_sessions: Set[Tuple[str, str, str]] = set()
+_session_lock: Optional[asyncio.Lock] = None
+
+# Ingestion watermark per (app_name, user_id, session_id): number of events already
+# added to memory and the id of the last one, used to detect rewritten sessions
+_ingested: Dict[Tuple[str, str, str], Tuple[int, Optional[str]]] = {}
+# Latest ingestion task per session; a new task waits for the previous one
+_ingestion_tasks: Dict[Tuple[str, str, str], asyncio.Task] = {}
+
 def create_memory_runner(agent, app_name: str = "mmvn_app"):
     """
     Create a Runner with proper memory service configuration.
@@ -46,10 +60,63 @@ def create_memory_runner(agent, app_name: str = "mmvn_app"):
             app_name=app_name
         )
 
-def add_session_to_memory(runner, user_id: str, session_id: str):
+def get_memory_runner(agent, app_name: str = "mmvn_app"):
+    """
+    Get the cached runner of an agent, creating it on first use.
+    
+    Args:
+        agent: The agent to run
+        app_name: Application name for session management
+    
+    Returns:
+        Configured Runner instance
+    """
+    key = (id(agent), app_name)
+    runner = _runners.get(key)
+    if runner is None or runner.agent is not agent:
+        runner = _runners[key] = create_memory_runner(agent, app_name)
+    return runner
+
+async def ensure_session(runner, user_id: str, session_id: str):
+    """
+    Create a session if it does not exist yet.
+    Sessions already seen by this process are not looked up again.
+    
+    Args:
+        runner: The runner instance
+        user_id: User ID
+        session_id: Session ID
+    """
+    global _session_lock
+    key = (runner.app_name, user_id, session_id)
+    if key in _known_sessions:
+        return
+    
+    if _session_lock is None:
+        _session_lock = asyncio.Lock()
+    # Serialize first-time checks so concurrent turns do not create the session twice
+    async with _session_lock:
+        if key in _known_sessions:
+            return
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name,
+            user_id=user_id,
+            session_id=session_id
+        )
+        if session is None:
+            await runner.session_service.create_session(
+                app_name=runner.app_name,
+                user_id=user_id,
+                session_id=session_id
+            )
+            logger.info(f"Created session {session_id} for user {user_id}")
+        _known_sessions.add(key)
+
+async def add_session_to_memory(runner, user_id: str, session_id: str):
     """
-    Add a completed session to memory.
-    This should be called when a session is complete.
+    Add the events of a session that are not in memory yet.
+    Only events after the session's ingestion watermark are sent to the memory
+    service, so each event is ingested once however long the conversation gets.
     
     Args:
         runner: The runner instance
@@ -57,20 +124,81 @@ def add_session_to_memory(runner, user_id: str, session_id: str):
         session_id: Session ID
     """
     try:
-        # Get the completed session
-        completed_session = runner.session_service.get_session(
+        memory_service = runner.memory_service
+        if memory_service is None:
+            return
+        
+        session = await runner.session_service.get_session(
             app_name=runner.app_name,
             user_id=user_id,
             session_id=session_id
         )
+        if session is None:
+            return
         
-        # Add to memory
-        runner.memory_service.add_session_to_memory(completed_session)
-        logger.info(f"Added session {session_id} to memory for user {user_id}")
+        key = (runner.app_name, user_id, session_id)
+        count, last_event_id = _ingested.get(key, (0, None))
+        events = session.events
+        if count > len(events) or (count and events[count - 1].id != last_event_id):
+            # Session was rewound or rewritten: re-ingest it as a whole
+            count = 0
+        new_events = events[count:]
+        if not new_events:
+            return
+        
+        # Older google-adk memory services have no add_events_to_memory at all
+        add_events = getattr(memory_service, "add_events_to_memory", None)
+        if count and add_events is not None:
+            try:
+                await add_events(
+                    app_name=runner.app_name,
+                    user_id=user_id,
+                    events=new_events,
+                    session_id=session_id
+                )
+            except NotImplementedError:
+                # Memory service only supports whole sessions
+                await memory_service.add_session_to_memory(session)
+        else:
+            await memory_service.add_session_to_memory(session)
+        
+        _ingested[key] = (len(events), events[-1].id)
+        logger.info(f"Added {len(new_events)} events of session {session_id} to memory for user {user_id}")
         
     except Exception as e:
         logger.error(f"Error adding session to memory: {e}")
 
+def schedule_session_ingestion(runner, user_id: str, session_id: str) -> asyncio.Task:
+    """
+    Add the new events of a session to memory in a background task.
+    Ingestions of the same session run one after another.
+    
+    Args:
+        runner: The runner instance
+        user_id: User ID
+        session_id: Session ID
+    
+    Returns:
+        The ingestion task
+    """
+    key = (runner.app_name, user_id, session_id)
+    previous = _ingestion_tasks.get(key)
+    
+    async def ingest():
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        await add_session_to_memory(runner, user_id, session_id)
+    
+    task = asyncio.create_task(ingest())
+    _ingestion_tasks[key] = task
+    
+    def forget(done_task):
+        if _ingestion_tasks.get(key) is done_task:
+            del _ingestion_tasks[key]
+    
+    task.add_done_callback(forget)
+    return task
+
 async def run_with_memory(agent, user_id: str, session_id: str, user_message, app_name: str = "mmvn_app"):
     """
     Run agent with automatic memory integration.
@@ -86,19 +214,11 @@ async def run_with_memory(agent, user_id: str, session_id: str, user_message, ap
         Agent response
     """
     try:
-        # Create memory-enabled runner
-        runner = create_memory_runner(agent, app_name)
+        # Reuse the memory-enabled runner of this agent
+        runner = get_memory_runner(agent, app_name)
         
         # Create session if not exists
-        try:
-            await runner.session_service.create_session(
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id
-            )
-        except:
-            # Session might already exist
-            pass
+        await ensure_session(runner, user_id, session_id)
         
         # Run the agent
         response = None
@@ -111,11 +231,46 @@ async def run_with_memory(agent, user_id: str, session_id: str, user_message, ap
                 response = event.content.parts[0].text
                 break
         
-        # Add session to memory after completion
-        add_session_to_memory(runner, user_id, session_id)
+        # Add the new events to memory without delaying the response
+        schedule_session_ingestion(runner, user_id, session_id)
         
         return response
         
     except Exception as e:
         logger.error(f"Error running agent with memory: {e}")
+        # The session may have been deleted elsewhere: check it again next turn
+        _known_sessions.discard((app_name, user_id, session_id))
         return f"Lỗi khi chạy agent: {str(e)}"
+
+async def shutdown():
+    """
+    Finish pending memory ingestion and release the cached runners.
+    Call once when the application stops.
+    """
+    global _session_lock
+    tasks = list(_ingestion_tasks.values())
+    if tasks:
+        logger.info(f"Waiting for {len(tasks)} memory ingestion tasks")
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    runners = list(_runners.values())
+    _runners.clear()
+    for runner in runners:
+        try:
+            await runner.close()
+        except Exception as e:
+            logger.error(f"Error closing runner: {e}")
+    
+    # Shared session service: write buffered events and close its storage
+    session_service = get_session_service()
+    close = getattr(session_service, "close", None)
+    if close is not None:
+        try:
+            await close()
+        except Exception as e:
+            logger.error(f"Error closing session service: {e}")
+    
+    _known_sessions.clear()
+    _ingested.clear()
+    _session_lock = None
+    logger.info("Runner pool shut down")
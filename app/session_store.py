@@ -0,0 +1,537 @@
+"""
+SQLite-backed session service for MMVN Agent
+Persists ADK sessions in a WAL-mode SQLite database that several worker processes can share
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session, State
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, str, str]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    snapshot_seq INTEGER NOT NULL DEFAULT 0,
+    create_time REAL NOT NULL,
+    update_time REAL NOT NULL,
+    PRIMARY KEY (app_name, user_id, id)
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    event_data TEXT NOT NULL,
+    state_delta TEXT
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (app_name, user_id, session_id, seq);
+CREATE TABLE IF NOT EXISTS app_states (
+    app_name TEXT PRIMARY KEY,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS user_states (
+    app_name TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (app_name, user_id)
+);
+"""
+
+
+def _split_state_delta(delta: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Split a state delta into (app, user, session) parts, dropping temp keys."""
+    app_delta, user_delta, session_delta = {}, {}, {}
+    for key, value in (delta or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app_delta[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_delta[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_delta[key] = value
+    return app_delta, user_delta, session_delta
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class _PendingEvent:
+    """An event appended in memory but not yet written to the database."""
+
+    __slots__ = ("key", "event_id", "timestamp", "event_data", "app_delta", "user_delta", "session_delta")
+
+    def __init__(self, key: SessionKey, event: Event):
+        self.key = key
+        self.event_id = event.id
+        self.timestamp = event.timestamp
+        self.event_data = event.model_dump_json(exclude_none=True)
+        delta = event.actions.state_delta if event.actions else None
+        self.app_delta, self.user_delta, self.session_delta = _split_state_delta(delta)
+
+
+class _CachedSession:
+    """A recently used session and the storage revision (last event seq) it reflects."""
+
+    __slots__ = ("session", "synced_revision")
+
+    def __init__(self, session: Session, synced_revision: int):
+        self.session = session
+        self.synced_revision = synced_revision
+
+
+class SQLiteSessionService(BaseSessionService):
+    """
+    ADK session service storing sessions, events and app/user state in SQLite.
+
+    - The database runs in WAL mode, so readers in other worker processes are not blocked
+      by the writer and every process sees committed events.
+    - Events are buffered and written in one transaction per batch (when the buffer is
+      full, after a short delay, or on flush()).
+    - Recently used sessions are kept in a bounded LRU cache and re-read only when another
+      process has updated them. App and user state are shared with other sessions, so they
+      are re-read on every get (one small row each).
+    - Session-scoped state deltas are stored with their events and folded into the state
+      snapshot only when a session is loaded; the snapshot is rewritten once enough
+      deltas have accumulated.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        cache_size: int = 256,
+        batch_size: int = 32,
+        flush_interval: float = 0.5,
+        compact_after: int = 50,
+        busy_timeout: float = 5.0
+    ):
+        """
+        Initialize the session service.
+
+        Args:
+            db_path: Path of the SQLite database file.
+            cache_size: Maximum number of sessions kept in memory.
+            batch_size: Number of buffered events that triggers an immediate write.
+            flush_interval: Seconds a buffered event may wait before being written.
+            compact_after: Number of folded state deltas after which the snapshot is rewritten.
+            busy_timeout: Seconds to wait for a database lock held by another process.
+        """
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+        self.busy_timeout = busy_timeout
+        self._cache: "OrderedDict[SessionKey, _CachedSession]" = OrderedDict()
+        self._pending: List[_PendingEvent] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        # All database work runs on one thread with one connection, in submission order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mm-session-db")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # --- Database access (executor thread only) ---
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _load_state(conn: sqlite3.Connection, table: str, where: str, params: tuple) -> Dict[str, Any]:
+        row = conn.execute(f"SELECT state FROM {table} WHERE {where}", params).fetchone()
+        return json.loads(row["state"]) if row else {}
+
+    def _merge_scoped_state(
+        self, conn: sqlite3.Connection, table: str, where: str, params: tuple, delta: Dict[str, Any]
+    ) -> None:
+        state = self._load_state(conn, table, where, params)
+        state.update(delta)
+        columns = "app_name" if table == "app_states" else "app_name, user_id"
+        placeholders = ", ".join("?" for _ in params)
+        conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({columns}, state) VALUES ({placeholders}, ?)",
+            (*params, _dumps(state))
+        )
+
+    def _insert_session(self, key: SessionKey, state: Dict[str, Any], now: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        app_name, user_id, session_id = key
+        app_delta, user_delta, session_state = _split_state_delta(state)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            try:
+                conn.execute(
+                    "INSERT INTO sessions (app_name, user_id, id, state, create_time, update_time) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (app_name, user_id, session_id, _dumps(session_state), now, now)
+                )
+            except sqlite3.IntegrityError:
+                raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+            if app_delta:
+                self._merge_scoped_state(conn, "app_states", "app_name=?", (app_name,), app_delta)
+            if user_delta:
+                self._merge_scoped_state(conn, "user_states", "app_name=? AND user_id=?", (app_name, user_id), user_delta)
+            app_state = self._load_state(conn, "app_states", "app_name=?", (app_name,))
+            user_state = self._load_state(conn, "user_states", "app_name=? AND user_id=?", (app_name, user_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return app_state, user_state
+
+    @staticmethod
+    def _revision(conn: sqlite3.Connection, key: SessionKey) -> int:
+        """Return the seq of the last stored event of a session (0 if it has none)."""
+        row = conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) AS revision FROM events WHERE app_name=? AND user_id=? AND session_id=?",
+            key
+        ).fetchone()
+        return row["revision"]
+
+    def _write_batch(self, batch: List[_PendingEvent]) -> Dict[SessionKey, Tuple[int, int]]:
+        """Write a batch of events and return the (before, after) revision of each session."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # The write lock is held, so the revisions read here include only our own inserts
+            revisions = {pending.key: self._revision(conn, pending.key) for pending in batch}
+            conn.executemany(
+                "INSERT INTO events (app_name, user_id, session_id, id, timestamp, event_data, state_delta) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (*pending.key, pending.event_id, pending.timestamp, pending.event_data,
+                     _dumps(pending.session_delta) if pending.session_delta else None)
+                    for pending in batch
+                ]
+            )
+            update_times: Dict[SessionKey, float] = {}
+            for pending in batch:
+                app_name, user_id, _ = pending.key
+                update_times[pending.key] = max(update_times.get(pending.key, 0.0), pending.timestamp)
+                if pending.app_delta:
+                    self._merge_scoped_state(conn, "app_states", "app_name=?", (app_name,), pending.app_delta)
+                if pending.user_delta:
+                    self._merge_scoped_state(
+                        conn, "user_states", "app_name=? AND user_id=?", (app_name, user_id), pending.user_delta
+                    )
+            for key, update_time in update_times.items():
+                conn.execute(
+                    "UPDATE sessions SET update_time=MAX(update_time, ?) WHERE app_name=? AND user_id=? AND id=?",
+                    (update_time, *key)
+                )
+            revisions = {key: (before, self._revision(conn, key)) for key, before in revisions.items()}
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return revisions
+
+    def _read_freshness(self, key: SessionKey) -> Optional[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+        """Read the session revision and the current app and user state."""
+        app_name, user_id, _ = key
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT 1 FROM sessions WHERE app_name=? AND user_id=? AND id=?", key
+        ).fetchone()
+        if row is None:
+            return None
+        revision = self._revision(conn, key)
+        app_state = self._load_state(conn, "app_states", "app_name=?", (app_name,))
+        user_state = self._load_state(conn, "user_states", "app_name=? AND user_id=?", (app_name, user_id))
+        return revision, app_state, user_state
+
+    def _load_session(self, key: SessionKey) -> Optional[Tuple[Session, int]]:
+        app_name, user_id, session_id = key
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT state, snapshot_seq, update_time FROM sessions WHERE app_name=? AND user_id=? AND id=?", key
+        ).fetchone()
+        if row is None:
+            return None
+
+        # Fold the state deltas written since the last snapshot
+        state = json.loads(row["state"])
+        snapshot_seq = row["snapshot_seq"]
+        deltas = conn.execute(
+            "SELECT seq, state_delta FROM events WHERE app_name=? AND user_id=? AND session_id=? "
+            "AND seq > ? AND state_delta IS NOT NULL ORDER BY seq",
+            (*key, snapshot_seq)
+        ).fetchall()
+        for delta in deltas:
+            state.update(json.loads(delta["state_delta"]))
+        if len(deltas) >= self.compact_after:
+            conn.execute(
+                "UPDATE sessions SET state=?, snapshot_seq=MAX(snapshot_seq, ?) "
+                "WHERE app_name=? AND user_id=? AND id=? AND snapshot_seq=?",
+                (_dumps(state), deltas[-1]["seq"], *key, snapshot_seq)
+            )
+
+        event_rows = conn.execute(
+            "SELECT seq, event_data FROM events WHERE app_name=? AND user_id=? AND session_id=? ORDER BY seq", key
+        ).fetchall()
+        events = [Event.model_validate_json(event_row["event_data"]) for event_row in event_rows]
+        revision = event_rows[-1]["seq"] if event_rows else 0
+        app_state = self._load_state(conn, "app_states", "app_name=?", (app_name,))
+        user_state = self._load_state(conn, "user_states", "app_name=? AND user_id=?", (app_name, user_id))
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=self._merged_state(state, app_state, user_state),
+            events=events,
+            last_update_time=row["update_time"]
+        )
+        return session, revision
+
+    def _list_sessions(self, app_name: str, user_id: Optional[str]) -> List[sqlite3.Row]:
+        if user_id is None:
+            return self._connection().execute(
+                "SELECT user_id, id, update_time FROM sessions WHERE app_name=? ORDER BY update_time", (app_name,)
+            ).fetchall()
+        return self._connection().execute(
+            "SELECT user_id, id, update_time FROM sessions WHERE app_name=? AND user_id=? ORDER BY update_time",
+            (app_name, user_id)
+        ).fetchall()
+
+    def _delete_session(self, key: SessionKey) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=?", key)
+            conn.execute("DELETE FROM sessions WHERE app_name=? AND user_id=? AND id=?", key)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _read_user_state(self, app_name: str, user_id: str) -> Dict[str, Any]:
+        return self._load_state(
+            self._connection(), "user_states", "app_name=? AND user_id=?", (app_name, user_id)
+        )
+
+    def _close_connection(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Cache helpers ---
+
+    @staticmethod
+    def _merged_state(
+        session_state: Dict[str, Any], app_state: Dict[str, Any], user_state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        state = dict(session_state)
+        state.update({State.APP_PREFIX + key: value for key, value in app_state.items()})
+        state.update({State.USER_PREFIX + key: value for key, value in user_state.items()})
+        return state
+
+    def _refresh_scoped_state(
+        self, session: Session, app_state: Dict[str, Any], user_state: Dict[str, Any]
+    ) -> None:
+        """Replace the app and user state of a cached session with the stored ones."""
+        # Buffered events of this process are not in the database yet
+        for pending in self._pending:
+            if pending.key[0] == session.app_name:
+                app_state.update(pending.app_delta)
+                if pending.key[1] == session.user_id:
+                    user_state.update(pending.user_delta)
+        session_state = {
+            key: value for key, value in session.state.items()
+            if not key.startswith((State.APP_PREFIX, State.USER_PREFIX))
+        }
+        session.state = self._merged_state(session_state, app_state, user_state)
+
+    def _remember(self, key: SessionKey, session: Session, revision: int) -> None:
+        self._cache[key] = _CachedSession(session, revision)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _view(session: Session, config: Optional[GetSessionConfig]) -> Session:
+        """Return a deep copy of the session with the event filters of config applied."""
+        copied = session.model_copy(deep=True)
+        if config is not None:
+            if config.after_timestamp:
+                copied.events = [event for event in copied.events if event.timestamp >= config.after_timestamp]
+            if config.num_recent_events is not None:
+                copied.events = copied.events[-config.num_recent_events:] if config.num_recent_events else []
+        return copied
+
+    # --- BaseSessionService ---
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None
+    ) -> Session:
+        session_id = (session_id or "").strip() or uuid.uuid4().hex
+        key = (app_name, user_id, session_id)
+        now = time.time()
+        app_state, user_state = await self._run(self._insert_session, key, state or {}, now)
+
+        _, _, session_state = _split_state_delta(state or {})
+        session = Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=self._merged_state(session_state, app_state, user_state),
+            events=[],
+            last_update_time=now
+        )
+        self._remember(key, session, 0)
+        return session.model_copy(deep=True)
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None
+    ) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        freshness = await self._run(self._read_freshness, key)
+        if freshness is None:
+            self._cache.pop(key, None)
+            return None
+        revision, app_state, user_state = freshness
+
+        # Event seqs only grow, so unlike wall-clock update times any write by another
+        # process (even with an older event timestamp) changes the revision
+        cached = self._cache.get(key)
+        if cached is not None and revision == cached.synced_revision:
+            # Other sessions or processes may have changed the shared app and user state
+            self._refresh_scoped_state(cached.session, app_state, user_state)
+            self._cache.move_to_end(key)
+            return self._view(cached.session, config)
+
+        # Another process updated the session: write our buffered events, then reload
+        await self.flush()
+        loaded = await self._run(self._load_session, key)
+        if loaded is None:
+            self._cache.pop(key, None)
+            return None
+        session, revision = loaded
+        self._remember(key, session, revision)
+        return self._view(session, config)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        await self.flush()
+        rows = await self._run(self._list_sessions, app_name, user_id)
+        return ListSessionsResponse(sessions=[
+            Session(id=row["id"], app_name=app_name, user_id=row["user_id"], last_update_time=row["update_time"])
+            for row in rows
+        ])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._pending = [pending for pending in self._pending if pending.key != key]
+        self._cache.pop(key, None)
+        await self._run(self._delete_session, key)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        await self.flush()
+        return await self._run(self._read_user_state, app_name, user_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        event = await super().append_event(session, event)
+        session.last_update_time = event.timestamp
+
+        key = (session.app_name, session.user_id, session.id)
+        cached = self._cache.get(key)
+        if cached is not None and cached.session is not session:
+            # Keep the cached copy in step with the caller's session object
+            self._commit_event_to_session(cached.session, event)
+            cached.session.last_update_time = event.timestamp
+
+        self._pending.append(_PendingEvent(key, event))
+        self._schedule_flush()
+        return event
+
+    async def flush(self) -> None:
+        """Write all buffered events to the database in one transaction."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            revisions = await self._run(self._write_batch, batch)
+        except Exception:
+            # Keep the events so the next flush retries them in order
+            self._pending = batch + self._pending
+            logger.exception(f"Error writing {len(batch)} session events")
+            raise
+
+        for key, (before, after) in revisions.items():
+            cached = self._cache.get(key)
+            # Only advance when no other process wrote since the cached copy was synced;
+            # otherwise the next get reloads the session
+            if cached is not None and cached.synced_revision == before:
+                cached.synced_revision = after
+
+    def _schedule_flush(self) -> None:
+        if len(self._pending) >= self.batch_size:
+            self._start(self._flush_later(0))
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = self._start(self._flush_later(self.flush_interval))
+
+    def _start(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        # Keep a reference so the task is not garbage collected before it runs
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self.flush()
+        except Exception:
+            # Already logged; the events stay buffered for the next flush
+            pass
+
+    async def close(self) -> None:
+        """Write buffered events and close the database connection."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.flush()
+        await self._run(self._close_connection)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Cache and buffer statistics."""
+        return {"cached_sessions": len(self._cache), "pending_events": len(self._pending)}
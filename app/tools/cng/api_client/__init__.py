@@ -15,11 +15,13 @@ from .product import ProductAPI
 from .cart import CartAPI
 from .auth import AuthAPI
 from .base import APIClientBase
+from .session_view import SessionClientView
 
 __all__ = [
     'EcommerceAPIClient',
     'APIClientBase',
     'ProductAPI',
     'CartAPI',
-    'AuthAPI'
+    'AuthAPI',
+    'SessionClientView'
 ] 
\ No newline at end of file
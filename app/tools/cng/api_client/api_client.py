@@ -24,8 +24,7 @@ class EcommerceAPIClient(APIClientBase):
     def __init__(
         self,
         base_url: str,
-        timeout: Optional[Union[int, aiohttp.ClientTimeout]] = None,
-        loop: Optional[asyncio.AbstractEventLoop] = None
+        timeout: Optional[Union[int, aiohttp.ClientTimeout]] = None
     ):
         """
         Khởi tạo API client.
@@ -33,10 +32,9 @@ class EcommerceAPIClient(APIClientBase):
         Args:
             base_url: URL cơ sở của API.
             timeout: Timeout cho requests, có thể là số giây hoặc ClientTimeout object.
-            loop: Event loop tùy chọn, mặc định sẽ lấy loop hiện tại.
         """
         # Khởi tạo lớp cơ sở
-        super().__init__(base_url, timeout, loop)
+        super().__init__(base_url, timeout)
         
         # Import các module API ở đây để tránh vòng lặp import
         from .product import ProductAPI
@@ -44,9 +42,11 @@ class EcommerceAPIClient(APIClientBase):
         from .auth import AuthAPI
         
         # Tạo các instance của các module API
-        self._product_api = ProductAPI(base_url, timeout, loop)
-        self._cart_api = CartAPI(base_url, timeout, loop)
-        self._auth_api = AuthAPI(base_url, timeout, loop)
+        self._product_api = ProductAPI(base_url, timeout)
+        self._cart_api = CartAPI(base_url, timeout)
+        self._auth_api = AuthAPI(base_url, timeout)
+        # Token được làm mới trong nền cần được đồng bộ cho tất cả các API module
+        self._auth_api.token_manager.add_listener(self._on_token_refreshed)
     
     async def ensure_session(self):
         """Đảm bảo session được khởi tạo và đồng bộ giữa các API module."""
@@ -69,6 +69,22 @@ class EcommerceAPIClient(APIClientBase):
         self._cart_api.set_auth_token(token)
         self._auth_api.set_auth_token(token)
     
+    def clear_auth_token(self):
+        """Xóa token xác thực của tất cả các API module."""
+        super().clear_auth_token()
+        self._product_api.clear_auth_token()
+        self._cart_api.clear_auth_token()
+        self._auth_api.clear_auth_token()
+    
+    def _on_token_refreshed(self, old_token, new_token):
+        # Bỏ qua nếu client đã chuyển sang token khác trong lúc làm mới
+        if self._auth_token != old_token:
+            return
+        if new_token:
+            self.set_auth_token(new_token)
+        else:
+            self.clear_auth_token()
+    
     def set_store_code(self, store_code: str):
         """Đồng bộ mã cửa hàng cho tất cả các API module."""
         super().set_store_code(store_code)
@@ -90,6 +106,15 @@ class EcommerceAPIClient(APIClientBase):
     async def suggest_products(self, base_query: str, filters=None, sort=None, page_size=10, current_page=1):
         return await self._product_api.suggest_products(base_query, filters, sort, page_size, current_page)
     
+    async def planned_search(self, query: str, filters=None, sort=None, page_size=10, current_page=1):
+        return await self._product_api.planned_search(query, filters, sort, page_size, current_page)
+    
+    async def resolve_product(self, product_id: str, parallel=None):
+        return await self._product_api.resolve_product(product_id, parallel)
+    
+    def iter_products(self, query, filters=None, sort=None, page_size=20, start_page=1, max_pages=None, read_ahead=1):
+        return self._product_api.iter_products(query, filters, sort, page_size, start_page, max_pages, read_ahead)
+    
     async def search_multiple_products(self, keywords, filters=None, sort=None, combine_mode="union", page_size=10, current_page=1):
         return await self._product_api.search_multiple_products(keywords, filters, sort, combine_mode, page_size, current_page)
     
@@ -100,17 +125,20 @@ class EcommerceAPIClient(APIClientBase):
             self._cart_id = cart_result.get("cart_id")
         return cart_result
     
-    async def add_to_cart(self, cart_id=None, product_id=None, quantity=1, retry_count=3):
-        return await self._cart_api.add_to_cart(cart_id or self._cart_id, product_id, quantity, retry_count)
+    async def add_to_cart(self, cart_id=None, product_id=None, quantity=1, retry_count=3, profile="summary"):
+        return await self._cart_api.add_to_cart(cart_id or self._cart_id, product_id, quantity, retry_count, profile)
+    
+    async def add_many_to_cart(self, cart_id=None, items=None, retry_count=3, profile="summary"):
+        return await self._cart_api.add_many_to_cart(cart_id or self._cart_id, items or [], retry_count, profile)
     
-    async def get_cart_info(self, cart_id=None):
-        return await self._cart_api.get_cart_info(cart_id or self._cart_id)
+    async def get_cart_info(self, cart_id=None, profile="checkout"):
+        return await self._cart_api.get_cart_info(cart_id or self._cart_id, profile)
     
-    async def update_cart_item(self, cart_id=None, cart_item_id=None, quantity=1):
-        return await self._cart_api.update_cart_item(cart_id or self._cart_id, cart_item_id, quantity)
+    async def update_cart_item(self, cart_id=None, cart_item_id=None, quantity=1, profile="summary"):
+        return await self._cart_api.update_cart_item(cart_id or self._cart_id, cart_item_id, quantity, profile)
     
-    async def remove_cart_item(self, cart_id=None, cart_item_id=None):
-        return await self._cart_api.remove_cart_item(cart_id or self._cart_id, cart_item_id)
+    async def remove_cart_item(self, cart_id=None, cart_item_id=None, profile="summary"):
+        return await self._cart_api.remove_cart_item(cart_id or self._cart_id, cart_item_id, profile)
     
     # Các phương thức Auth API
     async def login(self, email, password):
@@ -142,45 +170,7 @@ class EcommerceAPIClient(APIClientBase):
         return await self._auth_api.get_customer_info()
     
     async def check_auth_status(self):
-        return await self._auth_api.check_auth_status()
-    
-    # Phương thức kiểm tra kết nối
-    async def ping(self) -> Dict[str, Any]:
-        """
-        Kiểm tra kết nối với API.
-        
-        Returns:
-            Dict[str, Any]: Kết quả kiểm tra kết nối.
-        """
-        try:
-            # Sử dụng truy vấn GraphQL đơn giản để kiểm tra kết nối
-            graphql_query = """
-            query {
-              storeConfig {
-                store_code
-              }
-            }
-            """
-            
-            await self.ensure_session()
-            result = await self.execute_graphql(graphql_query)
-            
-            if result.get("success", False):
-                return {
-                    "success": True,
-                    "message": "Kết nối đến API thành công",
-                    "data": result.get("data", {})
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": "Không thể kết nối đến API",
-                    "error": result.get("message", "Unknown error")
-                }
-                
-        except Exception as e:
-            logger.error(f"Lỗi khi ping API: {str(e)}")
-            return {
-                "success": False,
-                "message": f"Error pinging API: {str(e)}"
-            } 
\ No newline at end of file
+        result = await self._auth_api.check_auth_status()
+        if result.get("success", False) and not result.get("is_authenticated", False):
+            self.clear_auth_token()
+        return result
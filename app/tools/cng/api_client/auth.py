@@ -6,9 +6,12 @@ API module cho các thao tác liên quan đến xác thực và tài khoản
 """
 
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Union
+
+import aiohttp
 
 from .base import APIClientBase
+from .token_manager import TOKEN_EXPIRED, TOKEN_UNKNOWN, create_token_manager, token_expiry
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +20,31 @@ class AuthAPI(APIClientBase):
     API Client cho các thao tác liên quan đến xác thực và tài khoản.
     """
     
+    def __init__(
+        self,
+        base_url: str,
+        timeout: Optional[Union[int, aiohttp.ClientTimeout]] = None
+    ):
+        super().__init__(base_url, timeout)
+        # Theo dõi thời hạn token để kiểm tra xác thực bằng đồng hồ cục bộ
+        self.token_manager = create_token_manager(self.get_token_lifetime)
+    
+    def set_auth_token(self, token: str):
+        """Đặt token xác thực; token cũ không còn được theo dõi và làm mới."""
+        if token != self._auth_token:
+            self.token_manager.forget(self._auth_token)
+        super().set_auth_token(token)
+    
+    def clear_auth_token(self):
+        """Xóa token xác thực và ngừng theo dõi token đó."""
+        self.token_manager.forget(self._auth_token)
+        super().clear_auth_token()
+    
+    async def close(self):
+        """Hủy các tác vụ làm mới token và đóng session."""
+        await self.token_manager.close()
+        await super().close()
+    
     async def login(self, email: str, password: str) -> Dict[str, Any]:
         """
         Đăng nhập vào hệ thống.
@@ -51,8 +79,9 @@ class AuthAPI(APIClientBase):
             token = data.get("generateCustomerToken", {}).get("token")
             
             if token:
-                # Lưu token xác thực
+                # Lưu token xác thực; không giữ mật khẩu nên token này không được làm mới tự động
                 self.set_auth_token(token)
+                await self.token_manager.track(token)
                 
                 return {
                     "success": True,
@@ -123,6 +152,11 @@ class AuthAPI(APIClientBase):
                 # Lưu token xác thực và mã cửa hàng
                 self.set_auth_token(token)
                 self.set_store_code(store_view_code)
+                # Đăng nhập lại bằng cùng thông tin MCard để làm mới token trước khi hết hạn
+                await self.token_manager.track(
+                    token,
+                    relogin=lambda: self.login_with_mcard(hash_value, store, cust_no, phone, cust_no_mm, cust_name)
+                )
                 
                 return {
                     "success": True,
@@ -216,6 +250,7 @@ class AuthAPI(APIClientBase):
             if token:
                 # Lưu token xác thực
                 self.set_auth_token(token)
+                await self.token_manager.track(token)
                 
                 return {
                     "success": True,
@@ -331,13 +366,47 @@ class AuthAPI(APIClientBase):
         """
         Kiểm tra trạng thái xác thực của người dùng.
         
+        Token được cấp qua các phương thức đăng nhập đã được ghi nhận thời điểm hết hạn nên
+        chỉ cần so sánh với đồng hồ cục bộ. Token được đặt từ bên ngoài (chưa được theo dõi)
+        được xác nhận bằng một lời gọi API; không biết thời điểm cấp của token này nên nó chỉ
+        được theo dõi khi đọc được thời điểm hết hạn từ chính token (trường exp của JWT),
+        nếu không thì lần kiểm tra sau lại gọi API.
+        
         Returns:
             Dict[str, Any]: Kết quả kiểm tra.
         """
-        # Thử lấy thông tin khách hàng để kiểm tra token còn hiệu lực không
+        token = self._auth_token
+        if not token:
+            return {
+                "success": True,
+                "is_authenticated": False,
+                "message": "Người dùng chưa đăng nhập hoặc phiên đã hết hạn"
+            }
+        
+        status = self.token_manager.status(token)
+        if status["state"] == TOKEN_EXPIRED:
+            self.token_manager.forget(token)
+            self.clear_auth_token()  # Xóa token nếu đã hết hạn
+            return {
+                "success": True,
+                "is_authenticated": False,
+                "message": "Người dùng chưa đăng nhập hoặc phiên đã hết hạn"
+            }
+        if status["state"] != TOKEN_UNKNOWN:
+            return {
+                "success": True,
+                "is_authenticated": True,
+                "expires_in": int(status["expires_in"]),
+                "message": "Người dùng đã đăng nhập"
+            }
+        
+        # Token chưa được theo dõi: thử lấy thông tin khách hàng để kiểm tra token còn hiệu lực không
         result = await self.get_customer_info()
         
         if result.get("success", False):
+            expires_at = token_expiry(token)
+            if expires_at is not None:
+                await self.token_manager.track(token, expires_at=expires_at)
             return {
                 "success": True,
                 "is_authenticated": True,
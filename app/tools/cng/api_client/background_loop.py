@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Event loop chạy nền trên một thread riêng cho các caller đồng bộ.
+
+Các wrapper đồng bộ (thread pool worker, batch script...) gửi coroutine sang loop nền bằng
+run_coroutine_threadsafe thay vì tự chạy run_until_complete trên loop của thread hiện tại.
+Mọi caller dùng chung một loop nên dùng chung connection pool, và các lời gọi từ nhiều
+thread được thực thi đồng thời.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import logging
+import threading
+from typing import Any, Awaitable, Optional, TypeVar
+
+from .config import Config
+from .registry import get_loop_registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BackgroundLoop:
+    """
+    Một event loop chạy liên tục trên thread daemon, khởi động ở lần dùng đầu tiên.
+    """
+
+    def __init__(self, name: str = "mm-api-loop"):
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name=self._name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        Chạy coroutine trên loop nền và chờ kết quả, trong context (contextvars) của caller.
+
+        Args:
+            coro: Coroutine cần chạy.
+            timeout: Thời gian chờ tối đa (giây), mặc định Config.TOOL_CALL_TIMEOUT.
+
+        Returns:
+            Kết quả của coroutine.
+
+        Raises:
+            TimeoutError: Nếu quá thời gian chờ; coroutine bị hủy trên loop nền.
+            RuntimeError: Nếu được gọi từ chính thread của loop nền (sẽ gây deadlock).
+        """
+        loop = self._ensure_started()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Không thể chờ đồng bộ từ chính event loop nền")
+
+        # Coroutine chạy trong bản sao context của caller (ví dụ SessionClientView đang gắn),
+        # vì task được tạo từ callback mang context hiện tại khi gửi sang loop nền
+        context = contextvars.copy_context()
+        future = context.run(asyncio.run_coroutine_threadsafe, coro, loop)
+        timeout = Config.TOOL_CALL_TIMEOUT if timeout is None else timeout
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Hủy coroutine trên loop nền để không tiếp tục chiếm kết nối
+            future.cancel()
+            raise TimeoutError(f"Quá thời gian chờ {timeout}s khi thực thi trên event loop nền")
+        except BaseException:
+            # Caller bị ngắt (KeyboardInterrupt...): hủy coroutine đang chạy
+            future.cancel()
+            raise
+
+    def shutdown(self, timeout: float = 5) -> None:
+        """Đóng các connection pool của loop nền, dừng loop và thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None or loop.is_closed():
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(get_loop_registry().close_loop(), loop).result(timeout)
+            # Kết thúc các async generator còn treo (gồm guard đóng pool của registry)
+            asyncio.run_coroutine_threadsafe(loop.shutdown_asyncgens(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"Lỗi khi đóng connection pool của event loop nền: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        if not loop.is_running():
+            loop.close()
+
+
+# Loop nền dùng chung cho toàn bộ process
+_background_loop = BackgroundLoop()
+atexit.register(_background_loop.shutdown)
+
+
+def get_background_loop() -> BackgroundLoop:
+    """Trả về event loop nền dùng chung."""
+    return _background_loop
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Chạy coroutine trên event loop nền dùng chung và chờ kết quả.
+
+    Args:
+        coro: Coroutine cần chạy.
+        timeout: Thời gian chờ tối đa (giây), mặc định Config.TOOL_CALL_TIMEOUT.
+
+    Returns:
+        Kết quả của coroutine.
+    """
+    return _background_loop.run(coro, timeout)
@@ -9,15 +9,43 @@ import logging
 import aiohttp
 import asyncio
 import json
+import re
 import ssl
 from typing import Dict, Any, Optional, Union
 from urllib.parse import urljoin
 
-from tenacity import retry, stop_after_attempt, wait_exponential
 from .config import Config
+from .decoding import get_operation_name, get_response_decoder
+from .http_cache import get_http_cache, is_cacheable_request, make_cache_key
+from .registry import get_loop_registry
+from .retry import get_retry_policy
+from .session_view import get_current_view
 
 logger = logging.getLogger(__name__)
 
+_MUTATION_RE = re.compile(r"\s*mutation\b")
+
+
+def _session_property(name: str) -> property:
+    """
+    Thuộc tính trạng thái phiên: đọc/ghi vào SessionClientView đang gắn với context nếu có,
+    nếu không thì vào chính client.
+    """
+    own = f"_own_{name}"
+
+    def fget(self):
+        view = get_current_view()
+        return getattr(self, own) if view is None else getattr(view, name)
+
+    def fset(self, value):
+        view = get_current_view()
+        if view is None:
+            setattr(self, own, value)
+        else:
+            setattr(view, name, value)
+
+    return property(fget, fset)
+
 class APIClientBase:
     """
     Lớp cơ sở cho các API Client, cung cấp các phương thức chung.
@@ -26,16 +54,17 @@ class APIClientBase:
     def __init__(
         self,
         base_url: str,
-        timeout: Optional[Union[int, aiohttp.ClientTimeout]] = None,
-        loop: Optional[asyncio.AbstractEventLoop] = None
+        timeout: Optional[Union[int, aiohttp.ClientTimeout]] = None
     ):
         """
         Khởi tạo API client cơ sở.
         
+        Client không gắn với event loop nào: session được lấy từ registry theo loop đang chạy
+        tại thời điểm gọi API.
+        
         Args:
             base_url: URL cơ sở của API.
             timeout: Timeout cho requests, có thể là số giây hoặc ClientTimeout object.
-            loop: Event loop tùy chọn, mặc định sẽ lấy loop hiện tại.
         """
         self.base_url = base_url.rstrip("/")
         
@@ -46,39 +75,41 @@ class APIClientBase:
         else:
             self.timeout = aiohttp.ClientTimeout(total=120)  # Default 120s - increased to handle slow external APIs
             
-        self._session = None
-        self._loop = loop or asyncio.get_event_loop()
-        self._auth_token = None
-        self._store_code = Config.STORE_CODE
-        self._cart_id = None  # Thêm _cart_id vào lớp cơ sở để tránh vòng lặp import
+        # Các client cùng URL và timeout dùng chung một connection pool trên mỗi loop
+        self._pool_key = ("ecommerce", self.base_url, self.timeout.total)
+        # Trạng thái mặc định khi không gọi qua SessionClientView
+        self._own_auth_token = None
+        self._own_store_code = Config.STORE_CODE
+        self._own_cart_id = None  # Thêm _cart_id vào lớp cơ sở để tránh vòng lặp import
+    
+    # Token, mã cửa hàng và cart_id theo phiên (xem session_view.py)
+    _auth_token = _session_property("auth_token")
+    _store_code = _session_property("store_code")
+    _cart_id = _session_property("cart_id")
     
     async def create_session(self) -> aiohttp.ClientSession:
         """
-        Tạo một session mới.
+        Tạo một session mới trên event loop đang chạy.
         
         Returns:
             aiohttp.ClientSession: Session mới được tạo.
         """
         try:
-            # Kiểm tra và lấy event loop hiện tại
-            try:
-                self._loop = asyncio.get_running_loop()
-            except RuntimeError:
-                # Nếu không có loop đang chạy, tạo loop mới
-                self._loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self._loop)
-            
             # Tạo SSL context để xử lý certificate verification
             ssl_context = ssl.create_default_context()
             ssl_context.check_hostname = False
             ssl_context.verify_mode = ssl.CERT_NONE
             
-            # Tạo connector với SSL context
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
+            # Tạo connector với SSL context, cache DNS và giữ kết nối idle cho lần gọi sau
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_context,
+                use_dns_cache=True,
+                ttl_dns_cache=Config.DNS_CACHE_TTL,
+                keepalive_timeout=Config.KEEPALIVE_TIMEOUT
+            )
                 
             session = aiohttp.ClientSession(
                 timeout=self.timeout,
-                loop=self._loop,
                 connector=connector
             )
             return session
@@ -88,33 +119,35 @@ class APIClientBase:
             
     async def _get_session(self) -> aiohttp.ClientSession:
         """
-        Lấy hoặc tạo một session mới.
+        Lấy session của event loop đang chạy từ registry, tạo mới nếu chưa có.
         
         Returns:
-            aiohttp.ClientSession: Session hiện tại hoặc mới.
+            aiohttp.ClientSession: Session của loop đang chạy.
         """
-        if self._session is None or self._session.closed:
-            self._session = await self.create_session()
-        return self._session
+        registry = get_loop_registry()
+        session = registry.get(self._pool_key)
+        if session is None:
+            created = await self.create_session()
+            session = registry.put(self._pool_key, created)
+            if session is not created:
+                # Một coroutine khác đã tạo session cho loop này trước
+                await created.close()
+        return session
         
     async def ensure_session(self):
-        """Đảm bảo session được khởi tạo và sẵn sàng sử dụng."""
+        """Đảm bảo session của event loop đang chạy được khởi tạo và sẵn sàng sử dụng."""
         try:
-            if self._session is None or self._session.closed:
-                self._session = await self.create_session()
+            await self._get_session()
         except Exception as e:
             logger.error(f"Lỗi khi đảm bảo session: {str(e)}")
             raise
     
     async def close(self):
-        """Đóng session hiện tại nếu có."""
-        if self._session and not self._session.closed:
-            try:
-                await self._session.close()
-            except Exception as e:
-                logger.error(f"Lỗi khi đóng session: {str(e)}")
-            finally:
-                self._session = None
+        """Đóng connection pool của client trên event loop đang chạy."""
+        try:
+            await get_loop_registry().close(self._pool_key)
+        except Exception as e:
+            logger.error(f"Lỗi khi đóng session: {str(e)}")
     
     async def __aenter__(self):
         """Async context manager entry."""
@@ -166,10 +199,6 @@ class APIClientBase:
         """
         self._store_code = store_code
     
-    @retry(
-        stop=stop_after_attempt(Config.MAX_RETRY_ATTEMPTS),
-        wait=wait_exponential(multiplier=1, min=Config.RETRY_DELAY, max=10)
-    )
     async def execute_graphql(
         self, 
         query: str, 
@@ -179,7 +208,7 @@ class APIClientBase:
         method: str = "POST"
     ) -> Dict[str, Any]:
         """
-        Thực hiện truy vấn GraphQL.
+        Thực hiện truy vấn GraphQL, tự động thử lại các lỗi tạm thời theo chính sách retry chung.
         
         Args:
             query: Truy vấn GraphQL.
@@ -190,9 +219,46 @@ class APIClientBase:
             
         Returns:
             Dict[str, Any]: Kết quả từ API.
+        """
+        policy = get_retry_policy()
+        policy.budget.record_request()
+        # Mutation không idempotent: chỉ thử lại khi chắc chắn server chưa xử lý request
+        idempotent = not _MUTATION_RE.match(query)
+        
+        attempt = 0
+        while True:
+            result = await self._execute_graphql_once(query, variables, headers, timeout, method)
+            if not policy.should_retry(result, attempt, idempotent):
+                return result
+            
+            delay = policy.backoff(attempt)
+            logger.warning(
+                f"Lỗi tạm thời khi thực hiện truy vấn GraphQL ({result.get('code')}), "
+                f"thử lại lần {attempt + 1} sau {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def _execute_graphql_once(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[int] = None,
+        method: str = "POST"
+    ) -> Dict[str, Any]:
+        """
+        Thực hiện truy vấn GraphQL một lần, mọi lỗi được chuyển thành dict kết quả có mã lỗi.
+        
+        Args:
+            query: Truy vấn GraphQL.
+            variables: Biến cho truy vấn (tùy chọn).
+            headers: Headers bổ sung (tùy chọn).
+            timeout: Timeout cho request (tùy chọn).
+            method: Phương thức HTTP.
             
-        Raises:
-            Exception: Nếu có lỗi xảy ra.
+        Returns:
+            Dict[str, Any]: Kết quả từ API.
         """
         _headers = self._get_headers()
         if headers:
@@ -203,11 +269,10 @@ class APIClientBase:
         else:
             _timeout = self.timeout
         
-        # Đảm bảo session được khởi tạo
+        # Lấy session của event loop đang chạy
         try:
-            if self._session is None or self._session.closed:
-                await self.ensure_session()
-                
+            session = await self._get_session()
+            
             # Chuẩn bị payload
             payload = {
                 "query": query
@@ -218,31 +283,71 @@ class APIClientBase:
             
             # Thực hiện request
             api_url = self.base_url
+            query_name = get_operation_name(query)
             
             if method.upper() == "POST":
-                async with self._session.post(
+                async with session.post(
                     api_url, 
                     json=payload, 
                     headers=_headers, 
                     timeout=_timeout
                 ) as response:
-                    return await self._process_response(response)
+                    return await self._process_response(response, query_name)
             elif method.upper() == "GET":
                 # Nếu là GET, chuyển payload thành query string
                 params = {'query': query}
                 if variables:
                     params['variables'] = json.dumps(variables)
-                
-                async with self._session.get(
-                    api_url, 
+
+                # Tra cứu HTTP cache (không bao giờ áp dụng cho request có token hoặc giỏ hàng/khách hàng)
+                http_cache = get_http_cache()
+                cache_key = None
+                cached_entry = None
+                if Config.HTTP_CACHE_ENABLED and is_cacheable_request(api_url, query, _headers):
+                    cache_key = make_cache_key(api_url, params, _headers.get("Store"))
+                    cached_result = http_cache.get_fresh(cache_key)
+                    if cached_result is not None:
+                        return cached_result
+                    cached_entry = http_cache.lookup(cache_key)
+                    if cached_entry is not None and cached_entry.etag:
+                        _headers["If-None-Match"] = cached_entry.etag
+
+                async with session.get(
+                    api_url,
                     params=params,
-                    headers=_headers, 
+                    headers=_headers,
                     timeout=_timeout
                 ) as response:
-                    return await self._process_response(response)
+                    if cache_key is not None and response.status == 304:
+                        revalidated = http_cache.revalidated(cache_key, response.headers)
+                        if revalidated is not None:
+                            return revalidated
+
+                    result = await self._process_response(response, query_name)
+                    if cache_key is not None:
+                        if result.get("success", False):
+                            http_cache.store(cache_key, result, response.headers)
+                        else:
+                            http_cache.invalidate(cache_key)
+                    return result
             else:
                 raise ValueError(f"Phương thức HTTP không được hỗ trợ: {method}")
                 
+        except aiohttp.ClientConnectorError as e:
+            # Không thiết lập được kết nối - request chưa đến server
+            logger.error(f"Lỗi kết nối khi thực hiện truy vấn GraphQL: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Connection error: {str(e)}",
+                "code": "CONNECTION_ERROR"
+            }
+        except (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError, ConnectionResetError) as e:
+            logger.error(f"Kết nối bị ngắt khi thực hiện truy vấn GraphQL: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Connection reset: {str(e)}",
+                "code": "CONNECTION_RESET"
+            }
         except aiohttp.ClientError as e:
             logger.error(f"Lỗi HTTP khi thực hiện truy vấn GraphQL: {str(e)}")
             return {
@@ -265,19 +370,64 @@ class APIClientBase:
                 "code": "UNKNOWN_ERROR"
             }
     
-    async def _process_response(self, response: aiohttp.ClientResponse) -> Dict[str, Any]:
+    async def ping(self) -> Dict[str, Any]:
+        """
+        Kiểm tra kết nối với API.
+        
+        Ping chỉ gửi một request: không thử lại và không được tính vào ngân sách retry, để
+        các lần ping giữ kết nối khi rảnh không làm tăng số lần retry cho request thật.
+        
+        Returns:
+            Dict[str, Any]: Kết quả kiểm tra kết nối.
+        """
+        try:
+            # Sử dụng truy vấn GraphQL đơn giản để kiểm tra kết nối
+            graphql_query = """
+            query {
+              storeConfig {
+                store_code
+              }
+            }
+            """
+            
+            await self.ensure_session()
+            result = await self._execute_graphql_once(graphql_query)
+            
+            if result.get("success", False):
+                return {
+                    "success": True,
+                    "message": "Kết nối đến API thành công",
+                    "data": result.get("data", {})
+                }
+            else:
+                return {
+                    "success": False,
+                    "message": "Không thể kết nối đến API",
+                    "error": result.get("message", "Unknown error")
+                }
+                
+        except Exception as e:
+            logger.error(f"Lỗi khi ping API: {str(e)}")
+            return {
+                "success": False,
+                "message": f"Error pinging API: {str(e)}"
+            }
+    
+    async def _process_response(self, response: aiohttp.ClientResponse, query_name: str = "anonymous") -> Dict[str, Any]:
         """
         Xử lý response từ API.
         
         Args:
             response: Response từ API.
+            query_name: Tên truy vấn GraphQL, dùng cho thống kê giải mã.
             
         Returns:
             Dict[str, Any]: Kết quả đã xử lý.
         """
         try:
             status = response.status
-            response_json = await response.json()
+            # Body được đọc dạng stream, payload lớn được parse ngoài event loop
+            response_json = await get_response_decoder().decode(response, query_name)
             
             # Kiểm tra lỗi HTTP
             if status >= 400:
@@ -309,8 +459,19 @@ class APIClientBase:
                 "message": "Success"
             }
             
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            # Lỗi kết nối khi đọc body được execute_graphql phân loại để retry
+            raise
         except Exception as e:
             logger.error(f"Lỗi khi xử lý response: {str(e)}")
+            if response.status >= 400:
+                # Body không phải JSON (ví dụ trang lỗi HTML của gateway) - giữ nguyên mã HTTP
+                return {
+                    "success": False,
+                    "status": response.status,
+                    "message": f"HTTP error: {response.status}",
+                    "code": f"HTTP_{response.status}"
+                }
             return {
                 "success": False,
                 "message": f"Error processing response: {str(e)}",
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Không gian cache (namespace) theo cửa hàng cho các cache sản phẩm và tìm kiếm.
+
+Dữ liệu danh mục khác nhau giữa các cửa hàng (header Store / store_code), nên mỗi cache
+được chia thành các namespace LRU riêng theo mã cửa hàng:
+
+- Mỗi cửa hàng có hạn mức (quota) riêng, tính theo tỷ lệ sức chứa của cache
+  (Config.CACHE_STORE_QUOTAS, mặc định mỗi cửa hàng được dùng toàn bộ sức chứa).
+- Khi cache đầy, entry bị loại khỏi namespace đang dùng nhiều nhất so với hạn mức của nó,
+  nên cửa hàng lớn không đẩy các entry hay dùng của cửa hàng nhỏ ra khỏi cache.
+- Có thể xóa toàn bộ dữ liệu của một cửa hàng và xem tỷ lệ hit theo từng cửa hàng, trên
+  một cache hoặc trên mọi cache đã đăng ký (invalidate_store, store_stats).
+
+Các cache dùng chung cho cả process và được đọc/ghi từ cả event loop của server lẫn thread
+event loop nền (background_loop.py), nên mọi thao tác đều được bảo vệ bằng lock.
+"""
+
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Mapping, Optional, TypeVar
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+COUNTER_HITS = "hits"
+COUNTER_MISSES = "misses"
+
+# Mọi namespace cache đang tồn tại, dùng cho các thao tác trên toàn bộ cache
+_caches: "weakref.WeakSet[StoreNamespacedCache]" = weakref.WeakSet()
+
+
+class StoreNamespacedCache(Generic[V]):
+    """
+    Cache LRU chia theo mã cửa hàng, có hạn mức cho từng cửa hàng.
+
+    Lớp này chỉ quản lý lưu trữ, hạn mức và thống kê; việc hết hạn entry do cache sử dụng
+    nó quyết định (ví dụ xóa entry bằng pop khi đã hết hạn).
+    """
+
+    def __init__(self, name: str, max_entries: int, quotas: Optional[Mapping[str, float]] = None):
+        """
+        Khởi tạo cache.
+
+        Args:
+            name: Tên cache, dùng trong thống kê.
+            max_entries: Tổng số entry tối đa của mọi cửa hàng.
+            quotas: Tỷ lệ sức chứa dành cho từng cửa hàng (0-1), mặc định Config.CACHE_STORE_QUOTAS.
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self._quotas = dict(Config.CACHE_STORE_QUOTAS if quotas is None else quotas)
+        self._stores: Dict[str, "OrderedDict[Hashable, V]"] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def quota(self, store_code: Optional[str]) -> int:
+        """Số entry tối đa của một cửa hàng."""
+        share = self._quotas.get(store_code or "")
+        if share is None:
+            return self.max_entries
+        return max(1, int(self.max_entries * share))
+
+    def get(self, store_code: Optional[str], key: Hashable) -> Optional[V]:
+        """
+        Lấy entry và đánh dấu là vừa được dùng (không tính vào thống kê).
+
+        Args:
+            store_code: Mã cửa hàng.
+            key: Khóa trong namespace của cửa hàng.
+
+        Returns:
+            Optional[V]: Entry hoặc None.
+        """
+        with self._lock:
+            namespace = self._stores.get(store_code or "")
+            if namespace is None:
+                return None
+            value = namespace.get(key)
+            if value is not None:
+                namespace.move_to_end(key)
+            return value
+
+    def put(self, store_code: Optional[str], key: Hashable, value: V) -> None:
+        """
+        Lưu entry, loại bỏ entry ít dùng nhất khi vượt hạn mức.
+
+        Args:
+            store_code: Mã cửa hàng.
+            key: Khóa trong namespace của cửa hàng.
+            value: Entry cần lưu.
+        """
+        store_code = store_code or ""
+        with self._lock:
+            namespace = self._stores.setdefault(store_code, OrderedDict())
+            if key not in namespace:
+                self._size += 1
+            namespace[key] = value
+            namespace.move_to_end(key)
+
+            quota = self.quota(store_code)
+            while len(namespace) > quota:
+                namespace.popitem(last=False)
+                self._size -= 1
+                self._record(store_code, "evictions")
+
+            while self._size > self.max_entries:
+                self._evict_one()
+
+    def pop(self, store_code: Optional[str], key: Hashable) -> Optional[V]:
+        """Xóa và trả về entry (None nếu không có)."""
+        with self._lock:
+            namespace = self._stores.get(store_code or "")
+            if namespace is None or key not in namespace:
+                return None
+            self._size -= 1
+            return namespace.pop(key)
+
+    def invalidate_store(self, store_code: Optional[str]) -> int:
+        """
+        Xóa toàn bộ entry của một cửa hàng.
+
+        Args:
+            store_code: Mã cửa hàng.
+
+        Returns:
+            int: Số entry đã xóa.
+        """
+        with self._lock:
+            namespace = self._stores.pop(store_code or "", None)
+            if not namespace:
+                return 0
+            self._size -= len(namespace)
+            return len(namespace)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache (giữ lại thống kê)."""
+        with self._lock:
+            self._stores.clear()
+            self._size = 0
+
+    def record(self, store_code: Optional[str], counter: str) -> None:
+        """
+        Tăng một bộ đếm thống kê của cửa hàng.
+
+        Args:
+            store_code: Mã cửa hàng.
+            counter: Tên bộ đếm (COUNTER_HITS, COUNTER_MISSES hoặc bộ đếm riêng của cache).
+        """
+        with self._lock:
+            self._record(store_code, counter)
+
+    def total(self, counter: str) -> int:
+        """Tổng một bộ đếm trên mọi cửa hàng."""
+        with self._lock:
+            return sum(counters.get(counter, 0) for counters in self._counters.values())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Thống kê theo từng cửa hàng.
+
+        Returns:
+            Dict[str, Any]: Số entry, hạn mức, các bộ đếm và tỷ lệ hit (phần lượt tra cứu
+                không phải miss, None nếu chưa có lượt nào) của mỗi cửa hàng.
+        """
+        stores: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for store_code in set(self._stores) | set(self._counters):
+                counters = dict(self._counters.get(store_code, {}))
+                lookups = counters.get(COUNTER_HITS, 0) + counters.get(COUNTER_MISSES, 0)
+                stores[store_code] = {
+                    "entries": len(self._stores.get(store_code, ())),
+                    "quota": self.quota(store_code),
+                    **counters,
+                    "hit_rate": round(counters.get(COUNTER_HITS, 0) / lookups, 4) if lookups else None
+                }
+            return {"entries": self._size, "max_entries": self.max_entries, "stores": stores}
+
+    def _record(self, store_code: Optional[str], counter: str) -> None:
+        """Tăng bộ đếm, caller phải giữ lock."""
+        counters = self._counters.setdefault(store_code or "", {})
+        counters[counter] = counters.get(counter, 0) + 1
+
+    def _evict_one(self) -> None:
+        """Loại entry ít dùng nhất của cửa hàng đang dùng nhiều nhất so với hạn mức (caller giữ lock)."""
+        store_code, namespace = max(
+            ((code, ns) for code, ns in self._stores.items() if ns),
+            key=lambda item: (len(item[1]) / self.quota(item[0]), len(item[1]))
+        )
+        namespace.popitem(last=False)
+        self._size -= 1
+        self._record(store_code, "evictions")
+
+
+def invalidate_store(store_code: str) -> Dict[str, int]:
+    """
+    Xóa dữ liệu của một cửa hàng khỏi mọi cache.
+
+    Args:
+        store_code: Mã cửa hàng.
+
+    Returns:
+        Dict[str, int]: Số entry đã xóa theo tên cache.
+    """
+    removed: Dict[str, int] = {}
+    for cache in list(_caches):
+        removed[cache.name] = removed.get(cache.name, 0) + cache.invalidate_store(store_code)
+    logger.info(f"Đã xóa cache của cửa hàng {store_code}: {removed}")
+    return removed
+
+
+def store_stats() -> Dict[str, Dict[str, Any]]:
+    """Thống kê theo cửa hàng của mọi cache, theo tên cache."""
+    return {cache.name: cache.stats() for cache in list(_caches)}
@@ -5,15 +5,41 @@
 API module cho các thao tác liên quan đến giỏ hàng
 """
 
+import re
 import logging
-import asyncio
 from typing import Dict, Any, Optional, List
 
 from .base import APIClientBase
 from .config import Config
+from .cart_profiles import (
+    CART_PROFILES, CART_PROFILE_CHECKOUT, CART_PROFILE_SUMMARY,
+    add_products_mutation, cart_query, remove_item_mutation, update_items_mutation
+)
+from .cart_state import CartStateCache, get_cart_state_cache
 
 logger = logging.getLogger(__name__)
 
+def _invalid_profile(profile: str) -> Optional[Dict[str, Any]]:
+    """Trả về kết quả lỗi nếu profile giỏ hàng không hợp lệ."""
+    if profile in CART_PROFILES:
+        return None
+    return {
+        "success": False,
+        "message": f"Profile giỏ hàng không hợp lệ: {profile} (hợp lệ: {', '.join(CART_PROFILES)})",
+        "code": "INVALID_CART_PROFILE"
+    }
+
+
+def _cart_state() -> Optional[CartStateCache]:
+    """Trả về cache trạng thái giỏ hàng nếu được bật."""
+    return get_cart_state_cache() if Config.CART_STATE_ENABLED else None
+
+
+def _sku_pattern(sku: str) -> "re.Pattern":
+    """Regex tìm SKU như một từ riêng biệt trong thông báo lỗi."""
+    return re.compile(rf"(?<![\w-]){re.escape(sku)}(?![\w-])")
+
+
 class CartAPI(APIClientBase):
     """
     API Client cho các thao tác liên quan đến giỏ hàng.
@@ -83,26 +109,21 @@ class CartAPI(APIClientBase):
             return result
             
         except Exception as e:
+            # Lỗi kết nối tạm thời đã được execute_graphql thử lại; không hủy session dùng chung
             logger.error(f"Lỗi khi tạo giỏ hàng: {str(e)}")
-            # Thử tạo session mới nếu có lỗi
-            try:
-                await self.close()  # Đóng session cũ
-                await self.ensure_session()  # Tạo session mới
-                return await self.create_cart(is_guest)  # Thử lại
-            except Exception as e2:
-                logger.error(f"Lỗi khi thử lại tạo giỏ hàng: {str(e2)}")
-                return {
-                    "success": False,
-                    "message": f"Error creating cart: {str(e2)}",
-                    "code": "CART_ERROR"
-                }
+            return {
+                "success": False,
+                "message": f"Error creating cart: {str(e)}",
+                "code": "CART_ERROR"
+            }
     
     async def add_to_cart(
         self,
         cart_id: Optional[str],
         product_id: str,
         quantity: int = 1,
-        retry_count: int = 3
+        retry_count: int = 3,
+        profile: str = CART_PROFILE_SUMMARY
     ) -> Dict[str, Any]:
         """
         Thêm sản phẩm vào giỏ hàng với xử lý lỗi nâng cao.
@@ -111,60 +132,17 @@ class CartAPI(APIClientBase):
             cart_id: ID của giỏ hàng (tùy chọn).
             product_id: Article Number (art_no) của sản phẩm.
             quantity: Số lượng sản phẩm.
-            retry_count: Số lần thử lại tối đa khi gặp lỗi.
+            retry_count: Số lần thực hiện tối đa khi cần khôi phục lỗi nghiệp vụ
+                (giỏ hàng hết hạn, không tìm thấy theo art_no).
+            profile: Profile thông tin giỏ hàng trả về (mặc định summary).
             
         Returns:
             Dict[str, Any]: Kết quả thêm sản phẩm.
         """
-        graphql_query = """
-        mutation AddProductsToCart($cartId: String!, $items: [CartItemInput!]!) {
-            addProductsToCart(
-                cartId: $cartId,
-                use_art_no: true,
-                cartItems: $items
-            ) {
-                cart {
-                    id
-                    email
-                    is_guest
-                    itemsV2 {
-                        items {
-                            id
-                            product {
-                                name
-                                sku
-                                small_image {
-                                    url
-                                }
-                            }
-                            quantity
-                            prices {
-                                price {
-                                    value
-                                    currency
-                                }
-                                row_total {
-                                    value
-                                    currency
-                                }
-                            }
-                        }
-                        total_quantity
-                    }
-                    prices {
-                        grand_total {
-                            value
-                            currency
-                        }
-                    }
-                }
-                user_errors {
-                    code
-                    message
-                }
-            }
-        }
-        """
+        invalid = _invalid_profile(profile)
+        if invalid:
+            return invalid
+        graphql_query = add_products_mutation(profile)
         
         async def _try_add_to_cart(cart_id: str) -> Dict[str, Any]:
             """Helper function để thử thêm sản phẩm vào giỏ hàng."""
@@ -181,21 +159,7 @@ class CartAPI(APIClientBase):
             return await self.execute_graphql(graphql_query, variables)
         
         try:
-            # Đảm bảo có session và event loop hợp lệ
-            try:
-                # Kiểm tra nếu event loop đã đóng
-                if hasattr(self, '_loop') and self._loop is not None and self._loop.is_closed():
-                    logger.warning("Event loop đã đóng trong add_to_cart, tạo mới event loop")
-                    # Đóng session hiện tại nếu có
-                    await self.close()
-                    # Tạo mới event loop
-                    self._loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(self._loop)
-                    self._session = None
-            except Exception as e:
-                logger.warning(f"Lỗi khi kiểm tra event loop trong add_to_cart: {str(e)}")
-            
-            # Đảm bảo session được khởi tạo sau khi kiểm tra event loop
+            # Session được lấy từ registry theo event loop đang chạy
             await self.ensure_session()
             
             # Sử dụng cart_id từ tham số hoặc từ session
@@ -203,53 +167,29 @@ class CartAPI(APIClientBase):
             
             # Nếu không có giỏ hàng, tạo mới
             if not target_cart_id:
-                try:
-                    create_result = await self.create_cart(is_guest=True)
-                    if not create_result.get("success", False):
-                        return create_result
-                    target_cart_id = create_result.get("cart_id")
-                    self._cart_id = target_cart_id
-                except Exception as cart_error:
-                    if "event loop" in str(cart_error).lower():
-                        # Xử lý lỗi event loop khi tạo giỏ hàng
-                        logger.warning("Lỗi event loop khi tạo giỏ hàng, thử lại sau khi tạo mới event loop")
-                        await self.close()
-                        if hasattr(self, '_loop') and self._loop and not self._loop.is_closed():
-                            self._loop.close()
-                        self._loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(self._loop)
-                        self._session = None
-                        await self.ensure_session()
-                        # Thử lại tạo giỏ hàng
-                        create_result = await self.create_cart(is_guest=True)
-                        if not create_result.get("success", False):
-                            return create_result
-                        target_cart_id = create_result.get("cart_id")
-                        self._cart_id = target_cart_id
-                    else:
-                        # Các lỗi khác
-                        raise
+                create_result = await self.create_cart(is_guest=True)
+                if not create_result.get("success", False):
+                    return create_result
+                target_cart_id = create_result.get("cart_id")
+                self._cart_id = target_cart_id
             
-            # Thử thêm sản phẩm với số lần thử lại
-            for attempt in range(retry_count):
-                try:
+            # Cập nhật lạc quan bản giỏ hàng cục bộ; bản này được đối chiếu với phản hồi
+            # của server khi thành công và bị hủy khi thất bại
+            cart_state = _cart_state()
+            optimistic_cart_id = target_cart_id
+            confirmed = False
+            if cart_state:
+                cart_state.apply_add(optimistic_cart_id, product_id, quantity)
+            
+            try:
+                # Lỗi mạng tạm thời đã được execute_graphql thử lại theo chính sách retry chung,
+                # vòng lặp này chỉ xử lý các lỗi nghiệp vụ có thể khôi phục (giỏ hàng hết hạn, art_no)
+                for attempt in range(max(retry_count, 1)):
                     result = await _try_add_to_cart(target_cart_id)
-                except Exception as e:
-                    if "event loop" in str(e).lower() and attempt < retry_count - 1:
-                        # Xử lý lỗi event loop
-                        logger.warning(f"Lỗi event loop khi thêm sản phẩm (lần thử {attempt+1}/{retry_count}), tạo lại event loop")
-                        await self.close()
-                        if hasattr(self, '_loop') and self._loop and not self._loop.is_closed():
-                            self._loop.close()
-                        self._loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(self._loop)
-                        self._session = None
-                        await self.ensure_session()
-                        continue
-                    else:
-                        raise
-                
-                if result.get("success", False):
+                    
+                    if not result.get("success", False):
+                        return result
+                    
                     data = result.get("data", {})
                     add_result = data.get("addProductsToCart", {})
                     user_errors = add_result.get("user_errors", [])
@@ -259,6 +199,10 @@ class CartAPI(APIClientBase):
                         # Cập nhật cart_id trong session
                         self._cart_id = cart.get("id")
                         
+                        if cart_state:
+                            cart_state.confirm(self._cart_id, cart)
+                            confirmed = optimistic_cart_id == self._cart_id
+                        
                         return {
                             "success": True,
                             "message": "Thêm sản phẩm vào giỏ hàng thành công",
@@ -266,171 +210,270 @@ class CartAPI(APIClientBase):
                                 "cart": cart
                             }
                         }
-                    else:
-                        error = user_errors[0]
-                        error_code = error.get("code", "UNKNOWN_ERROR")
-                        error_message = error.get("message", "Unknown error")
-                        
-                        # Xử lý các trường hợp lỗi cụ thể
-                        if error_code == "CART_NOT_FOUND" and attempt < retry_count - 1:
-                            # Tạo giỏ hàng mới và thử lại
-                            create_result = await self.create_cart(is_guest=True)
-                            if create_result.get("success", False):
-                                target_cart_id = create_result.get("cart_id")
-                                self._cart_id = target_cart_id
-                                continue
-                        
-                        elif error_code == "PRODUCT_NOT_FOUND" and attempt < retry_count - 1:
-                            # Thử lại với SKU gốc nếu đang dùng art_no
-                            if "use_art_no" in graphql_query:
-                                # Tạo query mới không dùng art_no
-                                graphql_query = graphql_query.replace("use_art_no: true", "")
-                                continue
-                        
-                        return {
-                            "success": False,
-                            "message": error_message,
-                            "code": error_code
-                        }
+                    
+                    error = user_errors[0]
+                    error_code = error.get("code", "UNKNOWN_ERROR")
+                    error_message = error.get("message", "Unknown error")
+                    can_recover = attempt < retry_count - 1
+                    
+                    # Xử lý các trường hợp lỗi cụ thể
+                    if error_code == "CART_NOT_FOUND" and can_recover:
+                        # Tạo giỏ hàng mới và thử lại
+                        create_result = await self.create_cart(is_guest=True)
+                        if create_result.get("success", False):
+                            target_cart_id = create_result.get("cart_id")
+                            self._cart_id = target_cart_id
+                            continue
+                    
+                    elif error_code == "PRODUCT_NOT_FOUND" and can_recover:
+                        # Thử lại với SKU gốc nếu đang dùng art_no
+                        if "use_art_no" in graphql_query:
+                            # Tạo query mới không dùng art_no
+                            graphql_query = graphql_query.replace("use_art_no: true", "")
+                            continue
+                    
+                    return {
+                        "success": False,
+                        "message": error_message,
+                        "code": error_code
+                    }
                 
-                # Nếu có lỗi khác, thử lại sau một khoảng thời gian
-                if attempt < retry_count - 1:
-                    await asyncio.sleep(1 * (attempt + 1))  # Tăng thời gian chờ mỗi lần thử
-            
-            return {
-                "success": False,
-                "message": "Không thể thêm sản phẩm vào giỏ hàng sau nhiều lần thử",
-                "code": "MAX_RETRIES_EXCEEDED"
-            }
+                return {
+                    "success": False,
+                    "message": "Không thể thêm sản phẩm vào giỏ hàng sau nhiều lần thử",
+                    "code": "MAX_RETRIES_EXCEEDED"
+                }
+            finally:
+                if cart_state and not confirmed:
+                    cart_state.invalidate(optimistic_cart_id)
             
         except Exception as e:
             logger.error(f"Lỗi khi thêm sản phẩm vào giỏ hàng: {str(e)}")
-            
-            # Xử lý đặc biệt cho lỗi event loop
-            if "event loop" in str(e).lower():
-                try:
-                    logger.warning("Lỗi event loop phát hiện, thử khôi phục...")
-                    await self.close()
-                    if hasattr(self, '_loop') and self._loop and not self._loop.is_closed():
-                        self._loop.close()
-                    self._loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(self._loop)
-                    self._session = None
-                    await self.ensure_session()
-                    
-                    # Thử lại một lần nữa sau khi khôi phục
-                    if retry_count > 0:
-                        logger.info("Thử lại thêm sản phẩm vào giỏ hàng sau khi khôi phục event loop...")
-                        return await self.add_to_cart(cart_id, product_id, quantity, retry_count - 1)
-                except Exception as recovery_error:
-                    logger.error(f"Không thể khôi phục sau lỗi event loop: {str(recovery_error)}")
-            
             return {
                 "success": False,
                 "message": f"Error adding product to cart: {str(e)}",
                 "code": "ADD_TO_CART_ERROR"
             }
             
-    async def get_cart_info(self, cart_id: Optional[str] = None) -> Dict[str, Any]:
+    async def add_many_to_cart(
+        self,
+        cart_id: Optional[str],
+        items: List[Dict[str, Any]],
+        retry_count: int = 3,
+        profile: str = CART_PROFILE_SUMMARY
+    ) -> Dict[str, Any]:
         """
-        Lấy thông tin chi tiết về giỏ hàng.
+        Thêm nhiều sản phẩm vào giỏ hàng bằng một mutation duy nhất.
+        
+        Lỗi trong user_errors được gán cho từng sản phẩm theo SKU xuất hiện trong thông báo
+        lỗi; chỉ những sản phẩm lỗi có thể khôi phục mới được gửi lại ở lượt sau. Khi có lỗi
+        không gán được cho sản phẩm nào, các sản phẩm không có lỗi riêng trong lượt đó không
+        được tính là đã thêm mà được trả về trong "unconfirmed", và kết quả là thất bại.
         
         Args:
-            cart_id: ID của giỏ hàng (tùy chọn, mặc định sử dụng cart_id hiện tại).
+            cart_id: ID của giỏ hàng (tùy chọn).
+            items: Danh sách sản phẩm dạng {"sku": art_no, "quantity": số lượng}
+                (chấp nhận "product_id" thay cho "sku").
+            retry_count: Số lượt gửi tối đa khi cần khôi phục lỗi nghiệp vụ.
+            profile: Profile thông tin giỏ hàng trả về (mặc định summary).
             
         Returns:
-            Dict[str, Any]: Thông tin giỏ hàng.
+            Dict[str, Any]: Kết quả, với data gồm "cart", "added" (các SKU đã thêm),
+                "failed" (các sản phẩm lỗi kèm code và message), "unconfirmed" (các sản phẩm
+                không xác định được đã thêm hay chưa) và "errors" (các lỗi không gán được).
         """
-        graphql_query = """
-        query GetCartInfo($cartId: String!) {
-            cart(cart_id: $cartId) {
-                id
-                email
-                is_guest
-                itemsV2 {
-                    items {
-                        id
-                        product {
-                            id
-                            name
-                            sku
-                            small_image {
-                                url
-                            }
-                            price {
-                                regularPrice {
-                                    amount {
-                                        value
-                                        currency
-                                    }
-                                }
-                            }
-                        }
-                        quantity
-                        prices {
-                            price {
-                                value
-                                currency
-                            }
-                            row_total {
-                                value
-                                currency
-                            }
-                            total_item_discount {
-                                value
-                                currency
-                            }
-                        }
-                    }
-                    total_quantity
-                }
-                prices {
-                    subtotal_excluding_tax {
-                        value
-                        currency
-                    }
-                    subtotal_including_tax {
-                        value
-                        currency
-                    }
-                    applied_taxes {
-                        amount {
-                            value
-                            currency
-                        }
-                        label
-                    }
-                    discounts {
-                        amount {
-                            value
-                            currency
-                        }
-                        label
-                    }
-                    grand_total {
-                        value
-                        currency
-                    }
+        invalid = _invalid_profile(profile)
+        if invalid:
+            return invalid
+        
+        # Gộp các dòng trùng SKU để mỗi lỗi chỉ thuộc về một sản phẩm
+        quantities: Dict[str, int] = {}
+        for item in items:
+            sku = str(item.get("sku") or item.get("product_id") or "").strip()
+            if not sku:
+                continue
+            quantities[sku] = quantities.get(sku, 0) + int(item.get("quantity", 1))
+        
+        if not quantities:
+            return {
+                "success": False,
+                "message": "Không có sản phẩm nào để thêm vào giỏ hàng",
+                "code": "NO_ITEMS"
+            }
+        
+        try:
+            await self.ensure_session()
+            
+            target_cart_id = cart_id or self._cart_id
+            if not target_cart_id:
+                create_result = await self.create_cart(is_guest=True)
+                if not create_result.get("success", False):
+                    return create_result
+                target_cart_id = create_result.get("cart_id")
+                self._cart_id = target_cart_id
+            
+            graphql_query = add_products_mutation(profile)
+            pending = list(quantities)
+            added: List[str] = []
+            failed: Dict[str, Dict[str, Any]] = {}
+            unconfirmed: List[str] = []
+            unattributed_errors: List[Dict[str, Any]] = []
+            cart: Dict[str, Any] = {}
+            
+            # Cập nhật lạc quan bản giỏ hàng cục bộ cho toàn bộ lô
+            cart_state = _cart_state()
+            optimistic_cart_id = target_cart_id
+            if cart_state:
+                for sku, quantity in quantities.items():
+                    cart_state.apply_add(optimistic_cart_id, sku, quantity)
+            
+            for attempt in range(max(retry_count, 1)):
+                variables = {
+                    "cartId": target_cart_id,
+                    "items": [{"quantity": quantities[sku], "sku": sku} for sku in pending]
                 }
-                available_payment_methods {
-                    code
-                    title
+                result = await self.execute_graphql(graphql_query, variables)
+                
+                if not result.get("success", False):
+                    if not added:
+                        if cart_state:
+                            cart_state.invalidate(optimistic_cart_id)
+                        return result
+                    # Các sản phẩm đã thêm ở lượt trước vẫn nằm trong giỏ hàng
+                    for sku in pending:
+                        failed[sku] = {"code": result.get("code"), "message": result.get("message")}
+                    break
+                
+                add_result = result.get("data", {}).get("addProductsToCart", {}) or {}
+                cart = add_result.get("cart") or cart
+                if cart.get("id"):
+                    self._cart_id = cart.get("id")
+                
+                user_errors = add_result.get("user_errors") or []
+                can_recover = attempt < retry_count - 1
+                
+                if any(error.get("code") == "CART_NOT_FOUND" for error in user_errors) and can_recover:
+                    # Giỏ hàng hết hạn: không sản phẩm nào được thêm, tạo giỏ mới và gửi lại cả lô
+                    create_result = await self.create_cart(is_guest=True)
+                    if create_result.get("success", False):
+                        target_cart_id = create_result.get("cart_id")
+                        self._cart_id = target_cart_id
+                        continue
+                
+                # Gán từng lỗi cho sản phẩm có SKU xuất hiện trong thông báo
+                errors_by_sku: Dict[str, Dict[str, Any]] = {}
+                unattributed: List[Dict[str, Any]] = []
+                for error in user_errors:
+                    message = error.get("message", "")
+                    owners = [sku for sku in pending if _sku_pattern(sku).search(message)]
+                    if not owners and len(pending) == 1:
+                        owners = pending
+                    if not owners:
+                        unattributed.append(error)
+                    for sku in owners:
+                        errors_by_sku.setdefault(sku, error)
+                
+                retry: List[str] = []
+                for sku in pending:
+                    error = errors_by_sku.get(sku)
+                    if error is None and unattributed:
+                        # Lỗi không gán được có thể thuộc về sản phẩm này
+                        unconfirmed.append(sku)
+                    elif error is None:
+                        added.append(sku)
+                    elif (error.get("code") == "PRODUCT_NOT_FOUND" and can_recover
+                          and "use_art_no" in graphql_query):
+                        # Thử lại với SKU gốc thay vì art_no
+                        retry.append(sku)
+                    else:
+                        failed[sku] = {"code": error.get("code", "UNKNOWN_ERROR"),
+                                       "message": error.get("message", "Unknown error")}
+                
+                if unattributed:
+                    # Không xác định được sản phẩm gây lỗi: không gửi lại để tránh thêm trùng
+                    unattributed_errors.extend(unattributed)
+                    logger.warning(f"Lỗi thêm giỏ hàng không gán được cho sản phẩm: {unattributed}")
+                
+                if not retry:
+                    break
+                pending = retry
+                graphql_query = graphql_query.replace("use_art_no: true", "")
+            
+            if cart_state:
+                # Chỉ giữ bản cục bộ khi mọi sản phẩm đều được thêm vào đúng giỏ hàng đó
+                if failed or unconfirmed or optimistic_cart_id != self._cart_id:
+                    cart_state.invalidate(optimistic_cart_id)
+                if not failed and not unconfirmed:
+                    cart_state.confirm(self._cart_id, cart)
+            
+            failed_items = [
+                {"sku": sku, "quantity": quantities[sku], **error} for sku, error in failed.items()
+            ]
+            data = {
+                "cart": cart,
+                "added": added,
+                "failed": failed_items,
+                "unconfirmed": [{"sku": sku, "quantity": quantities[sku]} for sku in unconfirmed],
+                "errors": unattributed_errors
+            }
+            
+            if unconfirmed:
+                details = "; ".join(error.get("message", "Unknown error") for error in unattributed_errors)
+                return {
+                    "success": False,
+                    "message": (
+                        f"Đã thêm {len(added)}/{len(quantities)} sản phẩm vào giỏ hàng, không xác định "
+                        f"được kết quả của {len(unconfirmed)} sản phẩm: {details}"
+                    ),
+                    "code": "UNCONFIRMED_ADD_TO_CART",
+                    "data": data
                 }
-                shipping_addresses {
-                    available_shipping_methods {
-                        carrier_code
-                        carrier_title
-                        method_code
-                        method_title
-                        price_incl_tax {
-                            value
-                            currency
-                        }
-                    }
+            
+            if not failed_items:
+                return {
+                    "success": True,
+                    "message": f"Đã thêm {len(added)} sản phẩm vào giỏ hàng",
+                    "data": data
                 }
+            
+            return {
+                "success": False,
+                "message": f"Đã thêm {len(added)}/{len(quantities)} sản phẩm vào giỏ hàng",
+                "code": "PARTIAL_ADD_TO_CART" if added else failed_items[0]["code"],
+                "data": data
             }
-        }
+            
+        except Exception as e:
+            logger.error(f"Lỗi khi thêm nhiều sản phẩm vào giỏ hàng: {str(e)}")
+            cart_state = _cart_state()
+            if cart_state:
+                cart_state.invalidate(cart_id or self._cart_id)
+            return {
+                "success": False,
+                "message": f"Error adding products to cart: {str(e)}",
+                "code": "ADD_TO_CART_ERROR"
+            }
+    
+    async def get_cart_info(
+        self,
+        cart_id: Optional[str] = None,
+        profile: str = CART_PROFILE_CHECKOUT
+    ) -> Dict[str, Any]:
         """
+        Lấy thông tin giỏ hàng.
+        
+        Args:
+            cart_id: ID của giỏ hàng (tùy chọn, mặc định sử dụng cart_id hiện tại).
+            profile: Mức chi tiết: summary (số lượng, tổng tiền), items (kèm danh sách sản phẩm)
+                hoặc checkout (đầy đủ, mặc định).
+            
+        Returns:
+            Dict[str, Any]: Thông tin giỏ hàng.
+        """
+        invalid = _invalid_profile(profile)
+        if invalid:
+            return invalid
+        graphql_query = cart_query(profile)
         
         try:
             target_cart_id = cart_id or self._cart_id
@@ -442,6 +485,19 @@ class CartAPI(APIClientBase):
                 target_cart_id = create_result.get("cart_id")
                 self._cart_id = target_cart_id
             
+            # Ngay sau các mutation, giỏ hàng được lấy từ bản cục bộ nếu chưa cần đồng bộ lại
+            cart_state = _cart_state()
+            if cart_state:
+                local_cart = cart_state.get(target_cart_id, profile)
+                if local_cart is not None:
+                    return {
+                        "success": True,
+                        "data": {
+                            "cart": local_cart
+                        },
+                        "message": "Lấy thông tin giỏ hàng thành công"
+                    }
+            
             variables = {
                 "cartId": target_cart_id
             }
@@ -455,6 +511,8 @@ class CartAPI(APIClientBase):
                 if not cart:
                     # Giỏ hàng không tồn tại hoặc đã hết hạn
                     self._cart_id = None  # Reset cart_id
+                    if cart_state:
+                        cart_state.invalidate(target_cart_id)
                     return {
                         "success": False,
                         "message": "Giỏ hàng không tồn tại hoặc đã hết hạn",
@@ -463,6 +521,8 @@ class CartAPI(APIClientBase):
                 
                 # Cập nhật cart_id trong session
                 self._cart_id = cart.get("id")
+                if cart_state:
+                    cart_state.record_fetch(target_cart_id, profile, cart)
                 
                 return {
                     "success": True,
@@ -486,7 +546,8 @@ class CartAPI(APIClientBase):
         self, 
         cart_id: Optional[str], 
         cart_item_id: str, 
-        quantity: int
+        quantity: int,
+        profile: str = CART_PROFILE_SUMMARY
     ) -> Dict[str, Any]:
         """
         Cập nhật số lượng sản phẩm trong giỏ hàng.
@@ -495,50 +556,15 @@ class CartAPI(APIClientBase):
             cart_id: ID của giỏ hàng.
             cart_item_id: ID của item trong giỏ hàng.
             quantity: Số lượng mới.
+            profile: Profile thông tin giỏ hàng trả về (mặc định summary).
             
         Returns:
             Dict[str, Any]: Kết quả cập nhật.
         """
-        graphql_query = """
-        mutation UpdateCartItems($cartId: String!, $items: [CartItemUpdateInput!]!) {
-          updateCartItems(
-            input: {
-              cart_id: $cartId,
-              cart_items: $items
-            }
-          ) {
-            cart {
-              itemsV2 {
-                items {
-                  id
-                  product {
-                    name
-                    sku
-                  }
-                  quantity
-                  prices {
-                    price {
-                      value
-                      currency
-                    }
-                    row_total {
-                      value
-                      currency
-                    }
-                  }
-                }
-                total_quantity
-              }
-              prices {
-                grand_total {
-                  value
-                  currency
-                }
-              }
-            }
-          }
-        }
-        """
+        invalid = _invalid_profile(profile)
+        if invalid:
+            return invalid
+        graphql_query = update_items_mutation(profile)
         
         try:
             target_cart_id = cart_id or self._cart_id
@@ -559,12 +585,19 @@ class CartAPI(APIClientBase):
                 ]
             }
             
+            # Cập nhật lạc quan bản giỏ hàng cục bộ trước khi gửi mutation
+            cart_state = _cart_state()
+            if cart_state:
+                cart_state.apply_update(target_cart_id, cart_item_id, quantity)
+            
             result = await self.execute_graphql(graphql_query, variables)
             
             if result.get("success", False):
                 data = result.get("data", {})
                 update_result = data.get("updateCartItems", {})
                 cart = update_result.get("cart", {})
+                if cart_state:
+                    cart_state.confirm(target_cart_id, cart)
                 
                 return {
                     "success": True,
@@ -574,10 +607,15 @@ class CartAPI(APIClientBase):
                     }
                 }
             
+            if cart_state:
+                cart_state.invalidate(target_cart_id)
             return result
             
         except Exception as e:
             logger.error(f"Lỗi khi cập nhật giỏ hàng: {str(e)}")
+            cart_state = _cart_state()
+            if cart_state:
+                cart_state.invalidate(cart_id or self._cart_id)
             return {
                 "success": False,
                 "message": f"Error updating cart: {str(e)}",
@@ -587,7 +625,8 @@ class CartAPI(APIClientBase):
     async def remove_cart_item(
         self, 
         cart_id: Optional[str], 
-        cart_item_id: str
+        cart_item_id: str,
+        profile: str = CART_PROFILE_SUMMARY
     ) -> Dict[str, Any]:
         """
         Xóa sản phẩm khỏi giỏ hàng.
@@ -595,40 +634,15 @@ class CartAPI(APIClientBase):
         Args:
             cart_id: ID của giỏ hàng.
             cart_item_id: ID của item trong giỏ hàng.
+            profile: Profile thông tin giỏ hàng trả về (mặc định summary).
             
         Returns:
             Dict[str, Any]: Kết quả xóa.
         """
-        graphql_query = """
-        mutation RemoveItemFromCart($cartId: String!, $cartItemId: String!) {
-          removeItemFromCart(
-            input: {
-              cart_id: $cartId,
-              cart_item_id: $cartItemId
-            }
-          ) {
-            cart {
-              itemsV2 {
-                items {
-                  id
-                  product {
-                    name
-                    sku
-                  }
-                  quantity
-                }
-                total_quantity
-              }
-              prices {
-                grand_total {
-                  value
-                  currency
-                }
-              }
-            }
-          }
-        }
-        """
+        invalid = _invalid_profile(profile)
+        if invalid:
+            return invalid
+        graphql_query = remove_item_mutation(profile)
         
         try:
             target_cart_id = cart_id or self._cart_id
@@ -644,12 +658,19 @@ class CartAPI(APIClientBase):
                 "cartItemId": cart_item_id
             }
             
+            # Cập nhật lạc quan bản giỏ hàng cục bộ trước khi gửi mutation
+            cart_state = _cart_state()
+            if cart_state:
+                cart_state.apply_remove(target_cart_id, cart_item_id)
+            
             result = await self.execute_graphql(graphql_query, variables)
             
             if result.get("success", False):
                 data = result.get("data", {})
                 remove_result = data.get("removeItemFromCart", {})
                 cart = remove_result.get("cart", {})
+                if cart_state:
+                    cart_state.confirm(target_cart_id, cart)
                 
                 return {
                     "success": True,
@@ -659,10 +680,15 @@ class CartAPI(APIClientBase):
                     }
                 }
             
+            if cart_state:
+                cart_state.invalidate(target_cart_id)
             return result
             
         except Exception as e:
             logger.error(f"Lỗi khi xóa sản phẩm khỏi giỏ hàng: {str(e)}")
+            cart_state = _cart_state()
+            if cart_state:
+                cart_state.invalidate(cart_id or self._cart_id)
             return {
                 "success": False,
                 "message": f"Error removing item from cart: {str(e)}",
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Các profile trường dữ liệu của giỏ hàng cho truy vấn và mutation GraphQL.
+
+- summary: số lượng sản phẩm và tổng tiền, đủ cho phản hồi sau khi thêm/sửa/xóa.
+- items: summary kèm danh sách sản phẩm trong giỏ hàng.
+- checkout: toàn bộ thông tin giỏ hàng, gồm thuế, giảm giá, phương thức thanh toán
+  và vận chuyển.
+"""
+
+from typing import Dict
+
+CART_PROFILE_SUMMARY = "summary"
+CART_PROFILE_ITEMS = "items"
+CART_PROFILE_CHECKOUT = "checkout"
+
+_SUMMARY_FIELDS = """
+    id
+    is_guest
+    itemsV2 {
+        total_quantity
+    }
+    prices {
+        subtotal_including_tax {
+            value
+            currency
+        }
+        grand_total {
+            value
+            currency
+        }
+    }
+"""
+
+_ITEM_FIELDS = """
+        items {
+            id
+            product {
+                id
+                name
+                sku
+                small_image {
+                    url
+                }
+                price {
+                    regularPrice {
+                        amount {
+                            value
+                            currency
+                        }
+                    }
+                }
+            }
+            quantity
+            prices {
+                price {
+                    value
+                    currency
+                }
+                row_total {
+                    value
+                    currency
+                }
+                total_item_discount {
+                    value
+                    currency
+                }
+            }
+        }
+        total_quantity
+"""
+
+_ITEMS_FIELDS = """
+    id
+    email
+    is_guest
+    itemsV2 {""" + _ITEM_FIELDS + """    }
+    prices {
+        subtotal_including_tax {
+            value
+            currency
+        }
+        grand_total {
+            value
+            currency
+        }
+    }
+"""
+
+_CHECKOUT_FIELDS = """
+    id
+    email
+    is_guest
+    itemsV2 {""" + _ITEM_FIELDS + """    }
+    prices {
+        subtotal_excluding_tax {
+            value
+            currency
+        }
+        subtotal_including_tax {
+            value
+            currency
+        }
+        applied_taxes {
+            amount {
+                value
+                currency
+            }
+            label
+        }
+        discounts {
+            amount {
+                value
+                currency
+            }
+            label
+        }
+        grand_total {
+            value
+            currency
+        }
+    }
+    available_payment_methods {
+        code
+        title
+    }
+    shipping_addresses {
+        available_shipping_methods {
+            carrier_code
+            carrier_title
+            method_code
+            method_title
+            price_incl_tax {
+                value
+                currency
+            }
+        }
+    }
+"""
+
+CART_PROFILES: Dict[str, str] = {
+    CART_PROFILE_SUMMARY: _SUMMARY_FIELDS,
+    CART_PROFILE_ITEMS: _ITEMS_FIELDS,
+    CART_PROFILE_CHECKOUT: _CHECKOUT_FIELDS,
+}
+
+
+def cart_fields(profile: str) -> str:
+    """
+    Lấy tập trường của giỏ hàng theo profile.
+
+    Args:
+        profile: Tên profile (summary, items, checkout).
+
+    Returns:
+        str: Các trường GraphQL của object Cart.
+
+    Raises:
+        ValueError: Nếu profile không tồn tại.
+    """
+    fields = CART_PROFILES.get(profile)
+    if fields is None:
+        raise ValueError(f"Profile giỏ hàng không hợp lệ: {profile} (hợp lệ: {', '.join(CART_PROFILES)})")
+    return fields
+
+
+def cart_query(profile: str) -> str:
+    """Truy vấn thông tin giỏ hàng theo profile."""
+    return (
+        "query GetCartInfo($cartId: String!) {\n"
+        "  cart(cart_id: $cartId) {" + cart_fields(profile) + "  }\n"
+        "}\n"
+    )
+
+
+def add_products_mutation(profile: str) -> str:
+    """Mutation thêm sản phẩm (theo art_no) vào giỏ hàng, trả về giỏ hàng theo profile."""
+    return (
+        "mutation AddProductsToCart($cartId: String!, $items: [CartItemInput!]!) {\n"
+        "  addProductsToCart(\n"
+        "    cartId: $cartId,\n"
+        "    use_art_no: true,\n"
+        "    cartItems: $items\n"
+        "  ) {\n"
+        "    cart {" + cart_fields(profile) + "    }\n"
+        "    user_errors {\n"
+        "      code\n"
+        "      message\n"
+        "    }\n"
+        "  }\n"
+        "}\n"
+    )
+
+
+def update_items_mutation(profile: str) -> str:
+    """Mutation cập nhật số lượng sản phẩm, trả về giỏ hàng theo profile."""
+    return (
+        "mutation UpdateCartItems($cartId: String!, $items: [CartItemUpdateInput!]!) {\n"
+        "  updateCartItems(\n"
+        "    input: {\n"
+        "      cart_id: $cartId,\n"
+        "      cart_items: $items\n"
+        "    }\n"
+        "  ) {\n"
+        "    cart {" + cart_fields(profile) + "    }\n"
+        "  }\n"
+        "}\n"
+    )
+
+
+def remove_item_mutation(profile: str) -> str:
+    """Mutation xóa sản phẩm khỏi giỏ hàng, trả về giỏ hàng theo profile."""
+    return (
+        "mutation RemoveItemFromCart($cartId: String!, $cartItemId: String!) {\n"
+        "  removeItemFromCart(\n"
+        "    input: {\n"
+        "      cart_id: $cartId,\n"
+        "      cart_item_id: $cartItemId\n"
+        "    }\n"
+        "  ) {\n"
+        "    cart {" + cart_fields(profile) + "    }\n"
+        "  }\n"
+        "}\n"
+    )
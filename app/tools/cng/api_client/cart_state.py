@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Trạng thái giỏ hàng phía client, cập nhật lạc quan (optimistic) theo các mutation.
+
+Sau mỗi lần lấy giỏ hàng từ server, trạng thái được lưu lại theo cart_id. Thêm/sửa/xóa
+được áp dụng vào bản cục bộ ngay trước khi gửi mutation, rồi được đối chiếu với phần tóm
+tắt (số lượng, tổng tiền) mà server trả về. Khi phát hiện sai lệch, khi mutation thất bại
+hoặc khi đến chu kỳ đối chiếu, bản cục bộ bị đánh dấu cần đồng bộ lại và lần xem giỏ
+hàng kế tiếp sẽ gọi server.
+"""
+
+import copy
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from .config import Config
+from .cart_profiles import CART_PROFILE_CHECKOUT, CART_PROFILE_ITEMS, CART_PROFILE_SUMMARY
+
+logger = logging.getLogger(__name__)
+
+# Mức chi tiết của từng profile: bản cục bộ chỉ phục vụ được profile không chi tiết hơn nó
+_PROFILE_RANK = {
+    CART_PROFILE_SUMMARY: 0,
+    CART_PROFILE_ITEMS: 1,
+    CART_PROFILE_CHECKOUT: 2,
+}
+
+
+class _CartState:
+    """Bản cục bộ của một giỏ hàng."""
+
+    __slots__ = ("cart", "rank", "synced_at", "mutations", "dirty")
+
+    def __init__(self, cart: Dict[str, Any], rank: int):
+        self.cart = cart
+        self.rank = rank
+        self.synced_at = time.monotonic()
+        self.mutations = 0
+        self.dirty = False
+
+    def items(self) -> List[Dict[str, Any]]:
+        return self.cart.setdefault("itemsV2", {}).setdefault("items", [])
+
+
+class CartStateCache:
+    """
+    Cache trạng thái giỏ hàng theo cart_id.
+    """
+
+    def __init__(self, reconcile_interval: float = 60, reconcile_mutations: int = 5):
+        """
+        Khởi tạo cache.
+
+        Args:
+            reconcile_interval: Số giây tối đa giữa hai lần đồng bộ với server.
+            reconcile_mutations: Số mutation tối đa được áp dụng cục bộ trước khi đồng bộ lại.
+        """
+        self.reconcile_interval = reconcile_interval
+        self.reconcile_mutations = reconcile_mutations
+        self._carts: Dict[str, _CartState] = {}
+        self.local_hits = 0
+        self.reconciles = 0
+        self.conflicts = 0
+
+    def get(self, cart_id: str, profile: str) -> Optional[Dict[str, Any]]:
+        """
+        Lấy bản sao giỏ hàng cục bộ nếu đủ chi tiết và chưa cần đồng bộ lại.
+
+        Args:
+            cart_id: ID của giỏ hàng.
+            profile: Profile giỏ hàng cần lấy.
+
+        Returns:
+            Optional[Dict[str, Any]]: Bản sao giỏ hàng, None nếu phải lấy từ server.
+        """
+        state = self._carts.get(cart_id)
+        rank = _PROFILE_RANK[profile]
+        if state is None or state.rank < rank:
+            return None
+
+        # Dòng tạm chưa có ID, tên, giá: chỉ phục vụ được phần tóm tắt, danh sách dòng phải lấy từ server
+        pending = rank >= _PROFILE_RANK[CART_PROFILE_ITEMS] and any(item.get("pending") for item in state.items())
+        if (state.dirty
+                or pending
+                or state.mutations >= self.reconcile_mutations
+                or time.monotonic() - state.synced_at >= self.reconcile_interval):
+            self.reconciles += 1
+            return None
+
+        self.local_hits += 1
+        return copy.deepcopy(state.cart)
+
+    def record_fetch(self, cart_id: str, profile: str, cart: Dict[str, Any]) -> None:
+        """Lưu giỏ hàng vừa lấy từ server (trạng thái chuẩn)."""
+        self._carts[cart_id] = _CartState(copy.deepcopy(cart), _PROFILE_RANK[profile])
+
+    def apply_add(self, cart_id: str, sku: str, quantity: int) -> None:
+        """
+        Áp dụng lạc quan việc thêm sản phẩm.
+
+        Sản phẩm được thêm theo art_no nên có thể không khớp với SKU của dòng đã có trong giỏ;
+        khi đó một dòng tạm (pending, chưa có ID) được thêm và sẽ được thay bằng dữ liệu thật
+        ở lần đồng bộ kế tiếp. Khi còn dòng tạm, get chỉ phục vụ profile tóm tắt từ bản cục bộ.
+        """
+        state = self._mutable(cart_id)
+        if state is None:
+            return
+        if state.rank >= _PROFILE_RANK[CART_PROFILE_ITEMS]:
+            items = state.items()
+            line = next((item for item in items if (item.get("product") or {}).get("sku") == sku), None)
+            if line is not None:
+                line["quantity"] = line.get("quantity", 0) + quantity
+            else:
+                items.append({"id": None, "product": {"sku": sku}, "quantity": quantity, "pending": True})
+        self._add_total_quantity(state, quantity)
+
+    def apply_update(self, cart_id: str, cart_item_id: str, quantity: int) -> None:
+        """Áp dụng lạc quan việc cập nhật số lượng một dòng trong giỏ hàng."""
+        state = self._mutable(cart_id)
+        if state is None:
+            return
+        if state.rank < _PROFILE_RANK[CART_PROFILE_ITEMS]:
+            # Không biết số lượng cũ của dòng nên không thể tính lại tổng số lượng
+            state.dirty = True
+            return
+
+        items = state.items()
+        line = next((item for item in items if str(item.get("id")) == str(cart_item_id)), None)
+        if line is None:
+            self._conflict(cart_id, state, f"không có dòng {cart_item_id}")
+            return
+
+        self._add_total_quantity(state, quantity - line.get("quantity", 0))
+        if quantity <= 0:
+            items.remove(line)
+        else:
+            line["quantity"] = quantity
+
+    def apply_remove(self, cart_id: str, cart_item_id: str) -> None:
+        """Áp dụng lạc quan việc xóa một dòng khỏi giỏ hàng."""
+        self.apply_update(cart_id, cart_item_id, 0)
+
+    def confirm(self, cart_id: str, cart: Dict[str, Any]) -> None:
+        """
+        Đối chiếu bản cục bộ với giỏ hàng server trả về sau mutation.
+
+        Bản cục bộ được thay bằng giỏ hàng server trả về và hạ xuống đúng mức chi tiết của nó:
+        giá từng dòng, thuế, giảm giá của bản cũ đã lỗi thời sau mutation nên các lần xem chi
+        tiết hơn sẽ lấy lại từ server. Nếu chỉ có phần tóm tắt, tổng số lượng được dùng để
+        phát hiện sai lệch với danh sách sản phẩm cục bộ trước khi thay thế.
+        """
+        if not cart:
+            return
+        state = self._carts.get(cart_id)
+        server_items = (cart.get("itemsV2") or {}).get("items")
+
+        if state is None:
+            # Chưa có bản cục bộ: chỉ biết những gì server vừa trả về
+            profile = CART_PROFILE_ITEMS if server_items is not None else CART_PROFILE_SUMMARY
+            self.record_fetch(cart_id, profile, cart)
+            return
+
+        if server_items is not None:
+            # Danh sách sản phẩm từ server là chuẩn; thông tin thanh toán cũ (thuế, giảm giá,
+            # vận chuyển) không còn đúng nên bản cục bộ chỉ phục vụ đến profile items
+            state.cart = copy.deepcopy(cart)
+            state.rank = _PROFILE_RANK[CART_PROFILE_ITEMS]
+            return
+
+        # Chỉ có tóm tắt: đối chiếu tổng số lượng với bản cục bộ
+        server_total = (cart.get("itemsV2") or {}).get("total_quantity")
+        if server_total is not None:
+            local_total = (state.cart.get("itemsV2") or {}).get("total_quantity")
+            if local_total != server_total:
+                self._conflict(cart_id, state, f"tổng số lượng {local_total} != {server_total}")
+            elif state.rank >= _PROFILE_RANK[CART_PROFILE_ITEMS]:
+                lines_total = sum(item.get("quantity", 0) for item in state.items())
+                if lines_total != server_total:
+                    self._conflict(cart_id, state, f"số lượng các dòng {lines_total} != {server_total}")
+
+        # Tổng tiền mới không khớp với giá từng dòng cũ: chỉ giữ lại phần tóm tắt
+        state.cart = copy.deepcopy(cart)
+        state.rank = _PROFILE_RANK[CART_PROFILE_SUMMARY]
+
+    def invalidate(self, cart_id: Optional[str]) -> None:
+        """Xóa bản cục bộ (ví dụ khi mutation thất bại hoặc giỏ hàng hết hạn)."""
+        if cart_id:
+            self._carts.pop(cart_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Thống kê hoạt động của cache."""
+        return {
+            "carts": len(self._carts),
+            "local_hits": self.local_hits,
+            "reconciles": self.reconciles,
+            "conflicts": self.conflicts
+        }
+
+    def _mutable(self, cart_id: str) -> Optional[_CartState]:
+        state = self._carts.get(cart_id)
+        if state is not None:
+            state.mutations += 1
+        return state
+
+    def _add_total_quantity(self, state: _CartState, delta: int) -> None:
+        items_v2 = state.cart.setdefault("itemsV2", {})
+        if items_v2.get("total_quantity") is not None:
+            items_v2["total_quantity"] = items_v2["total_quantity"] + delta
+
+    def _conflict(self, cart_id: str, state: _CartState, reason: str) -> None:
+        self.conflicts += 1
+        state.dirty = True
+        logger.info(f"Giỏ hàng {cart_id} lệch với server ({reason}), sẽ đồng bộ lại")
+
+
+# Cache dùng chung cho toàn bộ process
+_cart_state_cache = CartStateCache(
+    reconcile_interval=Config.CART_RECONCILE_INTERVAL,
+    reconcile_mutations=Config.CART_RECONCILE_MUTATIONS
+)
+
+
+def get_cart_state_cache() -> CartStateCache:
+    """Trả về cache trạng thái giỏ hàng dùng chung."""
+    return _cart_state_cache
@@ -7,13 +7,13 @@ Factory tạo các instance API client với cấu hình nhất quán.
 
 import os
 from typing import Optional, Dict, Any
-import asyncio
-import aiohttp
 
 from .product import ProductAPI
 from .cart import CartAPI
 from .auth import AuthAPI
 from .api_client import EcommerceAPIClient
+from .registry import get_loop_registry
+from .session_view import SessionClientView
 
 class APIClientFactory:
     """Factory tạo các instance API client với cấu hình nhất quán."""
@@ -30,40 +30,69 @@ class APIClientFactory:
             cls._instance._clients = {}  # Cache các client đã tạo
         return cls._instance
     
-    def get_product_api(self, custom_timeout: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None) -> ProductAPI:
+    def get_product_api(self, custom_timeout: Optional[int] = None) -> ProductAPI:
         """Trả về ProductAPI client với cấu hình đã được chuẩn hóa."""
         client_key = f"product_{custom_timeout}"
         if client_key not in self._clients:
             timeout = custom_timeout or self.timeout
-            self._clients[client_key] = ProductAPI(self.base_url, timeout, loop)
+            self._clients[client_key] = ProductAPI(self.base_url, timeout)
         return self._clients[client_key]
     
-    def get_cart_api(self, custom_timeout: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None) -> CartAPI:
+    def get_cart_api(self, custom_timeout: Optional[int] = None) -> CartAPI:
         """Trả về CartAPI client với cấu hình đã được chuẩn hóa."""
         client_key = f"cart_{custom_timeout}"
         if client_key not in self._clients:
             timeout = custom_timeout or self.timeout
-            self._clients[client_key] = CartAPI(self.base_url, timeout, loop)
+            self._clients[client_key] = CartAPI(self.base_url, timeout)
         return self._clients[client_key]
     
-    def get_auth_api(self, custom_timeout: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None) -> AuthAPI:
+    def get_auth_api(self, custom_timeout: Optional[int] = None) -> AuthAPI:
         """Trả về AuthAPI client với cấu hình đã được chuẩn hóa."""
         client_key = f"auth_{custom_timeout}"
         if client_key not in self._clients:
             timeout = custom_timeout or self.timeout
-            self._clients[client_key] = AuthAPI(self.base_url, timeout, loop)
+            self._clients[client_key] = AuthAPI(self.base_url, timeout)
         return self._clients[client_key]
     
-    def get_full_api_client(self, custom_timeout: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None) -> EcommerceAPIClient:
+    def get_full_api_client(self, custom_timeout: Optional[int] = None) -> EcommerceAPIClient:
         """Trả về EcommerceAPIClient đầy đủ với cấu hình đã được chuẩn hóa."""
         client_key = f"full_{custom_timeout}"
         if client_key not in self._clients:
             timeout = custom_timeout or self.timeout
-            self._clients[client_key] = EcommerceAPIClient(self.base_url, timeout, loop)
+            self._clients[client_key] = EcommerceAPIClient(self.base_url, timeout)
         return self._clients[client_key]
     
+    def session_view(
+        self,
+        auth_token: Optional[str] = None,
+        store_code: Optional[str] = None,
+        cart_id: Optional[str] = None,
+        custom_timeout: Optional[int] = None
+    ) -> SessionClientView:
+        """
+        Tạo view theo phiên người dùng trên EcommerceAPIClient dùng chung.
+        
+        View giữ token, mã cửa hàng và cart_id riêng của phiên nên nhiều người dùng có thể
+        chạy đồng thời mà không cần tạo client (và connection pool) riêng.
+        
+        Args:
+            auth_token: Token xác thực của phiên.
+            store_code: Mã cửa hàng của phiên.
+            cart_id: ID giỏ hàng của phiên.
+            custom_timeout: Timeout của client dùng chung.
+            
+        Returns:
+            SessionClientView: View của phiên.
+        """
+        return SessionClientView(self.get_full_api_client(custom_timeout), auth_token, store_code, cart_id)
+    
     def set_auth_token(self, token: str) -> None:
-        """Thiết lập token xác thực cho tất cả các client hiện có."""
+        """
+        Thiết lập token xác thực cho tất cả các client hiện có.
+        
+        Ảnh hưởng đến mọi người dùng của các client dùng chung; với nhiều phiên đồng thời
+        hãy dùng session_view().
+        """
         for client in self._clients.values():
             client.set_auth_token(token)
     
@@ -73,7 +102,10 @@ class APIClientFactory:
             client.set_store_code(store_code)
             
     async def close_all(self) -> None:
-        """Đóng tất cả các client."""
-        for client in self._clients.values():
-            await client.close()
-        self._clients = {} 
\ No newline at end of file
+        """
+        Đóng mọi connection pool của event loop đang chạy.
+        
+        Client không gắn với event loop nên vẫn được giữ lại (cùng token, mã cửa hàng và
+        cart_id); lần gọi API sau trên loop bất kỳ sẽ tự tạo pool mới từ registry.
+        """
+        await get_loop_registry().close_loop()
@@ -19,10 +19,68 @@ class Config:
     # Retry settings
     MAX_RETRY_ATTEMPTS = 3
     RETRY_DELAY = 1  # seconds
+    RETRY_MAX_DELAY = 10  # seconds
+    # Ngân sách retry dùng chung: token nạp cho mỗi request và mỗi giây
+    RETRY_BUDGET_RATIO = 0.1
+    RETRY_BUDGET_MIN_PER_SECOND = 1.0
     
     # Default timeout
     DEFAULT_TIMEOUT = 120  # seconds - increased from 30 to handle slow external API calls
     
+    # Vòng đời token khách hàng: thời gian sống mặc định khi không lấy được từ storeConfig,
+    # số giây làm mới trước khi hết hạn và thời gian cache giá trị lấy từ storeConfig
+    TOKEN_DEFAULT_LIFETIME_HOURS = float(os.getenv("MM_TOKEN_DEFAULT_LIFETIME_HOURS", "1"))
+    TOKEN_REFRESH_MARGIN = int(os.getenv("MM_TOKEN_REFRESH_MARGIN", "300"))  # seconds
+    TOKEN_LIFETIME_TTL = int(os.getenv("MM_TOKEN_LIFETIME_TTL", "3600"))  # seconds
+    
+    # Thời gian chờ tối đa của các tool wrapper đồng bộ chạy trên event loop nền
+    TOOL_CALL_TIMEOUT = int(os.getenv("MM_TOOL_CALL_TIMEOUT", "180"))  # seconds
+    
+    # Hạn mức cache theo cửa hàng: tỷ lệ sức chứa của mỗi cache dành cho một cửa hàng,
+    # dạng "b2c_10010_vi:0.5,b2c_10011_vi:0.2"; cửa hàng không khai báo dùng toàn bộ sức chứa
+    CACHE_STORE_QUOTAS = {
+        store.strip(): float(share)
+        for store, _, share in (item.partition(":") for item in os.getenv("MM_CACHE_STORE_QUOTAS", "").split(","))
+        if store.strip() and share.strip()
+    }
+    
+    # Cache chi tiết sản phẩm theo SKU: TTL và khoảng grace trả dữ liệu cũ trong lúc làm mới
+    PRODUCT_CACHE_TTL = int(os.getenv("MM_PRODUCT_CACHE_TTL", "300"))  # seconds
+    PRODUCT_CACHE_GRACE = int(os.getenv("MM_PRODUCT_CACHE_GRACE", "600"))  # seconds
+    PRODUCT_CACHE_MAX_ENTRIES = int(os.getenv("MM_PRODUCT_CACHE_MAX_ENTRIES", "2000"))
+    
+    # Negative cache: ghi nhớ ngắn hạn SKU/Article Number/từ khóa không có kết quả
+    NEGATIVE_CACHE_TTL = int(os.getenv("MM_NEGATIVE_CACHE_TTL", "60"))  # seconds
+    NEGATIVE_CACHE_MAX_ENTRIES = int(os.getenv("MM_NEGATIVE_CACHE_MAX_ENTRIES", "5000"))
+    
+    # Trạng thái giỏ hàng phía client: đồng bộ lại với server sau số giây hoặc số mutation này
+    CART_STATE_ENABLED = os.getenv("MM_CART_STATE_ENABLED", "true").lower() == "true"
+    CART_RECONCILE_INTERVAL = int(os.getenv("MM_CART_RECONCILE_INTERVAL", "60"))  # seconds
+    CART_RECONCILE_MUTATIONS = int(os.getenv("MM_CART_RECONCILE_MUTATIONS", "5"))
+    
+    # Tra cứu chi tiết sản phẩm theo ID/SKU/Article Number song song thay vì tuần tự
+    DETAIL_RESOLVE_PARALLEL = os.getenv("MM_DETAIL_RESOLVE_PARALLEL", "true").lower() == "true"
+    
+    # Số trang tối đa được duyệt của từ khóa chọn lọc nhất khi tìm giao nhiều từ khóa
+    INTERSECTION_MAX_PAGES = int(os.getenv("MM_INTERSECTION_MAX_PAGES", "5"))
+    
+    # Connection pool: cache DNS và giữ kết nối idle đủ lâu để được ping định kỳ
+    DNS_CACHE_TTL = int(os.getenv("MM_DNS_CACHE_TTL", "300"))  # seconds
+    KEEPALIVE_TIMEOUT = int(os.getenv("MM_KEEPALIVE_TIMEOUT", "75"))  # seconds
+    
+    # Làm nóng kết nối khi khởi động: số kết nối mở sẵn tới mỗi host và chu kỳ ping
+    WARMUP_ENABLED = os.getenv("MM_WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_CONNECTIONS = int(os.getenv("MM_WARMUP_CONNECTIONS", "4"))
+    KEEPALIVE_PING_INTERVAL = int(os.getenv("MM_KEEPALIVE_PING_INTERVAL", "30"))  # seconds
+    
+    # HTTP cache cho các truy vấn GraphQL GET (tuân theo Cache-Control/ETag)
+    HTTP_CACHE_ENABLED = os.getenv("MM_HTTP_CACHE_ENABLED", "true").lower() == "true"
+    HTTP_CACHE_MAX_ENTRIES = int(os.getenv("MM_HTTP_CACHE_MAX_ENTRIES", "512"))
+    
+    # Giải mã JSON: payload từ ngưỡng này (byte) trở lên được parse ngoài event loop
+    JSON_OFFLOAD_THRESHOLD = int(os.getenv("MM_JSON_OFFLOAD_THRESHOLD", str(256 * 1024)))
+    JSON_DECODE_WORKERS = int(os.getenv("MM_JSON_DECODE_WORKERS", "2"))
+    
     # GraphQL queries for common operations
     GRAPHQL_QUERIES = {
         "create_guest_cart": """
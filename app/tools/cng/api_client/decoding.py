@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Giải mã JSON cho response GraphQL mà không chặn event loop.
+
+Body được đọc dần theo từng chunk; payload lớn hơn ngưỡng được parse trong thread pool
+để các coroutine khác không bị treo trong lúc parse. Thời gian giải mã và kích thước
+payload được ghi nhận theo tên truy vấn.
+"""
+
+import asyncio
+import json
+import re
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+import aiohttp
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+_OPERATION_NAME_RE = re.compile(r"^\s*(?:query|mutation)\s+(\w+)")
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def get_operation_name(query: str) -> str:
+    """
+    Lấy tên operation của truy vấn GraphQL.
+
+    Args:
+        query: Truy vấn GraphQL.
+
+    Returns:
+        str: Tên operation hoặc "anonymous" nếu truy vấn không đặt tên.
+    """
+    match = _OPERATION_NAME_RE.match(query)
+    return match.group(1) if match else "anonymous"
+
+
+class DecodeStats:
+    """Thống kê kích thước payload và thời gian giải mã theo tên truy vấn."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, query_name: str, size: int, elapsed: float, offloaded: bool) -> None:
+        """
+        Ghi nhận một lần giải mã.
+
+        Args:
+            query_name: Tên truy vấn.
+            size: Kích thước payload (byte).
+            elapsed: Thời gian đọc và giải mã (giây).
+            offloaded: True nếu được parse trong thread pool.
+        """
+        with self._lock:
+            entry = self._stats.setdefault(query_name, {
+                "count": 0,
+                "offloaded": 0,
+                "total_bytes": 0,
+                "max_bytes": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0
+            })
+            elapsed_ms = elapsed * 1000
+            entry["count"] += 1
+            entry["offloaded"] += int(offloaded)
+            entry["total_bytes"] += size
+            entry["max_bytes"] = max(entry["max_bytes"], size)
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Trả về bản sao thống kê, kèm giá trị trung bình.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Thống kê theo tên truy vấn.
+        """
+        with self._lock:
+            result = {}
+            for name, entry in self._stats.items():
+                item = dict(entry)
+                item["avg_bytes"] = entry["total_bytes"] / entry["count"]
+                item["avg_ms"] = entry["total_ms"] / entry["count"]
+                result[name] = item
+            return result
+
+    def reset(self) -> None:
+        """Xóa toàn bộ thống kê."""
+        with self._lock:
+            self._stats.clear()
+
+
+class ResponseDecoder:
+    """
+    Đọc body response theo dạng stream và parse JSON, đẩy payload lớn sang thread pool.
+    """
+
+    def __init__(self, offload_threshold: int = 256 * 1024, max_workers: int = 2):
+        """
+        Khởi tạo decoder.
+
+        Args:
+            offload_threshold: Kích thước payload (byte) từ đó trở lên sẽ được parse trong thread pool.
+            max_workers: Số thread tối đa của thread pool.
+        """
+        self.offload_threshold = offload_threshold
+        self.max_workers = max_workers
+        self.stats = DecodeStats()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="graphql-json"
+                    )
+        return self._executor
+
+    async def decode(self, response: aiohttp.ClientResponse, query_name: str = "anonymous") -> Any:
+        """
+        Đọc và giải mã body JSON của response.
+
+        Args:
+            response: Response từ API.
+            query_name: Tên truy vấn dùng cho thống kê.
+
+        Returns:
+            Any: Dữ liệu JSON đã giải mã.
+
+        Raises:
+            ValueError: Nếu body không phải JSON hợp lệ.
+        """
+        started = time.perf_counter()
+
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+            body.extend(chunk)
+
+        offloaded = len(body) >= self.offload_threshold
+        if offloaded:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(self._get_executor(), json.loads, body)
+        else:
+            data = json.loads(body)
+
+        self.stats.record(query_name, len(body), time.perf_counter() - started, offloaded)
+        return data
+
+    def shutdown(self) -> None:
+        """Dừng thread pool (nếu đã được tạo)."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+# Decoder dùng chung cho toàn bộ process
+_response_decoder = ResponseDecoder(
+    offload_threshold=Config.JSON_OFFLOAD_THRESHOLD,
+    max_workers=Config.JSON_DECODE_WORKERS
+)
+
+
+def get_response_decoder() -> ResponseDecoder:
+    """Trả về decoder dùng chung."""
+    return _response_decoder
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bộ nhớ đệm HTTP cho các truy vấn GraphQL GET, tuân theo Cache-Control và ETag.
+"""
+
+import copy
+import re
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Mapping, Tuple
+from urllib.parse import urlencode, urlparse
+
+from .cache_namespace import COUNTER_HITS, COUNTER_MISSES, StoreNamespacedCache
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+# Các field gốc thuộc về giỏ hàng/khách hàng - dữ liệu riêng tư, không bao giờ cache
+_PRIVATE_FIELD_RE = re.compile(r"\b(?:cart|customer)\w*\s*[({]", re.IGNORECASE)
+_PRIVATE_PATH_RE = re.compile(r"/(?:cart|carts|customer|customers)(?:/|$)", re.IGNORECASE)
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """
+    Phân tích header Cache-Control thành dict directive -> giá trị.
+
+    Args:
+        value: Giá trị header Cache-Control.
+
+    Returns:
+        Dict[str, Optional[str]]: Các directive (chữ thường), giá trị None nếu không có.
+    """
+    directives: Dict[str, Optional[str]] = {}
+    if not value:
+        return directives
+
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, arg = part.partition("=")
+        directives[name.strip().lower()] = arg.strip().strip('"') if arg else None
+    return directives
+
+
+def is_cacheable_request(url: str, query: str, headers: Mapping[str, str]) -> bool:
+    """
+    Kiểm tra một request GET có được phép cache hay không.
+
+    Request mang token xác thực hoặc truy cập giỏ hàng/khách hàng luôn bị loại trừ.
+
+    Args:
+        url: URL của request.
+        query: Truy vấn GraphQL.
+        headers: Headers sẽ được gửi đi.
+
+    Returns:
+        bool: True nếu có thể cache.
+    """
+    if any(name.lower() == "authorization" for name in headers):
+        return False
+    if _PRIVATE_PATH_RE.search(urlparse(url).path):
+        return False
+    if _PRIVATE_FIELD_RE.search(query):
+        return False
+    return True
+
+
+def make_cache_key(url: str, params: Mapping[str, str], store_code: Optional[str]) -> Tuple[str, str]:
+    """
+    Tạo khóa cache từ URL đầy đủ (kèm query string) và header Store.
+
+    Args:
+        url: URL cơ sở của API.
+        params: Tham số query string của request GET.
+        store_code: Giá trị header Store.
+
+    Returns:
+        Tuple[str, str]: Khóa cache.
+    """
+    return (f"{url}?{urlencode(sorted(params.items()))}", store_code or "")
+
+
+class _CacheEntry:
+    """Một response đã được cache."""
+
+    __slots__ = ("result", "etag", "expires_at")
+
+    def __init__(self, result: Dict[str, Any], etag: Optional[str], expires_at: float):
+        self.result = result
+        self.etag = etag
+        self.expires_at = expires_at
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.monotonic()) < self.expires_at
+
+
+class HTTPResponseCache:
+    """
+    Cache LRU cho response GraphQL GET, chia namespace theo header Store (phần tử thứ hai
+    của khóa cache).
+
+    Entry còn "tươi" được trả về mà không cần gọi mạng; entry đã hết hạn nhưng có ETag
+    được xác thực lại bằng If-None-Match.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Khởi tạo cache.
+
+        Args:
+            max_entries: Số entry tối đa trước khi loại bỏ entry ít dùng nhất.
+        """
+        self._entries: StoreNamespacedCache[_CacheEntry] = StoreNamespacedCache("http", max_entries)
+
+    @property
+    def max_entries(self) -> int:
+        return self._entries.max_entries
+
+    @property
+    def hits(self) -> int:
+        return self._entries.total(COUNTER_HITS)
+
+    @property
+    def revalidations(self) -> int:
+        return self._entries.total("revalidations")
+
+    @property
+    def misses(self) -> int:
+        return self._entries.total(COUNTER_MISSES)
+
+    def lookup(self, key: Tuple[str, str]) -> Optional[_CacheEntry]:
+        """
+        Tìm entry theo khóa (không phân biệt còn tươi hay không).
+
+        Args:
+            key: Khóa cache.
+
+        Returns:
+            Optional[_CacheEntry]: Entry nếu có.
+        """
+        url, store_code = key
+        entry = self._entries.get(store_code, url)
+        if entry is None:
+            self._entries.record(store_code, COUNTER_MISSES)
+        return entry
+
+    def get_fresh(self, key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Trả về bản sao kết quả nếu entry còn tươi.
+
+        Args:
+            key: Khóa cache.
+
+        Returns:
+            Optional[Dict[str, Any]]: Bản sao kết quả hoặc None.
+        """
+        url, store_code = key
+        entry = self._entries.get(store_code, url)
+        if entry is not None and entry.is_fresh():
+            self._entries.record(store_code, COUNTER_HITS)
+            return copy.deepcopy(entry.result)
+        return None
+
+    def store(self, key: Tuple[str, str], result: Dict[str, Any], headers: Mapping[str, str]) -> bool:
+        """
+        Lưu kết quả nếu headers của response cho phép.
+
+        Args:
+            key: Khóa cache.
+            result: Kết quả đã xử lý (chỉ nên là kết quả thành công).
+            headers: Headers của response.
+
+        Returns:
+            bool: True nếu kết quả đã được lưu.
+        """
+        url, store_code = key
+        ttl, etag = self._freshness(headers)
+        if ttl is None:
+            self._entries.pop(store_code, url)
+            return False
+        if ttl <= 0 and not etag:
+            # Không có thời hạn và không thể xác thực lại thì lưu cũng vô ích
+            self._entries.pop(store_code, url)
+            return False
+
+        self._entries.put(store_code, url, _CacheEntry(copy.deepcopy(result), etag, time.monotonic() + max(ttl, 0)))
+        return True
+
+    def revalidated(self, key: Tuple[str, str], headers: Mapping[str, str]) -> Optional[Dict[str, Any]]:
+        """
+        Cập nhật thời hạn entry sau khi server trả về 304 Not Modified.
+
+        Args:
+            key: Khóa cache.
+            headers: Headers của response 304.
+
+        Returns:
+            Optional[Dict[str, Any]]: Bản sao kết quả đã cache hoặc None nếu entry không còn.
+        """
+        url, store_code = key
+        entry = self._entries.get(store_code, url)
+        if entry is None:
+            return None
+
+        ttl, etag = self._freshness(headers)
+        entry.expires_at = time.monotonic() + max(ttl or 0, 0)
+        if etag:
+            entry.etag = etag
+        self._entries.record(store_code, "revalidations")
+        return copy.deepcopy(entry.result)
+
+    def invalidate(self, key: Tuple[str, str]) -> None:
+        """Xóa một entry khỏi cache."""
+        url, store_code = key
+        self._entries.pop(store_code, url)
+
+    def invalidate_store(self, store_code: str) -> int:
+        """Xóa mọi entry của một cửa hàng, trả về số entry đã xóa."""
+        return self._entries.invalidate_store(store_code)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hoạt động của cache, tổng và theo từng cửa hàng."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "stores": self._entries.stats()["stores"]
+        }
+
+    @staticmethod
+    def _freshness(headers: Mapping[str, str]) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Tính thời gian tươi (giây) và ETag từ headers của response.
+
+        Returns:
+            Tuple[Optional[float], Optional[str]]: (ttl, etag); ttl là None nếu không được lưu.
+        """
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        etag = headers.get("ETag")
+
+        if "no-store" in directives or "private" in directives:
+            return None, None
+        if "no-cache" in directives:
+            return 0, etag
+
+        for name in ("s-maxage", "max-age"):
+            if directives.get(name) is not None:
+                try:
+                    return float(directives[name]), etag
+                except ValueError:
+                    logger.debug(f"Giá trị {name} không hợp lệ: {directives[name]}")
+
+        expires = headers.get("Expires")
+        if expires:
+            try:
+                expires_at = parsedate_to_datetime(expires).timestamp()
+                return expires_at - time.time(), etag
+            except (TypeError, ValueError):
+                return 0, etag
+
+        # Không có thông tin thời hạn: chỉ giữ lại để xác thực lại bằng ETag
+        return (0, etag) if etag else (None, None)
+
+
+# Cache dùng chung cho toàn bộ process
+_http_cache = HTTPResponseCache(max_entries=Config.HTTP_CACHE_MAX_ENTRIES)
+
+
+def get_http_cache() -> HTTPResponseCache:
+    """Trả về cache HTTP dùng chung."""
+    return _http_cache
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tìm giao (intersection) kết quả của nhiều từ khóa theo kiểu tăng dần.
+
+Từ khóa có ít kết quả nhất (chọn lọc nhất) được duyệt trước, từng trang một; các
+sản phẩm của trang đó được kiểm tra với những từ khóa còn lại bằng truy vấn lọc theo
+lô SKU. Quá trình dừng ngay khi tìm đủ số sản phẩm chung cần thiết.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from .pagination import ProductPageIterator
+
+logger = logging.getLogger(__name__)
+
+
+def _items_of(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return (result.get("data", {}).get("products", {}) or {}).get("items") or []
+
+
+async def progressive_intersection(
+    product_api: Any,
+    keywords: List[str],
+    filters: Optional[Dict[str, Any]] = None,
+    sort: Optional[Dict[str, str]] = None,
+    skip: int = 0,
+    limit: int = 10,
+    page_size: int = 10,
+    max_pages: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Tìm các sản phẩm xuất hiện trong kết quả của TẤT CẢ từ khóa.
+
+    Args:
+        product_api: ProductAPI dùng để gọi suggest_products.
+        keywords: Danh sách từ khóa.
+        filters: Bộ lọc chung cho tất cả từ khóa.
+        sort: Tiêu chí sắp xếp, áp dụng cho từ khóa được duyệt.
+        skip: Số sản phẩm chung cần bỏ qua (các trang trước).
+        limit: Số sản phẩm chung cần lấy.
+        page_size: Kích thước trang khi duyệt từ khóa chọn lọc nhất.
+        max_pages: Số trang tối đa được duyệt của từ khóa chọn lọc nhất.
+
+    Returns:
+        Dict[str, Any]: {"success", "items", "has_more", "matched", "upstream_calls"}
+            hoặc kết quả lỗi của upstream (kèm "upstream_calls").
+    """
+    upstream_calls = 0
+
+    async def fetch(keyword: str, page: int, extra_filters: Optional[Dict[str, Any]] = None,
+                    size: Optional[int] = None, with_sort: bool = True) -> Dict[str, Any]:
+        nonlocal upstream_calls
+        upstream_calls += 1
+        merged_filters = {**(filters or {}), **(extra_filters or {})} or None
+        return await product_api.suggest_products(
+            keyword,
+            merged_filters,
+            sort if with_sort else None,
+            size or page_size,
+            page
+        )
+
+    def error(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {**result, "upstream_calls": upstream_calls}
+
+    target = skip + limit
+
+    # Trang đầu của mọi từ khóa: cho biết độ chọn lọc (total_count) và những sản phẩm
+    # đã chắc chắn khớp với từng từ khóa, không cần kiểm tra lại
+    first_pages = await asyncio.gather(*(fetch(keyword, 1) for keyword in keywords))
+    for result in first_pages:
+        if not result.get("success", False):
+            return error(result)
+
+    totals = [
+        (result.get("data", {}).get("products", {}) or {}).get("total_count", 0) or 0
+        for result in first_pages
+    ]
+    if not keywords or min(totals) == 0:
+        return {"success": True, "items": [], "has_more": False, "matched": 0,
+                "upstream_calls": upstream_calls}
+
+    driver = min(range(len(keywords)), key=lambda index: totals[index])
+    others = [index for index in range(len(keywords)) if index != driver]
+    known: Dict[int, Set[Any]] = {
+        index: {item.get("id") for item in _items_of(first_pages[index])} for index in others
+    }
+
+    # Các trang tiếp theo của từ khóa chọn lọc nhất được tải trước trong nền
+    remaining_pages = max_pages - 1 if max_pages else None
+    driver_pages = ProductPageIterator(
+        lambda page: fetch(keywords[driver], page),
+        page_size=page_size,
+        start_page=2,
+        max_pages=remaining_pages,
+        read_ahead=1
+    )
+    driver_pages.total_pages = (totals[driver] + page_size - 1) // page_size
+    if remaining_pages == 0:
+        await driver_pages.aclose()
+
+    matches: List[Dict[str, Any]] = []
+    page_items = _items_of(first_pages[driver])
+
+    async with driver_pages:
+        while page_items and len(matches) < target:
+            candidates = [item for item in page_items if item.get("sku")]
+
+            async def probe(index: int) -> Optional[Set[Any]]:
+                unknown = [item["sku"] for item in candidates if item.get("id") not in known[index]]
+                if not unknown:
+                    return set()
+                result = await fetch(
+                    keywords[index],
+                    1,
+                    extra_filters={"sku": {"in": unknown}},
+                    size=len(unknown),
+                    with_sort=False
+                )
+                if not result.get("success", False):
+                    return None
+                return {item.get("id") for item in _items_of(result)}
+
+            # Kiểm tra lô SKU với tất cả từ khóa còn lại song song
+            probes = await asyncio.gather(*(probe(index) for index in others))
+            if any(found is None for found in probes):
+                logger.warning("Lỗi khi kiểm tra lô SKU, dừng tìm giao sớm")
+                break
+
+            for index, found in zip(others, probes):
+                known[index] |= found
+
+            for item in candidates:
+                if all(item.get("id") in known[index] for index in others):
+                    matches.append(item)
+
+            if len(matches) >= target:
+                break
+            page_items = await driver_pages.next_page()
+
+        has_more = len(matches) > target or driver_pages.has_more
+
+    logger.info(
+        f"Tìm giao {len(keywords)} từ khóa: {len(matches)} sản phẩm chung, "
+        f"{upstream_calls} lần gọi upstream"
+    )
+    return {
+        "success": True,
+        "items": matches[skip:target],
+        "has_more": has_more,
+        "matched": len(matches),
+        "upstream_calls": upstream_calls
+    }
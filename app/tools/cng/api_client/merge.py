@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Gộp (k-way merge) kết quả tìm kiếm của nhiều từ khóa theo dạng stream.
+
+Mỗi từ khóa là một luồng sản phẩm đã được upstream xếp hạng; các luồng được đọc dần
+từng trang và gộp bằng heap, loại trùng theo id ngay khi gộp và dừng lại khi đã đủ
+số sản phẩm cho trang được yêu cầu. Khối lượng công việc tỉ lệ với kích thước đầu ra
+thay vì số từ khóa x page_size.
+"""
+
+import asyncio
+import heapq
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .pagination import ProductPageIterator
+
+ORDER_RELEVANCE = "relevance"
+ORDER_PRICE_ASC = "price_asc"
+ORDER_PRICE_DESC = "price_desc"
+
+
+def product_price(product: Dict[str, Any]) -> float:
+    """Lấy giá thường (regularPrice) của sản phẩm, mặc định 0."""
+    price = (
+        (product.get("price") or {})
+        .get("regularPrice", {})
+        .get("amount", {})
+        .get("value")
+    )
+    return float(price) if price is not None else 0.0
+
+
+def merge_order(sort: Optional[Dict[str, str]]) -> str:
+    """
+    Xác định thứ tự gộp từ tiêu chí sắp xếp của GraphQL.
+
+    Args:
+        sort: Tiêu chí sắp xếp (ví dụ {"price": "ASC"}).
+
+    Returns:
+        str: ORDER_PRICE_ASC, ORDER_PRICE_DESC hoặc ORDER_RELEVANCE.
+    """
+    direction = (sort or {}).get("price")
+    if direction == "ASC":
+        return ORDER_PRICE_ASC
+    if direction == "DESC":
+        return ORDER_PRICE_DESC
+    # Các tiêu chí khác giữ nguyên thứ tự upstream của từng luồng
+    return ORDER_RELEVANCE
+
+
+def _sort_key(order: str) -> Callable[[Dict[str, Any], int], float]:
+    if order == ORDER_PRICE_ASC:
+        return lambda product, rank: product_price(product)
+    if order == ORDER_PRICE_DESC:
+        return lambda product, rank: -product_price(product)
+    # Theo độ liên quan: xen kẽ các luồng theo thứ hạng trong từng luồng
+    return lambda product, rank: rank
+
+
+async def merge_product_streams(
+    streams: List[ProductPageIterator],
+    order: str = ORDER_RELEVANCE,
+    skip: int = 0,
+    limit: int = 10
+) -> Tuple[List[Dict[str, Any]], bool, int]:
+    """
+    Gộp các luồng sản phẩm đã xếp hạng, loại trùng theo id.
+
+    Các luồng luôn được đóng (hủy tải trước) khi hàm kết thúc.
+
+    Args:
+        streams: Các iterator sản phẩm, mỗi iterator đã được upstream sắp xếp theo `order`.
+        order: Thứ tự gộp.
+        skip: Số sản phẩm (đã loại trùng) cần bỏ qua - các trang trước.
+        limit: Số sản phẩm cần lấy.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], bool, int]: (sản phẩm của trang, còn sản phẩm phía sau hay không,
+            số sản phẩm khác nhau đã duyệt qua).
+    """
+    key = _sort_key(order)
+    heap: List[Tuple[float, int, int, Dict[str, Any]]] = []
+    ranks = [0] * len(streams)
+    seen_ids = set()
+    results: List[Dict[str, Any]] = []
+    skipped = 0
+
+    async def push_next(index: int) -> None:
+        try:
+            product = await streams[index].__anext__()
+        except StopAsyncIteration:
+            return
+        rank = ranks[index]
+        ranks[index] += 1
+        # (khóa sắp xếp, thứ tự luồng, thứ hạng) luôn duy nhất nên không cần so sánh dict
+        heapq.heappush(heap, (key(product, rank), index, rank, product))
+
+    def is_new(product: Dict[str, Any]) -> bool:
+        product_id = product.get("id")
+        return product_id is not None and product_id not in seen_ids
+
+    try:
+        # Trang đầu của mọi luồng được tải song song
+        await asyncio.gather(*(push_next(index) for index in range(len(streams))))
+
+        while heap and len(results) < limit:
+            _, index, _, product = heapq.heappop(heap)
+
+            if is_new(product):
+                seen_ids.add(product.get("id"))
+                if skipped < skip:
+                    skipped += 1
+                else:
+                    results.append(product)
+                    if len(results) >= limit:
+                        # Đủ trang: chỉ đọc tiếp đến sản phẩm mới đầu tiên, bỏ các sản phẩm trùng
+                        # để has_more không tính những sản phẩm sẽ bị loại ở trang sau
+                        await push_next(index)
+                        while heap and not is_new(heap[0][3]):
+                            await push_next(heapq.heappop(heap)[1])
+                        return results, bool(heap), len(seen_ids)
+
+            await push_next(index)
+
+        return results, False, len(seen_ids)
+    finally:
+        for stream in streams:
+            await stream.aclose()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache ngắn hạn cho các kết quả "không tìm thấy" (SKU, Article Number, từ khóa rỗng).
+"""
+
+import time
+import logging
+from typing import Any, Dict, Tuple
+
+from .cache_namespace import COUNTER_HITS, COUNTER_MISSES, StoreNamespacedCache
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+KIND_SKU = "sku"
+KIND_ART_NO = "art_no"
+KIND_SEARCH = "search"
+
+NegativeKey = Tuple[str, str]
+
+
+def empty_products_result() -> Dict[str, Any]:
+    """Kết quả truy vấn sản phẩm rỗng, cùng cấu trúc với kết quả từ API."""
+    return {"success": True, "data": {"products": {"items": [], "total_count": 0}}}
+
+
+class NegativeCache:
+    """
+    Ghi nhớ các định danh đã biết là không có kết quả trong một khoảng thời gian ngắn,
+    khóa theo (loại định danh, định danh) trong namespace của từng mã cửa hàng.
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 5000):
+        """
+        Khởi tạo cache.
+
+        Args:
+            ttl: Thời gian (giây) ghi nhớ một kết quả "không tìm thấy".
+            max_entries: Số entry tối đa trước khi loại bỏ entry cũ nhất.
+        """
+        self.ttl = ttl
+        self._expires: StoreNamespacedCache[float] = StoreNamespacedCache("negative", max_entries)
+        self._saved: Dict[str, int] = {}
+
+    @property
+    def max_entries(self) -> int:
+        return self._expires.max_entries
+
+    @staticmethod
+    def _key(kind: str, identifier: str) -> NegativeKey:
+        return (kind, (identifier or "").strip().lower())
+
+    def is_known_miss(self, kind: str, store_code: str, identifier: str) -> bool:
+        """
+        Kiểm tra định danh đã được ghi nhận là không có kết quả hay chưa.
+        Mỗi lần trả về True được tính là một lần gọi upstream đã tiết kiệm.
+
+        Args:
+            kind: Loại định danh (KIND_SKU, KIND_ART_NO, KIND_SEARCH).
+            store_code: Mã cửa hàng.
+            identifier: SKU, Article Number hoặc từ khóa.
+
+        Returns:
+            bool: True nếu định danh còn trong cache.
+        """
+        key = self._key(kind, identifier)
+        expires = self._expires.get(store_code, key)
+        if expires is not None and time.monotonic() >= expires:
+            self._expires.pop(store_code, key)
+            expires = None
+        if expires is None:
+            self._expires.record(store_code, COUNTER_MISSES)
+            return False
+
+        self._expires.record(store_code, COUNTER_HITS)
+        self._saved[kind] = self._saved.get(kind, 0) + 1
+        logger.debug(f"Bỏ qua truy vấn {kind} '{identifier}': đã biết là không có kết quả")
+        return True
+
+    def record_miss(self, kind: str, store_code: str, identifier: str) -> None:
+        """Ghi nhận định danh không có kết quả."""
+        self._expires.put(store_code, self._key(kind, identifier), time.monotonic() + self.ttl)
+
+    def forget(self, kind: str, store_code: str, identifier: str) -> None:
+        """Xóa ghi nhận của một định danh (ví dụ khi định danh đã có kết quả)."""
+        self._expires.pop(store_code, self._key(kind, identifier))
+
+    def invalidate_store(self, store_code: str) -> int:
+        """Xóa mọi ghi nhận của một cửa hàng, trả về số entry đã xóa."""
+        return self._expires.invalidate_store(store_code)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache."""
+        self._expires.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê số entry và số lần gọi upstream đã tiết kiệm theo loại định danh."""
+        return {
+            "entries": len(self._expires),
+            "saved_calls": dict(self._saved),
+            "total_saved_calls": sum(self._saved.values()),
+            "stores": self._expires.stats()["stores"]
+        }
+
+
+# Cache dùng chung cho toàn bộ process
+_negative_cache = NegativeCache(
+    ttl=Config.NEGATIVE_CACHE_TTL,
+    max_entries=Config.NEGATIVE_CACHE_MAX_ENTRIES
+)
+
+
+def get_negative_cache() -> NegativeCache:
+    """Trả về negative cache dùng chung."""
+    return _negative_cache
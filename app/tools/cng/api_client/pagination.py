@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Iterator bất đồng bộ duyệt sản phẩm qua nhiều trang, tải trước trang kế tiếp.
+"""
+
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PageFetcher = Callable[[int], Awaitable[Dict[str, Any]]]
+
+
+class ProductPageIterator:
+    """
+    Duyệt sản phẩm qua các trang kết quả tìm kiếm.
+
+    Trong khi caller xử lý trang N, trang N+1 (tối đa `read_ahead` trang) đã được tải
+    trước trong nền. Khi dừng sớm, caller phải gọi aclose() hoặc duyệt trong `async with`
+    để hủy các request tải trước đang chạy: với iterator dạng class, break khỏi
+    `async for` không tự đóng iterator.
+
+    Mọi trang được tải trong context (contextvars) lúc tạo iterator, nên iterator tạo qua
+    SessionClientView luôn dùng token và cửa hàng của view, kể cả khi được duyệt sau khi
+    lời gọi qua view đã kết thúc.
+
+    Ví dụ:
+        async with product_api.iter_products("sữa tươi", page_size=20) as products:
+            async for product in products:
+                ...
+    """
+
+    def __init__(
+        self,
+        fetch_page: PageFetcher,
+        page_size: int,
+        start_page: int = 1,
+        max_pages: Optional[int] = None,
+        read_ahead: int = 1
+    ):
+        """
+        Khởi tạo iterator.
+
+        Args:
+            fetch_page: Coroutine function nhận số trang, trả về kết quả dạng
+                {"success": ..., "data": {"products": {...}}}.
+            page_size: Số sản phẩm mỗi trang, dùng để tính tổng số trang.
+            start_page: Trang bắt đầu.
+            max_pages: Số trang tối đa được tải (None: đến hết kết quả).
+            read_ahead: Số trang tối đa được tải trước.
+        """
+        self._fetch_page = fetch_page
+        self._context = contextvars.copy_context()
+        self.page_size = page_size
+        self._next_page = start_page
+        self._last_page = start_page + max_pages - 1 if max_pages else None
+        self._read_ahead = max(read_ahead, 0)
+        self._pending: Deque[asyncio.Task] = deque()
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._exhausted = False
+
+        self.total_count: Optional[int] = None
+        self.total_pages: Optional[int] = None
+        self.pages_fetched = 0
+        self.error: Optional[Dict[str, Any]] = None
+
+    def _can_schedule(self) -> bool:
+        if self._exhausted:
+            return False
+        if self._last_page is not None and self._next_page > self._last_page:
+            return False
+        if self.total_pages is not None and self._next_page > self.total_pages:
+            return False
+        return True
+
+    def _schedule(self, limit: int) -> None:
+        """Đảm bảo có tối đa `limit` trang đang được tải."""
+        while len(self._pending) < limit and self._can_schedule():
+            # Task được tạo trong context đã lưu nên kế thừa trạng thái phiên lúc tạo iterator
+            self._pending.append(self._context.run(self._start_fetch, self._next_page))
+            self._next_page += 1
+
+    def _start_fetch(self, page: int) -> asyncio.Task:
+        return asyncio.ensure_future(self._fetch_page(page))
+
+    async def next_page(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Lấy danh sách sản phẩm của trang kế tiếp.
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Sản phẩm của trang, None nếu đã hết hoặc có lỗi.
+        """
+        # Trang đầu tiên chưa biết tổng số trang nên chỉ tải một trang
+        self._schedule(1 if self.total_pages is None else self._read_ahead + 1)
+        if not self._pending:
+            return None
+
+        task = self._pending.popleft()
+        try:
+            result = await task
+        except Exception as e:
+            logger.error(f"Lỗi khi tải trang sản phẩm: {str(e)}")
+            result = {"success": False, "message": str(e), "code": "PAGINATION_ERROR"}
+
+        if not result.get("success", False):
+            self.error = result
+            await self._stop()
+            return None
+
+        self.pages_fetched += 1
+        products = result.get("data", {}).get("products", {}) or {}
+        items = products.get("items") or []
+
+        if self.total_count is None:
+            self.total_count = products.get("total_count", 0) or 0
+            page_info = products.get("page_info") or {}
+            self.total_pages = page_info.get("total_pages") or (
+                (self.total_count + self.page_size - 1) // self.page_size
+            )
+
+        if not items:
+            await self._stop()
+            return None
+
+        # Tải trước các trang kế tiếp trong khi caller xử lý trang này
+        self._schedule(self._read_ahead)
+        return items
+
+    @property
+    def has_more(self) -> bool:
+        """True nếu iterator có thể còn sản phẩm chưa trả về."""
+        return bool(self._buffer) or bool(self._pending) or self._can_schedule()
+
+    def __aiter__(self) -> "ProductPageIterator":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        while not self._buffer:
+            items = await self.next_page()
+            if items is None:
+                raise StopAsyncIteration
+            self._buffer.extend(items)
+        return self._buffer.popleft()
+
+    async def _stop(self) -> None:
+        self._exhausted = True
+        tasks = list(self._pending)
+        self._pending.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """Dừng duyệt và hủy các request tải trước đang chạy."""
+        self._buffer.clear()
+        await self._stop()
+
+    async def __aenter__(self) -> "ProductPageIterator":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
@@ -6,13 +6,30 @@ API module cho các thao tác liên quan đến sản phẩm
 """
 
 import logging
-import asyncio
 from typing import Dict, Any, Optional, List
 
 from .base import APIClientBase
+from .config import Config
+from .intersection import progressive_intersection
+from .merge import merge_order, merge_product_streams
+from .pagination import ProductPageIterator
+from .product_resolver import resolve_product
+from .search_planner import execute_search_plan
+from .product_cache import FRESH, STALE, get_product_detail_cache
+from .negative_cache import (
+    KIND_ART_NO, KIND_SEARCH, KIND_SKU, empty_products_result, get_negative_cache
+)
 
 logger = logging.getLogger(__name__)
 
+
+def _has_products(result: Dict[str, Any]) -> bool:
+    """Kiểm tra kết quả truy vấn sản phẩm thành công và có ít nhất một sản phẩm."""
+    if not result.get("success", False):
+        return False
+    return bool((result.get("data", {}).get("products", {}) or {}).get("items"))
+
+
 class ProductAPI(APIClientBase):
     """
     API Client cho các thao tác liên quan đến sản phẩm.
@@ -80,11 +97,64 @@ class ProductAPI(APIClientBase):
             "currentPage": current_page
         }
         
-        return await self.execute_graphql(graphql_query, variables, method="GET")
+        # Chỉ trang đầu rỗng mới có nghĩa là từ khóa không có kết quả
+        if current_page != 1:
+            return await self.execute_graphql(graphql_query, variables, method="GET")
+        
+        negative_cache = get_negative_cache()
+        if negative_cache.is_known_miss(KIND_SEARCH, self._store_code, query):
+            return empty_products_result()
+        
+        result = await self.execute_graphql(graphql_query, variables, method="GET")
+        self._remember_miss(KIND_SEARCH, query, result)
+        return result
+    
+    def _remember_miss(self, kind: str, identifier: str, result: Dict[str, Any]) -> None:
+        """
+        Ghi nhận định danh vào negative cache nếu truy vấn thành công nhưng không có sản phẩm.
+        
+        Args:
+            kind: Loại định danh.
+            identifier: SKU, Article Number hoặc từ khóa.
+            result: Kết quả truy vấn.
+        """
+        if result.get("success", False) and not _has_products(result):
+            get_negative_cache().record_miss(kind, self._store_code, identifier)
     
     async def get_product_by_sku(self, sku: str) -> Dict[str, Any]:
         """
-        Lấy thông tin sản phẩm theo SKU.
+        Lấy thông tin sản phẩm theo SKU, ưu tiên cache chi tiết sản phẩm của cửa hàng hiện tại.
+        
+        Args:
+            sku: SKU của sản phẩm.
+            
+        Returns:
+            Dict[str, Any]: Thông tin sản phẩm.
+        """
+        cache = get_product_detail_cache()
+        store_code = self._store_code
+        
+        cached, state = cache.get(store_code, sku)
+        if state == FRESH:
+            return cached
+        if state == STALE:
+            # Trả dữ liệu cũ ngay, làm mới trong nền
+            cache.refresh(store_code, sku, lambda: self._fetch_product_by_sku(sku), _has_products)
+            return cached
+        
+        if get_negative_cache().is_known_miss(KIND_SKU, store_code, sku):
+            return empty_products_result()
+        
+        result = await self._fetch_product_by_sku(sku)
+        if _has_products(result):
+            cache.put(store_code, sku, result)
+        else:
+            self._remember_miss(KIND_SKU, sku, result)
+        return result
+    
+    async def _fetch_product_by_sku(self, sku: str) -> Dict[str, Any]:
+        """
+        Truy vấn thông tin sản phẩm theo SKU từ API (không qua cache).
         
         Args:
             sku: SKU của sản phẩm.
@@ -209,7 +279,12 @@ class ProductAPI(APIClientBase):
             "artNo": art_no
         }
         
-        return await self.execute_graphql(graphql_query, variables, method="GET")
+        if get_negative_cache().is_known_miss(KIND_ART_NO, self._store_code, art_no):
+            return empty_products_result()
+        
+        result = await self.execute_graphql(graphql_query, variables, method="GET")
+        self._remember_miss(KIND_ART_NO, art_no, result)
+        return result
     
     async def suggest_products(
         self,
@@ -349,6 +424,85 @@ class ProductAPI(APIClientBase):
                 "code": "SUGGESTION_ERROR"
             }
             
+    async def resolve_product(self, product_id: str, parallel: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Lấy thông tin sản phẩm từ định danh có thể là ID, SKU hoặc Article Number.
+        
+        Args:
+            product_id: Định danh sản phẩm.
+            parallel: Tra cứu song song hay tuần tự (mặc định theo cấu hình).
+            
+        Returns:
+            Dict[str, Any]: Thông tin sản phẩm.
+        """
+        return await resolve_product(self, product_id, parallel)
+    
+    async def planned_search(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[Dict[str, str]] = None,
+        page_size: int = 10,
+        current_page: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Tìm kiếm sản phẩm, gọi song song các cách tìm kiếm phù hợp với dạng truy vấn.
+        
+        Args:
+            query: Từ khóa tìm kiếm.
+            filters: Bộ lọc.
+            sort: Tiêu chí sắp xếp.
+            page_size: Số lượng sản phẩm trên mỗi trang.
+            current_page: Trang hiện tại.
+            
+        Returns:
+            Dict[str, Any]: Kết quả tìm kiếm, kèm tên cách tìm kiếm ở data["strategy"].
+        """
+        return await execute_search_plan(self, query, filters, sort, page_size, current_page)
+    
+    def iter_products(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[Dict[str, str]] = None,
+        page_size: int = 20,
+        start_page: int = 1,
+        max_pages: Optional[int] = None,
+        read_ahead: int = 1
+    ) -> ProductPageIterator:
+        """
+        Duyệt sản phẩm qua nhiều trang, tải trước trang kế tiếp trong khi caller xử lý trang hiện tại.
+        
+        Dùng iterator trong `async with` (hoặc gọi aclose()) để hủy các trang đang tải trước
+        khi dừng sớm.
+        
+        Args:
+            query: Từ khóa tìm kiếm.
+            filters: Các bộ lọc (tùy chọn). Có bộ lọc hoặc sắp xếp thì dùng suggest_products.
+            sort: Tiêu chí sắp xếp (tùy chọn).
+            page_size: Số lượng sản phẩm trên mỗi trang.
+            start_page: Trang bắt đầu.
+            max_pages: Số trang tối đa được tải (None: đến hết kết quả).
+            read_ahead: Số trang tối đa được tải trước.
+            
+        Returns:
+            ProductPageIterator: Async iterator trả về từng sản phẩm.
+        """
+        if filters or sort:
+            async def fetch_page(page: int) -> Dict[str, Any]:
+                return await self.suggest_products(query, filters, sort, page_size, page)
+        else:
+            async def fetch_page(page: int) -> Dict[str, Any]:
+                return await self.search_products(query, page_size, page)
+        
+        return ProductPageIterator(
+            fetch_page,
+            page_size=page_size,
+            start_page=start_page,
+            max_pages=max_pages,
+            read_ahead=read_ahead
+        )
+    
     async def search_multiple_products(
         self,
         keywords: List[str],
@@ -372,79 +526,62 @@ class ProductAPI(APIClientBase):
         Returns:
             Dict[str, Any]: Kết quả tìm kiếm gộp lại.
         """
-        results = []
-        total_count = 0
-        seen_ids = set()
-        
         try:
-            # Tìm kiếm song song cho tất cả từ khóa
-            search_tasks = []
-            for keyword in keywords:
-                task = asyncio.create_task(
-                    self.suggest_products(
-                        base_query=keyword,
+            # Xử lý kết quả theo combine_mode
+            if combine_mode == "intersection":
+                # Duyệt dần từ khóa chọn lọc nhất, kiểm tra với các từ khóa còn lại theo lô SKU
+                # và dừng khi đủ số sản phẩm chung cho trang được yêu cầu
+                skip = (current_page - 1) * page_size
+                intersection = await progressive_intersection(
+                    self,
+                    keywords,
+                    filters=filters,
+                    sort=sort,
+                    skip=skip,
+                    limit=page_size,
+                    page_size=page_size,
+                    max_pages=Config.INTERSECTION_MAX_PAGES
+                )
+                if not intersection.get("success", False):
+                    return intersection
+                
+                paged_results = intersection["items"]
+                upstream_calls = intersection["upstream_calls"]
+                if intersection["has_more"]:
+                    total_count = max(intersection["matched"], skip + len(paged_results) + 1)
+                else:
+                    total_count = intersection["matched"]
+            else:  # union mode
+                # Gộp dần các luồng kết quả đã xếp hạng của từng từ khóa bằng heap, loại trùng
+                # ngay khi gộp và dừng khi đủ trang được yêu cầu
+                skip = (current_page - 1) * page_size
+                streams = [
+                    self.iter_products(
+                        keyword,
                         filters=filters,
                         sort=sort,
                         page_size=page_size,
-                        current_page=current_page
+                        # Trang 1 chỉ cần trang đầu của mỗi từ khóa nên không tải trước
+                        read_ahead=1 if current_page > 1 else 0
                     )
+                    for keyword in keywords
+                ]
+                paged_results, has_more, unique_seen = await merge_product_streams(
+                    streams,
+                    order=merge_order(sort),
+                    skip=skip,
+                    limit=page_size
                 )
-                search_tasks.append(task)
-            
-            # Chờ tất cả tìm kiếm hoàn thành
-            search_results = await asyncio.gather(*search_tasks)
-            
-            # Xử lý kết quả theo combine_mode
-            if combine_mode == "intersection":
-                # Chỉ giữ lại sản phẩm xuất hiện trong TẤT CẢ từ khóa
-                product_sets = []
-                for result in search_results:
-                    if result.get("success", False):
-                        products = result.get("data", {}).get("products", {})
-                        items = products.get("items", [])
-                        product_ids = {item["id"] for item in items}
-                        product_sets.append(product_ids)
                 
-                if product_sets:
-                    common_ids = set.intersection(*product_sets)
-                    # Lấy thông tin sản phẩm từ ID chung
-                    for result in search_results:
-                        if result.get("success", False):
-                            products = result.get("data", {}).get("products", {})
-                            items = products.get("items", [])
-                            for item in items:
-                                if item["id"] in common_ids and item["id"] not in seen_ids:
-                                    results.append(item)
-                                    seen_ids.add(item["id"])
-                                    total_count += 1
-            else:  # union mode
-                # Gộp tất cả sản phẩm, loại bỏ trùng lặp
-                for result in search_results:
-                    if result.get("success", False):
-                        products = result.get("data", {}).get("products", {})
-                        items = products.get("items", [])
-                        for item in items:
-                            if item["id"] not in seen_ids:
-                                results.append(item)
-                                seen_ids.add(item["id"])
-                                total_count += 1
-            
-            # Sắp xếp kết quả cuối cùng nếu cần
-            if sort:
-                results.sort(
-                    key=lambda x: (
-                        x.get("price", {}).get("regularPrice", {}).get("amount", {}).get("value", 0)
-                        if sort.get("price") == "ASC"
-                        else -x.get("price", {}).get("regularPrice", {}).get("amount", {}).get("value", 0)
-                        if sort.get("price") == "DESC"
-                        else 0
+                if has_more:
+                    # Ước lượng: tổng của các từ khóa là cận trên của số sản phẩm khác nhau
+                    total_count = max(
+                        sum(stream.total_count or 0 for stream in streams),
+                        skip + len(paged_results) + 1
                     )
-                )
-            
-            # Phân trang kết quả
-            start_idx = (current_page - 1) * page_size
-            end_idx = start_idx + page_size
-            paged_results = results[start_idx:end_idx]
+                else:
+                    total_count = unique_seen
+                upstream_calls = sum(stream.pages_fetched for stream in streams)
             
             return {
                 "success": True,
@@ -457,7 +594,8 @@ class ProductAPI(APIClientBase):
                             "current_page": current_page,
                             "total_pages": (total_count + page_size - 1) // page_size
                         }
-                    }
+                    },
+                    "upstream_calls": upstream_calls
                 },
                 "message": f"Tìm thấy {total_count} sản phẩm phù hợp"
             }
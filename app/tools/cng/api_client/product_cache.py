@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cache chi tiết sản phẩm theo SKU với cơ chế stale-while-revalidate.
+"""
+
+import asyncio
+import copy
+import time
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from .cache_namespace import COUNTER_HITS, COUNTER_MISSES, StoreNamespacedCache
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+CacheKey = Tuple[str, str]
+
+
+class _DetailEntry:
+    """Một kết quả chi tiết sản phẩm đã cache."""
+
+    __slots__ = ("value", "fresh_until", "stale_until")
+
+    def __init__(self, value: Dict[str, Any], fresh_until: float, stale_until: float):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ProductDetailCache:
+    """
+    Cache chi tiết sản phẩm, khóa theo SKU trong namespace của từng mã cửa hàng.
+
+    Trong TTL entry được trả về ngay. Sau TTL nhưng còn trong khoảng grace, entry cũ vẫn
+    được trả về trong khi một tác vụ nền tải lại dữ liệu mới. Dữ liệu luôn được sao chép
+    khi đọc và ghi để caller không thể sửa entry dùng chung.
+    """
+
+    def __init__(self, ttl: float = 300, grace: float = 600, max_entries: int = 2000):
+        """
+        Khởi tạo cache.
+
+        Args:
+            ttl: Thời gian (giây) entry được xem là còn mới.
+            grace: Thời gian (giây) sau TTL mà entry cũ vẫn được trả về trong lúc làm mới.
+            max_entries: Số entry tối đa trước khi loại bỏ entry ít dùng nhất.
+        """
+        self.ttl = ttl
+        self.grace = grace
+        self._entries: StoreNamespacedCache[_DetailEntry] = StoreNamespacedCache("product_detail", max_entries)
+        self._refreshing: Set[CacheKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def max_entries(self) -> int:
+        return self._entries.max_entries
+
+    @property
+    def hits(self) -> int:
+        return self._entries.total("fresh_hits")
+
+    @property
+    def stale_hits(self) -> int:
+        return self._entries.total("stale_hits")
+
+    @property
+    def misses(self) -> int:
+        return self._entries.total(COUNTER_MISSES)
+
+    def get(self, store_code: str, sku: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Tra cứu chi tiết sản phẩm.
+
+        Args:
+            store_code: Mã cửa hàng.
+            sku: SKU của sản phẩm.
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], str]: (bản sao kết quả hoặc None, FRESH/STALE/MISS).
+        """
+        entry = self._entries.get(store_code, sku)
+        now = time.monotonic()
+
+        if entry is None or now >= entry.stale_until:
+            if entry is not None:
+                self._entries.pop(store_code, sku)
+            self._entries.record(store_code, COUNTER_MISSES)
+            return None, MISS
+
+        # Cả entry mới lẫn entry cũ đều tránh được một lượt gọi chờ API
+        self._entries.record(store_code, COUNTER_HITS)
+        if now < entry.fresh_until:
+            self._entries.record(store_code, "fresh_hits")
+            return copy.deepcopy(entry.value), FRESH
+
+        self._entries.record(store_code, "stale_hits")
+        return copy.deepcopy(entry.value), STALE
+
+    def put(self, store_code: str, sku: str, value: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """
+        Lưu chi tiết sản phẩm.
+
+        Args:
+            store_code: Mã cửa hàng.
+            sku: SKU của sản phẩm.
+            value: Kết quả cần lưu.
+            ttl: TTL riêng cho entry này (mặc định dùng TTL của cache).
+        """
+        now = time.monotonic()
+        fresh_until = now + (self.ttl if ttl is None else ttl)
+        self._entries.put(store_code, sku, _DetailEntry(copy.deepcopy(value), fresh_until, fresh_until + self.grace))
+
+    def refresh(
+        self,
+        store_code: str,
+        sku: str,
+        loader: Callable[[], Awaitable[Dict[str, Any]]],
+        is_cacheable: Callable[[Dict[str, Any]], bool]
+    ) -> None:
+        """
+        Làm mới entry trong nền; mỗi khóa chỉ có tối đa một tác vụ làm mới cùng lúc.
+
+        Args:
+            store_code: Mã cửa hàng.
+            sku: SKU của sản phẩm.
+            loader: Coroutine function tải lại dữ liệu.
+            is_cacheable: Hàm kiểm tra kết quả tải lại có nên được lưu hay không.
+        """
+        key = (store_code or "", sku)
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def _run() -> None:
+            try:
+                result = await loader()
+                if is_cacheable(result):
+                    self.put(store_code, sku, result)
+            except Exception as e:
+                logger.warning(f"Lỗi khi làm mới cache sản phẩm {sku}: {str(e)}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.ensure_future(_run())
+        # Giữ tham chiếu tới task để không bị garbage collect giữa chừng
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def invalidate(self, store_code: str, sku: str) -> None:
+        """Xóa một entry khỏi cache."""
+        self._entries.pop(store_code, sku)
+
+    def invalidate_store(self, store_code: str) -> int:
+        """Xóa mọi entry của một cửa hàng, trả về số entry đã xóa."""
+        return self._entries.invalidate_store(store_code)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hoạt động của cache, tổng và theo từng cửa hàng."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshing),
+            "stores": self._entries.stats()["stores"]
+        }
+
+
+# Cache dùng chung cho toàn bộ process
+_product_detail_cache = ProductDetailCache(
+    ttl=Config.PRODUCT_CACHE_TTL,
+    grace=Config.PRODUCT_CACHE_GRACE,
+    max_entries=Config.PRODUCT_CACHE_MAX_ENTRIES
+)
+
+
+def get_product_detail_cache() -> ProductDetailCache:
+    """Trả về cache chi tiết sản phẩm dùng chung."""
+    return _product_detail_cache
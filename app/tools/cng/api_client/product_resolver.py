@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Xác định sản phẩm từ một định danh chưa rõ loại (ID, SKU hoặc Article Number).
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+Strategy = Tuple[str, Callable[[], Awaitable[Dict[str, Any]]]]
+
+
+def _first_item(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not result.get("success", False):
+        return None
+    items = (result.get("data", {}).get("products", {}) or {}).get("items") or []
+    return items[0] if items else None
+
+
+def is_unambiguous_sku(product_id: str) -> bool:
+    """
+    Kiểm tra định danh có dạng chắc chắn là SKU hay không.
+
+    Args:
+        product_id: Định danh sản phẩm.
+
+    Returns:
+        bool: True nếu định danh có dạng SKU (ví dụ "415883_24158831" hoặc bắt đầu bằng "p").
+    """
+    return "_" in product_id or product_id.startswith("p")
+
+
+def _strategies(product_api: Any, product_id: str) -> List[Strategy]:
+    """Các cách tra cứu theo thứ tự ưu tiên."""
+    if is_unambiguous_sku(product_id):
+        return [("sku", lambda: product_api.get_product_by_sku(product_id))]
+
+    async def by_id() -> Dict[str, Any]:
+        # Tìm theo ID để lấy SKU, sau đó lấy chi tiết theo SKU
+        result = await product_api.suggest_products("", {"id": {"eq": product_id}}, None, 1, 1)
+        item = _first_item(result)
+        if item is None or not item.get("sku"):
+            return result
+        return await product_api.get_product_by_sku(item["sku"])
+
+    return [
+        ("id", by_id),
+        ("sku", lambda: product_api.get_product_by_sku(product_id)),
+        ("art_no", lambda: product_api.get_product_by_art_no(product_id)),
+    ]
+
+
+async def _resolve_sequential(strategies: List[Strategy]) -> Tuple[str, Dict[str, Any]]:
+    result: Dict[str, Any] = {}
+    name = ""
+    for name, run in strategies:
+        result = await run()
+        if _first_item(result) is not None:
+            break
+    return name, result
+
+
+async def _resolve_parallel(strategies: List[Strategy]) -> Tuple[str, Dict[str, Any]]:
+    tasks = [asyncio.ensure_future(run()) for _, run in strategies]
+    result: Dict[str, Any] = {}
+    name = ""
+    try:
+        # Đọc kết quả theo thứ tự ưu tiên: kết quả của một cách tra cứu chỉ được chấp nhận
+        # khi mọi cách ưu tiên hơn đã kết thúc mà không tìm thấy, nên kết quả luôn giống
+        # cách tra cứu tuần tự trong khi độ trễ chỉ còn khoảng một lượt gọi API
+        for (name, _), task in zip(strategies, tasks):
+            try:
+                result = await task
+            except Exception as e:
+                logger.warning(f"Lỗi khi tra cứu sản phẩm theo {name}: {str(e)}")
+                result = {"success": False, "message": str(e), "code": "UNKNOWN_ERROR"}
+            if _first_item(result) is not None:
+                break
+    finally:
+        # Hủy các cách tra cứu còn lại
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    return name, result
+
+
+async def resolve_product(
+    product_api: Any,
+    product_id: str,
+    parallel: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Lấy thông tin sản phẩm từ một định danh có thể là ID, SKU hoặc Article Number.
+
+    Định danh có dạng SKU rõ ràng chỉ được tra cứu theo SKU. Các định danh khác được thử
+    theo ID, SKU rồi Article Number; ở chế độ song song, cả ba được gọi cùng lúc và các
+    lượt gọi không cần thiết bị hủy ngay khi có kết quả.
+
+    Args:
+        product_api: ProductAPI dùng để tra cứu.
+        product_id: Định danh sản phẩm.
+        parallel: Tra cứu song song hay tuần tự (mặc định theo Config.DETAIL_RESOLVE_PARALLEL).
+
+    Returns:
+        Dict[str, Any]: Kết quả của cách tra cứu tìm thấy sản phẩm, hoặc kết quả của cách
+            cuối cùng nếu không tìm thấy.
+    """
+    strategies = _strategies(product_api, product_id)
+    if parallel is None:
+        parallel = Config.DETAIL_RESOLVE_PARALLEL
+
+    if parallel and len(strategies) > 1:
+        name, result = await _resolve_parallel(strategies)
+    else:
+        name, result = await _resolve_sequential(strategies)
+
+    if _first_item(result) is not None:
+        logger.debug(f"Đã xác định sản phẩm {product_id} theo {name}")
+    return result
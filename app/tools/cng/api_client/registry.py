@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registry quản lý connection pool (aiohttp.ClientSession) theo từng event loop.
+
+Một ClientSession chỉ dùng được trên event loop đã tạo ra nó. Thay vì để client tự giữ
+session và tự tạo event loop mới khi loop cũ đóng, registry cấp session theo loop đang
+chạy: mọi client trên cùng một loop dùng chung pool, loop khác nhận pool riêng. Registry
+không bao giờ tạo event loop.
+
+Pool được đóng trên chính loop của nó khi loop tắt (asyncio.run, uvicorn... gọi
+shutdown_asyncgens trước khi đóng loop). Pool của loop bị đóng mà không qua bước đó chỉ
+bị bỏ tham chiếu ở lần truy cập sau vì không thể await trên loop đã đóng; các kết nối được
+giải phóng khi connector bị thu hồi.
+"""
+
+import logging
+import threading
+import weakref
+import asyncio
+from typing import AsyncGenerator, Callable, Dict, Hashable, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class LoopSessionRegistry:
+    """
+    Cấp và dọn dẹp ClientSession theo (event loop, khóa pool).
+    """
+
+    def __init__(self):
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, aiohttp.ClientSession]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Async generator theo loop, đóng các pool của loop khi loop chạy shutdown_asyncgens
+        self._shutdown_guards: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGenerator[None, None]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        # Các loop có thể chạy trên nhiều thread khác nhau
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[aiohttp.ClientSession]:
+        """
+        Lấy session còn mở của loop đang chạy.
+
+        Args:
+            key: Khóa của pool.
+
+        Returns:
+            Optional[aiohttp.ClientSession]: Session, None nếu chưa có hoặc đã đóng.
+        """
+        loop = asyncio.get_running_loop()
+        self._purge_closed_loops()
+        with self._lock:
+            session = self._pools.get(loop, {}).get(key)
+        if session is None or session.closed:
+            return None
+        return session
+
+    def put(self, key: Hashable, session: aiohttp.ClientSession) -> aiohttp.ClientSession:
+        """
+        Đăng ký session cho loop đang chạy.
+
+        Args:
+            key: Khóa của pool.
+            session: Session vừa tạo trên loop đang chạy.
+
+        Returns:
+            aiohttp.ClientSession: Session được dùng cho khóa này; nếu đã có session khác còn
+                mở (tạo song song), session đó được giữ lại và caller cần đóng session của mình.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pools = self._pools.setdefault(loop, {})
+            existing = pools.get(key)
+            if existing is not None and not existing.closed:
+                return existing
+            pools[key] = session
+            install_guard = loop not in self._shutdown_guards
+            if install_guard:
+                self._shutdown_guards[loop] = self._close_on_shutdown(loop)
+        if install_guard:
+            self._start_guard(self._shutdown_guards[loop])
+        return session
+
+    def get_or_create(self, key: Hashable, create: Callable[[], aiohttp.ClientSession]) -> aiohttp.ClientSession:
+        """
+        Lấy session của loop đang chạy, tạo mới bằng `create` nếu chưa có.
+
+        Args:
+            key: Khóa của pool.
+            create: Hàm tạo session (được gọi trên loop đang chạy).
+
+        Returns:
+            aiohttp.ClientSession: Session của loop đang chạy.
+        """
+        session = self.get(key)
+        if session is None:
+            session = self.put(key, create())
+        return session
+
+    async def close(self, key: Hashable) -> None:
+        """Đóng pool có khóa `key` của loop đang chạy."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._pools.get(loop, {}).pop(key, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def close_loop(self) -> None:
+        """Đóng mọi pool của loop đang chạy; nên gọi trước khi đóng loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sessions = list(self._pools.pop(loop, {}).values())
+        for session in sessions:
+            if not session.closed:
+                try:
+                    await session.close()
+                except Exception as e:
+                    logger.warning(f"Lỗi khi đóng session: {str(e)}")
+
+    async def _close_on_shutdown(self, loop: asyncio.AbstractEventLoop) -> AsyncGenerator[None, None]:
+        """Dừng ở yield đến khi loop đóng các async generator, rồi đóng pool của loop."""
+        try:
+            yield
+        finally:
+            # Guard của loop đã đóng được kết thúc đồng bộ khi dọn dẹp, không await được nữa
+            if not loop.is_closed():
+                await self.close_loop()
+
+    @staticmethod
+    def _start_guard(guard: AsyncGenerator[None, None]) -> None:
+        """
+        Chạy guard đến yield đầu tiên trên loop đang chạy.
+
+        Lần lặp đầu tiên đăng ký generator với loop (sys.set_asyncgen_hooks), nên
+        loop.shutdown_asyncgens() sẽ gọi aclose() và chạy khối finally trên chính loop đó.
+        """
+        _drive(guard.__anext__())
+
+    @staticmethod
+    def _finish_guard(guard: AsyncGenerator[None, None]) -> None:
+        """Kết thúc guard của loop đã đóng để nó không được finalize trên loop đó."""
+        _drive(guard.aclose())
+
+    def stats(self) -> Dict[str, int]:
+        """Số loop và số session đang được quản lý."""
+        with self._lock:
+            return {
+                "loops": len(self._pools),
+                "sessions": sum(len(pools) for pools in self._pools.values())
+            }
+
+    def _purge_closed_loops(self) -> None:
+        """Bỏ các pool thuộc loop đã đóng (không thể await trên loop đó nữa)."""
+        with self._lock:
+            loops = set(self._pools.keys()) | set(self._shutdown_guards.keys())
+            closed = [loop for loop in loops if loop.is_closed()]
+            abandoned = [session for loop in closed for session in self._pools.pop(loop, {}).values()]
+            guards = [self._shutdown_guards.pop(loop) for loop in closed if loop in self._shutdown_guards]
+        for guard in guards:
+            self._finish_guard(guard)
+        for session in abandoned:
+            self._abandon(session)
+
+    @staticmethod
+    def _abandon(session: aiohttp.ClientSession) -> None:
+        """
+        Bỏ session của loop đã đóng.
+
+        Không thể await session.close() trên loop đó nữa, nên session chỉ được tách khỏi
+        connector và bỏ tham chiếu; socket được đóng khi connector và transport bị thu hồi.
+        Loop tắt đúng cách (shutdown_asyncgens) thì pool đã được đóng bởi guard.
+        """
+        if session.closed:
+            return
+        session.detach()
+        logger.warning("Event loop đã đóng khi pool còn mở, hãy gọi close_loop() trước khi đóng loop")
+
+
+def _drive(step) -> None:
+    """Chạy một bước của async generator không await gì cho đến khi bước đó kết thúc."""
+    try:
+        step.send(None)
+    except StopIteration:
+        pass
+
+
+# Registry dùng chung cho toàn bộ process
+_registry = LoopSessionRegistry()
+
+
+def get_loop_registry() -> LoopSessionRegistry:
+    """Trả về registry session dùng chung."""
+    return _registry
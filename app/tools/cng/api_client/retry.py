@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Chính sách retry tập trung cho các truy vấn GraphQL.
+
+Lỗi được phân loại thành tạm thời (timeout, 5xx, mất kết nối) hoặc vĩnh viễn
+(lỗi validate GraphQL, 4xx). Chỉ lỗi tạm thời được thử lại, với backoff có jitter,
+và mọi lần thử lại đều phải rút từ một ngân sách retry dùng chung cho cả process
+để tránh khuếch đại sự cố của upstream.
+"""
+
+import random
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# Mã lỗi được sinh ra bởi APIClientBase.execute_graphql/_process_response
+TRANSIENT_CODES = {"TIMEOUT", "CONNECTION_ERROR", "CONNECTION_RESET", "HTTP_408", "HTTP_429"}
+
+# Lỗi có thể thử lại an toàn cho mutation: request chưa được server xử lý
+MUTATION_SAFE_CODES = {"CONNECTION_ERROR", "HTTP_429", "HTTP_503"}
+
+
+def classify_error(result: Dict[str, Any]) -> Optional[str]:
+    """
+    Phân loại kết quả của execute_graphql.
+
+    Args:
+        result: Kết quả dạng dict từ execute_graphql.
+
+    Returns:
+        Optional[str]: None nếu thành công, TRANSIENT hoặc PERMANENT nếu có lỗi.
+    """
+    if result.get("success", False):
+        return None
+
+    code = str(result.get("code", ""))
+    if code in TRANSIENT_CODES:
+        return TRANSIENT
+    if code.startswith("HTTP_") and code[5:].isdigit() and int(code[5:]) >= 500:
+        return TRANSIENT
+    return PERMANENT
+
+
+class RetryBudget:
+    """
+    Ngân sách retry dạng token bucket dùng chung cho cả process.
+
+    Mỗi request nạp thêm `ratio` token, mỗi lần retry tiêu 1 token. Ngoài ra bucket
+    được nạp đều `min_per_second` token mỗi giây để lưu lượng thấp vẫn có thể retry.
+    Khi upstream gặp sự cố, ngân sách cạn nhanh và các request thất bại ngay thay vì
+    nhân số lượng request lên nhiều lần.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 20.0):
+        """
+        Khởi tạo ngân sách retry.
+
+        Args:
+            ratio: Số token được nạp cho mỗi request.
+            min_per_second: Số token được nạp mỗi giây.
+            max_tokens: Số token tối đa trong bucket.
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.denied = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.max_tokens, self._tokens + elapsed * self.min_per_second)
+
+    def record_request(self) -> None:
+        """Ghi nhận một request mới (không tính các lần retry)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        """
+        Rút một token cho lần retry.
+
+        Returns:
+            bool: True nếu còn ngân sách.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.granted += 1
+                return True
+            self.denied += 1
+            return False
+
+    def stats(self) -> Dict[str, float]:
+        """Thống kê ngân sách retry."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "tokens": round(self._tokens, 2),
+                "granted": self.granted,
+                "denied": self.denied
+            }
+
+
+class RetryPolicy:
+    """
+    Quyết định có thử lại một truy vấn hay không và chờ bao lâu.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 10.0,
+        budget: Optional[RetryBudget] = None
+    ):
+        """
+        Khởi tạo chính sách retry.
+
+        Args:
+            max_attempts: Tổng số lần thực hiện tối đa (tính cả lần đầu).
+            base_delay: Thời gian chờ cơ sở (giây).
+            max_delay: Thời gian chờ tối đa (giây).
+            budget: Ngân sách retry dùng chung.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    def should_retry(self, result: Dict[str, Any], attempt: int, idempotent: bool = True) -> bool:
+        """
+        Kiểm tra có nên thử lại sau một lần thực hiện thất bại.
+
+        Args:
+            result: Kết quả của lần thực hiện vừa xong.
+            attempt: Số thứ tự lần thực hiện vừa xong (bắt đầu từ 0).
+            idempotent: False với mutation - chỉ thử lại khi chắc chắn request chưa được xử lý.
+
+        Returns:
+            bool: True nếu nên thử lại.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if classify_error(result) != TRANSIENT:
+            return False
+        if not idempotent and result.get("code") not in MUTATION_SAFE_CODES:
+            return False
+        if not self.budget.try_acquire():
+            logger.warning("Đã hết ngân sách retry, bỏ qua việc thử lại")
+            return False
+        return True
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Tính thời gian chờ theo exponential backoff với full jitter.
+
+        Args:
+            attempt: Số thứ tự lần thực hiện vừa xong (bắt đầu từ 0).
+
+        Returns:
+            float: Thời gian chờ (giây).
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+# Chính sách dùng chung cho toàn bộ process
+_retry_policy = RetryPolicy(
+    max_attempts=Config.MAX_RETRY_ATTEMPTS,
+    base_delay=Config.RETRY_DELAY,
+    max_delay=Config.RETRY_MAX_DELAY,
+    budget=RetryBudget(
+        ratio=Config.RETRY_BUDGET_RATIO,
+        min_per_second=Config.RETRY_BUDGET_MIN_PER_SECOND
+    )
+)
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Trả về chính sách retry dùng chung."""
+    return _retry_policy
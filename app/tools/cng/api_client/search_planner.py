@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Lập kế hoạch và thực thi tìm kiếm sản phẩm theo nhiều cách (strategy) song song.
+
+Dựa vào dạng truy vấn, planner chọn các cách tìm kiếm có khả năng cho kết quả và gọi
+chúng cùng lúc; các cách còn lại chỉ được dùng làm phương án dự phòng khi tất cả đều lỗi.
+Kết quả được chọn theo thứ tự ưu tiên cố định nên luôn xác định (deterministic).
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_SIMPLE = "simple"
+STRATEGY_SUGGEST = "suggest"
+STRATEGY_ART_NO = "art_no"
+
+_ALL_STRATEGIES = (STRATEGY_SIMPLE, STRATEGY_SUGGEST, STRATEGY_ART_NO)
+
+
+def _has_items(result: Dict[str, Any]) -> bool:
+    if not result.get("success", False):
+        return False
+    return bool((result.get("data", {}).get("products", {}) or {}).get("items"))
+
+
+def plan_search(
+    query: str,
+    filters: Optional[Dict[str, Any]] = None,
+    sort: Optional[Dict[str, str]] = None
+) -> Tuple[List[str], List[str]]:
+    """
+    Chọn các cách tìm kiếm cho một truy vấn.
+
+    Args:
+        query: Từ khóa tìm kiếm.
+        filters: Bộ lọc.
+        sort: Tiêu chí sắp xếp.
+
+    Returns:
+        Tuple[List[str], List[str]]: (các cách gọi song song theo thứ tự ưu tiên,
+            các cách dự phòng gọi tuần tự khi tất cả cách trên đều lỗi).
+    """
+    if query.strip().isdigit():
+        # Chuỗi toàn chữ số nhiều khả năng là Article Number
+        planned = [STRATEGY_ART_NO, STRATEGY_SIMPLE]
+    elif filters or sort:
+        # Chỉ suggest_products áp dụng được bộ lọc và sắp xếp
+        planned = [STRATEGY_SUGGEST, STRATEGY_SIMPLE]
+    else:
+        planned = [STRATEGY_SIMPLE]
+
+    fallbacks = [name for name in _ALL_STRATEGIES if name not in planned]
+    return planned, fallbacks
+
+
+async def execute_search_plan(
+    product_api: Any,
+    query: str,
+    filters: Optional[Dict[str, Any]] = None,
+    sort: Optional[Dict[str, str]] = None,
+    page_size: int = 10,
+    current_page: int = 1
+) -> Dict[str, Any]:
+    """
+    Tìm kiếm sản phẩm theo kế hoạch của plan_search.
+
+    Quy tắc chọn kết quả: cách đầu tiên (theo thứ tự ưu tiên) có sản phẩm; nếu không cách
+    nào có sản phẩm thì lấy cách đầu tiên thành công; nếu tất cả đều lỗi thì trả về lỗi
+    của cách ưu tiên nhất.
+
+    Args:
+        product_api: ProductAPI dùng để tìm kiếm.
+        query: Từ khóa tìm kiếm.
+        filters: Bộ lọc.
+        sort: Tiêu chí sắp xếp.
+        page_size: Số sản phẩm mỗi trang.
+        current_page: Trang hiện tại.
+
+    Returns:
+        Dict[str, Any]: Kết quả được chọn, tên cách tìm kiếm nằm ở data["strategy"].
+    """
+    runners: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {
+        STRATEGY_SIMPLE: lambda: product_api.search_products(query, page_size, current_page),
+        STRATEGY_SUGGEST: lambda: product_api.suggest_products(
+            query, filters or {}, sort, page_size, current_page
+        ),
+        STRATEGY_ART_NO: lambda: product_api.get_product_by_art_no(query),
+    }
+    planned, fallbacks = plan_search(query, filters, sort)
+
+    results: List[Tuple[str, Dict[str, Any]]] = []
+    tasks = [asyncio.ensure_future(runners[name]()) for name in planned]
+    try:
+        # Đọc kết quả theo thứ tự ưu tiên, hủy các cách còn lại ngay khi có sản phẩm
+        for name, task in zip(planned, tasks):
+            result = await _settle(name, task)
+            results.append((name, result))
+            if _has_items(result):
+                break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    if not any(result.get("success", False) for _, result in results):
+        for name in fallbacks:
+            logger.info(f"Các cách tìm kiếm {planned} đều lỗi, thử {name}")
+            result = await _settle(name, asyncio.ensure_future(runners[name]()))
+            results.append((name, result))
+            if result.get("success", False):
+                break
+
+    name, chosen = _choose(results)
+    logger.debug(f"Tìm kiếm '{query}': dùng kết quả của {name}")
+    if chosen.get("success", False):
+        chosen = {**chosen, "data": {**(chosen.get("data") or {}), "strategy": name}}
+    return chosen
+
+
+async def _settle(name: str, task: "asyncio.Future[Dict[str, Any]]") -> Dict[str, Any]:
+    try:
+        return await task
+    except Exception as e:
+        logger.warning(f"Lỗi khi tìm kiếm theo {name}: {str(e)}")
+        return {"success": False, "message": str(e), "code": "UNKNOWN_ERROR"}
+
+
+def _choose(results: List[Tuple[str, Dict[str, Any]]]) -> Tuple[str, Dict[str, Any]]:
+    for name, result in results:
+        if _has_items(result):
+            return name, result
+    for name, result in results:
+        if result.get("success", False):
+            return name, result
+    return results[0]
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+View API client theo phiên người dùng trên một client dùng chung.
+
+Mỗi view chỉ giữ token, mã cửa hàng và cart_id của một phiên (vài trăm byte). Khi gọi
+phương thức qua view, view được gắn vào context hiện tại (contextvars) và các thuộc tính
+_auth_token/_store_code/_cart_id của mọi API client đọc/ghi vào view thay vì vào client.
+Nhờ vậy nhiều phiên chạy đồng thời trên cùng một client và cùng connection pool mà không
+ghi đè trạng thái của nhau. Task được tạo trong lúc gọi (ví dụ làm mới cache, làm mới
+token) kế thừa context nên cũng dùng trạng thái của view.
+"""
+
+import contextvars
+import functools
+import inspect
+from typing import Any, Optional
+
+from .config import Config
+
+_current_view: "contextvars.ContextVar[Optional[SessionClientView]]" = contextvars.ContextVar(
+    "mm_session_client_view", default=None
+)
+
+
+def get_current_view() -> Optional["SessionClientView"]:
+    """Trả về view đang được gắn vào context hiện tại, None nếu không có."""
+    return _current_view.get()
+
+
+class SessionClientView:
+    """
+    Trạng thái của một phiên người dùng, gọi API qua client dùng chung.
+
+    Ví dụ:
+        view = APIClientFactory().session_view(store_code="b2c_10010_vi")
+        await view.login_with_mcard(...)      # token được lưu vào view
+        await view.add_to_cart(product_id="...")
+    """
+
+    __slots__ = ("_client", "auth_token", "store_code", "cart_id")
+
+    def __init__(
+        self,
+        client: Any,
+        auth_token: Optional[str] = None,
+        store_code: Optional[str] = None,
+        cart_id: Optional[str] = None
+    ):
+        """
+        Khởi tạo view.
+
+        Args:
+            client: API client dùng chung (thường là EcommerceAPIClient).
+            auth_token: Token xác thực của phiên.
+            store_code: Mã cửa hàng của phiên, mặc định Config.STORE_CODE.
+            cart_id: ID giỏ hàng của phiên.
+        """
+        self._client = client
+        self.auth_token = auth_token
+        self.store_code = store_code or Config.STORE_CODE
+        self.cart_id = cart_id
+
+    def __getattr__(self, name: str) -> Any:
+        # Chỉ được gọi với các tên không phải slot: chuyển tiếp phương thức của client
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            raise AttributeError(f"{type(self).__name__} chỉ chuyển tiếp phương thức, không chuyển tiếp '{name}'")
+
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            async def call_async(*args, **kwargs):
+                token = _current_view.set(self)
+                try:
+                    return await attr(*args, **kwargs)
+                finally:
+                    _current_view.reset(token)
+            return call_async
+
+        if inspect.isasyncgenfunction(attr):
+            @functools.wraps(attr)
+            async def iterate(*args, **kwargs):
+                # Chỉ gắn view trong lúc lấy từng phần tử, không để lộ sang code của caller
+                token = _current_view.set(self)
+                try:
+                    generator = attr(*args, **kwargs)
+                finally:
+                    _current_view.reset(token)
+                try:
+                    while True:
+                        token = _current_view.set(self)
+                        try:
+                            item = await generator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                        finally:
+                            _current_view.reset(token)
+                        yield item
+                finally:
+                    await generator.aclose()
+            return iterate
+
+        @functools.wraps(attr)
+        def call(*args, **kwargs):
+            token = _current_view.set(self)
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                _current_view.reset(token)
+        return call
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(store_code={self.store_code!r}, cart_id={self.cart_id!r}, "
+            f"authenticated={self.auth_token is not None})"
+        )
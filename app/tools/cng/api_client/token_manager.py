@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Quản lý vòng đời token xác thực của khách hàng.
+
+Thời gian sống của token (customer_access_token_lifetime trong storeConfig) được lấy một
+lần và cache lại; mỗi token được ghi nhận thời điểm hết hạn, lấy từ trường exp nếu token là
+JWT, nếu không thì tính từ thời điểm cấp. Nhờ vậy việc kiểm tra token còn hiệu lực chỉ là
+so sánh đồng hồ cục bộ, không cần gọi GraphQL. Token có cách đăng nhập
+lại (ví dụ đăng nhập MCard) được làm mới trong nền trước khi hết hạn.
+"""
+
+import asyncio
+import base64
+import json
+import time
+import logging
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+TOKEN_VALID = "valid"
+TOKEN_EXPIRED = "expired"
+TOKEN_UNKNOWN = "unknown"
+
+# Hàm đăng nhập lại, trả về kết quả đăng nhập có trường "token"
+ReloginFunc = Callable[[], Awaitable[Dict[str, Any]]]
+# Hàm nhận (token cũ, token mới); token mới là None khi token cũ hết hạn mà không làm mới được
+TokenListener = Callable[[str, Optional[str]], None]
+
+
+def token_expiry(token: Optional[str]) -> Optional[float]:
+    """
+    Đọc thời điểm hết hạn (trường exp, Unix timestamp) của token JWT mà không xác minh chữ ký.
+
+    Args:
+        token: Token cần đọc.
+
+    Returns:
+        Optional[float]: Thời điểm hết hạn, None nếu token không phải JWT hoặc không có exp.
+    """
+    parts = token.split(".") if token else []
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        expiry = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return float(expiry) if isinstance(expiry, (int, float)) and not isinstance(expiry, bool) else None
+
+
+class _TrackedToken:
+    """Thông tin của một token đang được theo dõi."""
+
+    __slots__ = ("issued_at", "expires_at", "relogin", "task")
+
+    def __init__(self, issued_at: float, expires_at: float, relogin: Optional[ReloginFunc]):
+        self.issued_at = issued_at
+        self.expires_at = expires_at
+        self.relogin = relogin
+        self.task: Optional[asyncio.Task] = None
+
+
+class TokenManager:
+    """
+    Theo dõi thời hạn token và làm mới token trong nền.
+    """
+
+    def __init__(
+        self,
+        lifetime_loader: Callable[[], Awaitable[Dict[str, Any]]],
+        default_lifetime_hours: float = 1,
+        refresh_margin: float = 300,
+        lifetime_ttl: float = 3600,
+        retry_delay: float = 30
+    ):
+        """
+        Khởi tạo token manager.
+
+        Args:
+            lifetime_loader: Hàm lấy thời gian sống của token (kết quả của get_token_lifetime).
+            default_lifetime_hours: Thời gian sống mặc định khi không lấy được từ storeConfig.
+            refresh_margin: Số giây trước khi hết hạn thì làm mới token.
+            lifetime_ttl: Số giây giữ thời gian sống đã lấy từ storeConfig.
+            retry_delay: Số giây chờ giữa các lần thử đăng nhập lại khi thất bại.
+        """
+        self._lifetime_loader = lifetime_loader
+        self.default_lifetime_hours = default_lifetime_hours
+        self.refresh_margin = refresh_margin
+        self.lifetime_ttl = lifetime_ttl
+        self.retry_delay = retry_delay
+        self._lifetime: Optional[float] = None
+        self._lifetime_loaded_at = 0.0
+        # Một lock cho mỗi event loop: manager được dùng chung bởi loop của server và loop nền
+        self._lifetime_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._locks_guard = threading.Lock()
+        self._tokens: Dict[str, _TrackedToken] = {}
+        self._listeners: List[TokenListener] = []
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def lifetime_seconds(self) -> float:
+        """
+        Thời gian sống của token (giây), lấy từ storeConfig và cache trong lifetime_ttl giây.
+
+        Returns:
+            float: Thời gian sống của token.
+        """
+        if self._lifetime is not None and time.monotonic() - self._lifetime_loaded_at < self.lifetime_ttl:
+            return self._lifetime
+
+        async with self._lifetime_lock():
+            # Một lời gọi khác có thể đã tải xong trong lúc chờ lock
+            if self._lifetime is not None and time.monotonic() - self._lifetime_loaded_at < self.lifetime_ttl:
+                return self._lifetime
+
+            hours = None
+            try:
+                result = await self._lifetime_loader()
+                if result.get("success", False):
+                    hours = float(result.get("lifetime_hours"))
+                else:
+                    logger.warning(f"Không lấy được thời gian sống của token: {result.get('message')}")
+            except Exception as e:
+                logger.warning(f"Lỗi khi lấy thời gian sống của token: {str(e)}")
+
+            if hours is None or hours <= 0:
+                if self._lifetime is not None:
+                    # Giữ giá trị cũ, thử lại ở chu kỳ sau
+                    self._lifetime_loaded_at = time.monotonic()
+                    return self._lifetime
+                return self.default_lifetime_hours * 3600
+
+            self._lifetime = hours * 3600
+            self._lifetime_loaded_at = time.monotonic()
+            return self._lifetime
+
+    def _lifetime_lock(self) -> asyncio.Lock:
+        """Lock tải thời gian sống của event loop đang chạy."""
+        loop = asyncio.get_running_loop()
+        with self._locks_guard:
+            lock = self._lifetime_locks.get(loop)
+            if lock is None:
+                lock = self._lifetime_locks[loop] = asyncio.Lock()
+            return lock
+
+    async def track(
+        self,
+        token: str,
+        relogin: Optional[ReloginFunc] = None,
+        expires_at: Optional[float] = None
+    ) -> None:
+        """
+        Ghi nhận token và lên lịch làm mới nếu có cách đăng nhập lại.
+
+        Thời điểm hết hạn lấy theo thứ tự: expires_at, trường exp của token JWT, rồi thời
+        điểm hiện tại cộng thời gian sống của token (token vừa được cấp).
+
+        Args:
+            token: Token cần theo dõi.
+            relogin: Hàm đăng nhập lại để lấy token mới trước khi token này hết hạn.
+            expires_at: Thời điểm hết hạn (Unix timestamp) nếu đã biết.
+        """
+        if expires_at is None:
+            expires_at = token_expiry(token)
+        now = time.monotonic()
+        if expires_at is not None:
+            deadline = now + (expires_at - time.time())
+        else:
+            deadline = now + await self.lifetime_seconds()
+        tracked = _TrackedToken(now, deadline, relogin)
+        self.forget(token)
+        self._tokens[token] = tracked
+        if relogin is not None:
+            tracked.task = asyncio.ensure_future(self._refresh_later(token, tracked))
+
+    def is_tracked(self, token: Optional[str]) -> bool:
+        """Token có đang được theo dõi không."""
+        return bool(token) and token in self._tokens
+
+    def status(self, token: Optional[str]) -> Dict[str, Any]:
+        """
+        Kiểm tra token bằng đồng hồ cục bộ.
+
+        Args:
+            token: Token cần kiểm tra.
+
+        Returns:
+            Dict[str, Any]: {"state": valid/expired/unknown, "expires_in": số giây còn lại hoặc None}.
+        """
+        tracked = self._tokens.get(token) if token else None
+        if tracked is None:
+            return {"state": TOKEN_UNKNOWN, "expires_in": None}
+        expires_in = tracked.expires_at - time.monotonic()
+        if expires_in <= 0:
+            return {"state": TOKEN_EXPIRED, "expires_in": 0}
+        return {"state": TOKEN_VALID, "expires_in": expires_in}
+
+    def forget(self, token: Optional[str]) -> None:
+        """Ngừng theo dõi token (ví dụ khi đăng xuất hoặc đã có token mới)."""
+        tracked = self._tokens.pop(token, None) if token else None
+        if tracked is not None and tracked.task is not None and tracked.task is not _current_task():
+            tracked.task.cancel()
+
+    def add_listener(self, listener: TokenListener) -> None:
+        """Đăng ký hàm nhận token mới sau khi làm mới trong nền."""
+        self._listeners.append(listener)
+
+    async def close(self) -> None:
+        """Hủy mọi tác vụ làm mới token đang chờ."""
+        tasks = [tracked.task for tracked in self._tokens.values() if tracked.task is not None]
+        self._tokens.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hoạt động của token manager."""
+        return {
+            "tokens": len(self._tokens),
+            "lifetime_seconds": self._lifetime,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures
+        }
+
+    async def _refresh_later(self, token: str, tracked: _TrackedToken) -> None:
+        """Chờ đến trước khi token hết hạn rồi đăng nhập lại, thử lại đến khi token hết hạn."""
+        delay = tracked.expires_at - self.refresh_margin - time.monotonic()
+        await asyncio.sleep(max(0.0, delay))
+
+        while self._tokens.get(token) is tracked:
+            new_token = None
+            try:
+                result = await tracked.relogin()
+                if result.get("success", False):
+                    new_token = result.get("token")
+                else:
+                    logger.warning(f"Làm mới token thất bại: {result.get('message')}")
+            except Exception as e:
+                logger.warning(f"Lỗi khi làm mới token: {str(e)}")
+
+            if new_token:
+                self.refreshes += 1
+                # relogin thường tự gọi track() cho token mới; đảm bảo token mới luôn được theo dõi
+                if new_token not in self._tokens:
+                    await self.track(new_token, tracked.relogin)
+                self.forget(token)
+                self._notify(token, new_token)
+                return
+
+            self.refresh_failures += 1
+            remaining = tracked.expires_at - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Token đã hết hạn và không làm mới được")
+                self.forget(token)
+                self._notify(token, None)
+                return
+            await asyncio.sleep(min(self.retry_delay, remaining))
+
+    def _notify(self, old_token: str, new_token: Optional[str]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(old_token, new_token)
+            except Exception as e:
+                logger.warning(f"Lỗi khi thông báo token mới: {str(e)}")
+
+
+def _current_task() -> Optional["asyncio.Task"]:
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+def create_token_manager(lifetime_loader: Callable[[], Awaitable[Dict[str, Any]]]) -> TokenManager:
+    """
+    Tạo token manager với cấu hình mặc định.
+
+    Args:
+        lifetime_loader: Hàm lấy thời gian sống của token.
+
+    Returns:
+        TokenManager: Token manager mới.
+    """
+    return TokenManager(
+        lifetime_loader,
+        default_lifetime_hours=Config.TOKEN_DEFAULT_LIFETIME_HOURS,
+        refresh_margin=Config.TOKEN_REFRESH_MARGIN,
+        lifetime_ttl=Config.TOKEN_LIFETIME_TTL
+    )
@@ -6,16 +6,20 @@ These tools provide functionality for searching products and retrieving product
 
 from typing import Dict, List, Optional, Any, Union
 import json
-import asyncio
+import re
 from google.adk.tools.tool_context import ToolContext
 
 # Sử dụng client factory thay vì tạo instance trực tiếp
 from app.tools.cng.api_client.client_factory import APIClientFactory
 from app.tools.cng.api_client.response import APIResponse, safe_api_call
+from app.tools.cng.api_client.background_loop import run_sync
 
 # Tạo API client từ factory
 api_client = APIClientFactory().get_product_api()
 
+PRODUCT_BASE_URL = "https://online.mmvietnam.com"
+_DOMAIN_RE = re.compile(r'https?://[^/]+')
+
 
 def construct_product_url(product: dict) -> str:
     """
@@ -44,11 +48,34 @@ def construct_product_url(product: dict) -> str:
         canonical = product["canonical_url"]
         if "mmpro.vn" in canonical or "mmvietnam.com" in canonical:
             # Replace domain with online.mmvietnam.com
-            import re
-            canonical = re.sub(r'https?://[^/]+', 'https://online.mmvietnam.com', canonical)
+            canonical = _DOMAIN_RE.sub(PRODUCT_BASE_URL, canonical)
         return canonical
     return None
 
+
+def process_products(products: List[dict]) -> List[dict]:
+    """
+    Bổ sung product_code và product_url cho danh sách sản phẩm trả về từ API.
+    
+    Sản phẩm được cập nhật tại chỗ thay vì sao chép: kết quả từ API client luôn là bản
+    riêng của mỗi lần gọi (các cache đã sao chép khi đọc), nên không ảnh hưởng dữ liệu dùng chung.
+    
+    Args:
+        products: Danh sách sản phẩm
+        
+    Returns:
+        List[dict]: Chính danh sách sản phẩm đã được bổ sung thông tin
+    """
+    for product in products:
+        # Đảm bảo SKU được hiển thị như một trường riêng biệt trong kết quả
+        if "sku" in product:
+            product["product_code"] = product["sku"]
+        
+        product_url = construct_product_url(product)
+        if product_url:
+            product["product_url"] = product_url
+    return products
+
 async def search_products(
     query: str,
     category: Optional[str] = None,
@@ -88,44 +115,6 @@ async def search_products(
         }
     
     try:
-        # Use a simpler query first - based directly on the MM API documentation
-        # This increases chances of success if some fields have issues
-        simple_query_result = await safe_api_call(
-            api_client.search_products, 
-            query, 
-            limit, 
-            page
-        )
-        
-        if simple_query_result.success:
-            products_data = simple_query_result.data.get("products", {})
-            products = products_data.get("items", [])
-            
-            # Tăng khả năng nhìn thấy SKU trong kết quả và thêm URL sản phẩm
-            processed_products = []
-            for product in products:
-                processed_product = product.copy()
-                # Đảm bảo SKU được hiển thị như một trường riêng biệt trong kết quả
-                if "sku" in product:
-                    processed_product["product_code"] = product["sku"]  # Thêm trường rõ ràng hơn
-                
-                # Construct product URL using helper function
-                product_url = construct_product_url(product)
-                if product_url:
-                    processed_product["product_url"] = product_url
-                
-                processed_products.append(processed_product)
-            
-            return {
-                "status": "success",
-                "total_results": products_data.get("total_count", 0),
-                "page": page,
-                "limit": limit,
-                "products": processed_products,
-                "note": "Sử dụng product_code (SKU) để lấy thông tin chi tiết sản phẩm với get_product_detail. Mỗi sản phẩm có product_url để truy cập trực tiếp."
-            }
-        
-        # Nếu truy vấn đơn giản thất bại, thử với bộ lọc nâng cao
         # Prepare filters based on parameters
         filters = {}
         if category:
@@ -152,80 +141,39 @@ async def search_products(
             elif sort_by == "popular":
                 sort = {"relevance": "DESC"}
         
-        # Call the API client using safe_api_call
+        # Planner chọn các cách tìm kiếm theo dạng truy vấn (toàn chữ số -> art_no,
+        # có bộ lọc/sắp xếp -> suggest) và gọi chúng song song
         result = await safe_api_call(
-            api_client.suggest_products,
-            base_query=query,
-            filters=filters,
-            sort=sort,
-            page_size=limit,
-            current_page=page
+            api_client.planned_search,
+            query,
+            filters,
+            sort,
+            limit,
+            page
         )
         
-        if result.success:
-            products_data = result.data.get("products", {})
-            products = products_data.get("items", [])
-            
-            # Tăng khả năng nhìn thấy SKU trong kết quả và thêm URL sản phẩm
-            processed_products = []
-            for product in products:
-                processed_product = product.copy()
-                if "sku" in product:
-                    processed_product["product_code"] = product["sku"]
-                
-                # Construct product URL using helper function
-                product_url = construct_product_url(product)
-                if product_url:
-                    processed_product["product_url"] = product_url
-                
-                processed_products.append(processed_product)
-            
-            return {
-                "status": "success",
-                "total_results": products_data.get("total_count", 0),
-                "page": page,
-                "limit": limit,
-                "products": processed_products,
-                "note": "Sử dụng product_code (SKU) để lấy thông tin chi tiết sản phẩm với get_product_detail. Mỗi sản phẩm có product_url để truy cập trực tiếp."
-            }
-        else:
-            # If advanced query fails too, try one last approach - search by art_no
-            # This is useful if the query is an article number
-            art_no_result = await safe_api_call(api_client.get_product_by_art_no, query)
-            
-            if art_no_result.success:
-                products_data = art_no_result.data.get("products", {})
-                products = products_data.get("items", [])
-                
-                # Tăng khả năng nhìn thấy SKU trong kết quả và thêm URL sản phẩm
-                processed_products = []
-                for product in products:
-                    processed_product = product.copy()
-                    if "sku" in product:
-                        processed_product["product_code"] = product["sku"]
-                    
-                    # Construct product URL using helper function
-                    product_url = construct_product_url(product)
-                    if product_url:
-                        processed_product["product_url"] = product_url
-                    
-                    processed_products.append(processed_product)
-                
-                if products:
-                    return {
-                        "status": "success",
-                        "total_results": products_data.get("total_count", 0),
-                        "page": 1,
-                        "limit": len(processed_products),
-                        "products": processed_products,
-                        "note": "Sử dụng product_code (SKU) để lấy thông tin chi tiết sản phẩm với get_product_detail. Mỗi sản phẩm có product_url để truy cập trực tiếp."
-                    }
-                
-            # If all approaches fail, return error using the standardized format
+        if not result.success:
             return APIResponse.error_response(
                 message=result.message or "Failed to search products", 
                 error=result.error
             ).to_tool_response()
+        
+        products_data = result.data.get("products", {})
+        products = products_data.get("items", [])
+        
+        # Tăng khả năng nhìn thấy SKU trong kết quả và thêm URL sản phẩm
+        processed_products = process_products(products)
+        
+        # Tìm theo article number không phân trang
+        is_art_no = result.data.get("strategy") == "art_no"
+        return {
+            "status": "success",
+            "total_results": products_data.get("total_count", 0),
+            "page": 1 if is_art_no else page,
+            "limit": len(processed_products) if is_art_no else limit,
+            "products": processed_products,
+            "note": "Sử dụng product_code (SKU) để lấy thông tin chi tiết sản phẩm với get_product_detail. Mỗi sản phẩm có product_url để truy cập trực tiếp."
+        }
             
     except Exception as e:
         # Use the standardized error response
@@ -254,54 +202,16 @@ async def get_product_detail(
         tool_context.state["last_viewed_product_id"] = product_id
     
     try:
-        # Ưu tiên tìm kiếm bằng SKU
-        if "_" in product_id:  # Nếu product_id có định dạng SKU (ví dụ: "415883_24158831")
-            sku = product_id
-            result = await safe_api_call(api_client.get_product_by_sku, sku)
-        elif product_id.startswith("p"):  # Giả định ID bắt đầu bằng 'p' là SKU
-            result = await safe_api_call(api_client.get_product_by_sku, product_id)
-        else:
-            # Thử tìm sản phẩm bằng ID
-            # Trước tiên, tìm kiếm để lấy SKU
-            search_result = await safe_api_call(
-                api_client.search_products, 
-                "", 
-                1, 
-                1,
-                {"id": {"eq": product_id}}
-            )
-            
-            if search_result.success:
-                products = search_result.data.get("products", {})
-                items = products.get("items", [])
-                
-                if items and len(items) > 0:
-                    # Lấy SKU từ kết quả tìm kiếm
-                    sku = items[0].get("sku")
-                    if sku:
-                        # Sử dụng SKU để lấy chi tiết sản phẩm
-                        result = await safe_api_call(api_client.get_product_by_sku, sku)
-                    else:
-                        # Nếu không có SKU, thử dùng article number
-                        result = await safe_api_call(api_client.get_product_by_art_no, product_id)
-                else:
-                    # Nếu không tìm thấy, thử dùng article number
-                    result = await safe_api_call(api_client.get_product_by_art_no, product_id)
-            else:
-                # Nếu không tìm thấy, thử dùng article number
-                result = await safe_api_call(api_client.get_product_by_art_no, product_id)
+        # SKU rõ ràng được tra cứu trực tiếp; các định danh khác thử theo ID, SKU và
+        # Article Number cùng lúc, lấy kết quả đầu tiên theo thứ tự ưu tiên
+        result = await safe_api_call(api_client.resolve_product, product_id)
         
         if result.success:
             products = result.data.get("products", {})
             items = products.get("items", [])
             
             if items and len(items) > 0:
-                product = items[0]
-                
-                # Construct product URL using helper function
-                product_url = construct_product_url(product)
-                if product_url:
-                    product["product_url"] = product_url
+                product = process_products(items[:1])[0]
                 
                 return {
                     "status": "success",
@@ -392,92 +302,35 @@ async def search_multiple_products(
             elif sort_by == "popular":
                 sort = {"relevance": "DESC"}
         
-        # Implement custom search across multiple keywords
-        # since we're avoiding the dependency on the EcommerceAPIClient
-        results = []
-        total_count = 0
-        seen_ids = set()
-        
-        # Search for each query in parallel, using safe_api_call
-        search_tasks = []
-        for keyword in queries:
-            task = asyncio.create_task(
-                safe_api_call(
-                    api_client.suggest_products,
-                    base_query=keyword,
-                    filters=filters,
-                    sort=sort,
-                    page_size=limit,
-                    current_page=page
-                )
-            )
-            search_tasks.append(task)
+        # Union pages are produced by the streaming k-way merge in ProductAPI, intersections
+        # by scanning several pages per query, so the tool no longer re-paginates locally
+        result = await safe_api_call(
+            api_client.search_multiple_products,
+            keywords=queries,
+            filters=filters,
+            sort=sort,
+            combine_mode=combine_mode,
+            page_size=limit,
+            current_page=page
+        )
         
-        # Wait for all searches to complete
-        search_results = await asyncio.gather(*search_tasks)
+        if not result.success:
+            return APIResponse.error_response(
+                message=result.message or "Failed to search multiple products",
+                error=result.error
+            ).to_tool_response()
         
-        # Process results based on combine_mode
-        if combine_mode == "intersection":
-            # Only keep products that appear in ALL queries
-            product_sets = []
-            for result in search_results:
-                if result.success:
-                    products = result.data.get("products", {})
-                    items = products.get("items", [])
-                    product_ids = {item.get("id") for item in items if item.get("id")}
-                    product_sets.append(product_ids)
-            
-            if product_sets:
-                common_ids = set.intersection(*product_sets)
-                # Get product information from common IDs
-                for result in search_results:
-                    if result.success:
-                        products = result.data.get("products", {})
-                        items = products.get("items", [])
-                        for item in items:
-                            item_id = item.get("id")
-                            if item_id in common_ids and item_id not in seen_ids:
-                                results.append(item)
-                                seen_ids.add(item_id)
-                                total_count += 1
-        else:  # union mode
-            # Merge all products, removing duplicates
-            for result in search_results:
-                if result.success:
-                    products = result.data.get("products", {})
-                    items = products.get("items", [])
-                    for item in items:
-                        item_id = item.get("id")
-                        if item_id and item_id not in seen_ids:
-                            results.append(item)
-                            seen_ids.add(item_id)
-                            total_count += 1
+        products_data = result.data.get("products", {})
         
         # Thêm xử lý URL cho kết quả
-        processed_results = []
-        for product in results:
-            processed_product = product.copy()
-            if "sku" in product:
-                processed_product["product_code"] = product["sku"]
-            
-            # Construct product URL using helper function
-            product_url = construct_product_url(product)
-            if product_url:
-                processed_product["product_url"] = product_url
-            
-            processed_results.append(processed_product)
-        
-        # Apply final pagination
-        start_idx = (page - 1) * limit
-        end_idx = min(start_idx + limit, len(processed_results))
-        paged_results = processed_results[start_idx:end_idx]
+        processed_results = process_products(products_data.get("items", []))
         
         return {
             "status": "success",
-            "total_results": total_count,
+            "total_results": products_data.get("total_count", 0),
             "page": page,
             "limit": limit,
-            "products": paged_results,
+            "products": processed_results,
             "note": "Sử dụng product_code (SKU) để lấy thông tin chi tiết sản phẩm với get_product_detail. Mỗi sản phẩm có product_url để truy cập trực tiếp."
         }
             
@@ -488,6 +341,22 @@ async def search_multiple_products(
         ).to_tool_response()
 
 
+def _run_tool(tool_func, *args, **kwargs) -> Dict[str, Any]:
+    """
+    Run an async tool function from synchronous code on the shared background event loop.
+    
+    Works both from plain threads and while another event loop is running in the caller's
+    thread, and lets concurrent sync callers share the pooled API clients.
+    """
+    try:
+        return run_sync(tool_func(*args, **kwargs))
+    except TimeoutError as e:
+        return APIResponse.from_exception(
+            exception=e,
+            message=f"{tool_func.__name__} timed out"
+        ).to_tool_response()
+
+
 # Define tool classes that wrap the functions - this maintains compatibility with the existing code
 class SearchProductsTool:
     """Tool for searching products by various criteria."""
@@ -498,8 +367,7 @@ class SearchProductsTool:
     description = "Search for products using various filters and sorting options. Returns products with SKU and product URLs that can be used with get_product_detail."
     
     def __call__(self, *args, **kwargs):
-        loop = asyncio.get_event_loop()
-        return loop.run_until_complete(search_products(*args, **kwargs))
+        return _run_tool(search_products, *args, **kwargs)
 
 
 class GetProductDetailTool:
@@ -511,8 +379,7 @@ class GetProductDetailTool:
     description = "Get detailed information about a specific product including product URL. Use the SKU from search_products results (e.g., '415883_24158831') for best results."
     
     def __call__(self, *args, **kwargs):
-        loop = asyncio.get_event_loop()
-        return loop.run_until_complete(get_product_detail(*args, **kwargs))
+        return _run_tool(get_product_detail, *args, **kwargs)
 
 
 class SearchMultipleProductsTool:
@@ -524,5 +391,4 @@ class SearchMultipleProductsTool:
     description = "Search for products using multiple queries with various filters and sorting options. Returns products with SKU and product URLs."
     
     def __call__(self, *args, **kwargs):
-        loop = asyncio.get_event_loop()
-        return loop.run_until_complete(search_multiple_products(*args, **kwargs)) 
\ No newline at end of file
+        return _run_tool(search_multiple_products, *args, **kwargs) 
\ No newline at end of file
@@ -5,12 +5,15 @@ Uses the new Antsomi search engine for better product discovery.
 
 import logging
 import json
+import os
 from typing import Optional, Dict, Any, List
 import unicodedata
 from google.adk.tools import ToolContext
 import aiohttp
 import urllib.parse
 
+from app.tools.cng.api_client.registry import get_loop_registry
+
 logger = logging.getLogger(__name__)
 
 # Antsomi CDP 365 API Configuration
@@ -20,6 +23,12 @@ DEFAULT_USER_ID = "564996752"  # Default user ID for testing
 DEFAULT_STORE_ID = "10010"
 DEFAULT_PRODUCT_TYPE = "B2C"
 
+# Shared connection pool for the Antsomi API (DNS cached, idle connections kept for reuse)
+ANTSOMI_DNS_CACHE_TTL = int(os.getenv("ANTSOMI_DNS_CACHE_TTL", "300"))
+ANTSOMI_KEEPALIVE_TIMEOUT = int(os.getenv("ANTSOMI_KEEPALIVE_TIMEOUT", "75"))
+
+_ANTSOMI_POOL_KEY = "antsomi"
+
 
 def _to_minimal_product(product: Dict[str, Any]) -> Dict[str, Any]:
     """Convert Antsomi API product response to minimal format expected by frontend."""
@@ -77,6 +86,36 @@ def _strip_accents(text: str) -> str:
         return text
 
 
+def _create_antsomi_session() -> aiohttp.ClientSession:
+    connector = aiohttp.TCPConnector(
+        use_dns_cache=True,
+        ttl_dns_cache=ANTSOMI_DNS_CACHE_TTL,
+        keepalive_timeout=ANTSOMI_KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+def _get_antsomi_session() -> aiohttp.ClientSession:
+    """Return the pooled Antsomi session for the running event loop, creating it if needed."""
+    return get_loop_registry().get_or_create(_ANTSOMI_POOL_KEY, _create_antsomi_session)
+
+
+async def close_antsomi_session() -> None:
+    """Close the pooled Antsomi session of the running event loop."""
+    await get_loop_registry().close(_ANTSOMI_POOL_KEY)
+
+
+async def ping_antsomi() -> bool:
+    """Send a lightweight HEAD request to the Antsomi host to open or refresh a pooled connection."""
+    try:
+        session = _get_antsomi_session()
+        async with session.head(ANTISOMI_BASE_URL, timeout=aiohttp.ClientTimeout(total=10)):
+            return True
+    except Exception as e:
+        logger.debug(f"Antsomi ping failed: {e}")
+        return False
+
+
 async def _antsomi_request(session: aiohttp.ClientSession, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
     """Make request to Antsomi API with proper authentication."""
     url = f"{ANTISOMI_BASE_URL}/{endpoint}"
@@ -100,8 +139,7 @@ async def suggest_keywords(query: str, user_id: str = DEFAULT_USER_ID) -> List[s
             "product_type": DEFAULT_PRODUCT_TYPE
         }
         
-        async with aiohttp.ClientSession() as session:
-            data = await _antsomi_request(session, "suggest", params)
+        data = await _antsomi_request(_get_antsomi_session(), "suggest", params)
         
         suggestions = data.get("suggestions", [])
         return [s.get("keyword", "") for s in suggestions if s.get("keyword")]
@@ -128,8 +166,7 @@ async def search_products_antsomi(query: str, user_id: str = DEFAULT_USER_ID,
         if filters:
             params["filters"] = json.dumps(filters)
         
-        async with aiohttp.ClientSession() as session:
-            data = await _antsomi_request(session, "smart_search", params)
+        data = await _antsomi_request(_get_antsomi_session(), "smart_search", params)
         
         return data
     except Exception as e:
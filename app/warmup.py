@@ -0,0 +1,138 @@
+"""
+Connection warm-up for MMVN upstream APIs.
+Opens pooled connections to the ecommerce GraphQL API and the Antsomi search API
+at startup and keeps them alive with periodic lightweight pings, so the first
+user turns do not pay DNS, TCP and TLS setup.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.tools.cng.api_client.client_factory import APIClientFactory
+from app.tools.cng.api_client.config import Config
+from app.tools.search import ping_antsomi
+
+logger = logging.getLogger(__name__)
+
+_keepalive_task: Optional[asyncio.Task] = None
+
+
+async def _ping_ecommerce() -> bool:
+    """Ping the ecommerce API with the storeConfig query through the shared product client."""
+    result = await APIClientFactory().get_product_api().ping()
+    return result.get("success", False)
+
+
+_UPSTREAM_PINGS: Dict[str, Callable[[], Awaitable[bool]]] = {
+    "ecommerce": _ping_ecommerce,
+    "antsomi": ping_antsomi,
+}
+
+
+async def _warm_host(name: str, ping: Callable[[], Awaitable[bool]], connections: int) -> int:
+    """
+    Open `connections` pooled connections to one upstream host.
+    Concurrent pings force the pool to establish one connection per in-flight request.
+    """
+    results = await asyncio.gather(*(ping() for _ in range(connections)), return_exceptions=True)
+    opened = sum(1 for r in results if r is True)
+    if opened < connections:
+        logger.warning(f"Warm-up for {name}: {opened}/{connections} connections ready")
+    return opened
+
+
+async def warm_up(connections: Optional[int] = None) -> Dict[str, int]:
+    """
+    Open a configurable number of pooled connections to each upstream host.
+
+    Args:
+        connections: Connections per host (defaults to Config.WARMUP_CONNECTIONS)
+
+    Returns:
+        Number of connections that completed a ping, per upstream
+    """
+    connections = connections or Config.WARMUP_CONNECTIONS
+    counts = await asyncio.gather(
+        *(_warm_host(name, ping, connections) for name, ping in _UPSTREAM_PINGS.items())
+    )
+    summary = dict(zip(_UPSTREAM_PINGS, counts))
+    logger.info(f"Upstream connections warmed: {summary}")
+    return summary
+
+
+async def _keepalive_loop(interval: float, connections: int) -> None:
+    """Re-ping every upstream periodically so idle pooled connections are not dropped."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await warm_up(connections)
+        except Exception as e:
+            logger.warning(f"Keepalive ping failed: {e}")
+
+
+async def _warm_up_and_keep_alive(interval: float, connections: int) -> None:
+    try:
+        await warm_up(connections)
+    except Exception as e:
+        logger.warning(f"Connection warm-up failed: {e}")
+    await _keepalive_loop(interval, connections)
+
+
+def schedule_warm_up(
+    interval: Optional[float] = None,
+    connections: Optional[int] = None
+) -> Optional[asyncio.Task]:
+    """
+    Start warm-up and periodic keepalive pings in the background.
+    Must be called from the server's event loop; does nothing when no loop is running
+    or when warm-up is disabled with MM_WARMUP_ENABLED=false. Calling it again while
+    the keepalive task runs on the same loop returns that task.
+
+    Returns:
+        The background task, or None if warm-up was not scheduled
+    """
+    global _keepalive_task
+    if not Config.WARMUP_ENABLED:
+        return None
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.info("No running event loop, connection warm-up skipped until the first request")
+        return None
+
+    # A task left on a loop that has since closed never finishes: start a new one
+    if (_keepalive_task is not None and not _keepalive_task.done()
+            and _keepalive_task.get_loop() is loop):
+        return _keepalive_task
+
+    _keepalive_task = loop.create_task(
+        _warm_up_and_keep_alive(
+            interval or Config.KEEPALIVE_PING_INTERVAL,
+            connections or Config.WARMUP_CONNECTIONS,
+        )
+    )
+    return _keepalive_task
+
+
+def warm_up_on_first_request(callback_context) -> None:
+    """
+    Agent before-callback that starts warm-up from the server's event loop.
+    The ADK server imports the agent before its loop runs, so warm-up starts with the
+    first request instead; later requests find the running task and return at once.
+    """
+    schedule_warm_up()
+    return None
+
+
+async def stop_warm_up() -> None:
+    """Cancel the background keepalive task."""
+    global _keepalive_task
+    if _keepalive_task is not None:
+        _keepalive_task.cancel()
+        try:
+            await _keepalive_task
+        except asyncio.CancelledError:
+            pass
+        _keepalive_task = None
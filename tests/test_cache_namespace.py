@@ -0,0 +1,134 @@
+"""
+Unit tests for per-store cache namespaces.
+"""
+
+import sys
+import threading
+import unittest
+
+from app.tools.cng.api_client.cache_namespace import (
+    COUNTER_HITS, COUNTER_MISSES, StoreNamespacedCache, invalidate_store, store_stats
+)
+
+
+class TestStoreNamespacedCache(unittest.TestCase):
+    """Test case for StoreNamespacedCache."""
+
+    def test_lru_within_store(self):
+        cache = StoreNamespacedCache("test", 2, quotas={})
+        cache.put("s1", "a", 1)
+        cache.put("s1", "b", 2)
+        cache.get("s1", "a")
+        cache.put("s1", "c", 3)
+
+        self.assertEqual(cache.get("s1", "a"), 1)
+        self.assertIsNone(cache.get("s1", "b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_stores_do_not_share_keys(self):
+        cache = StoreNamespacedCache("test", 10, quotas={})
+        cache.put("s1", "a", 1)
+        cache.put(None, "a", 2)
+
+        self.assertIsNone(cache.get("s2", "a"))
+        self.assertEqual(cache.get("", "a"), 2)
+        self.assertEqual(cache.pop("s1", "a"), 1)
+        self.assertIsNone(cache.pop("s1", "a"))
+        self.assertEqual(len(cache), 1)
+
+    def test_store_quota(self):
+        cache = StoreNamespacedCache("test", 10, quotas={"small": 0.2})
+        for key in range(5):
+            cache.put("small", key, key)
+
+        self.assertEqual(cache.quota("small"), 2)
+        self.assertEqual(cache.quota("other"), 10)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["stores"]["small"]["evictions"], 3)
+
+    def test_full_cache_evicts_from_busiest_store(self):
+        cache = StoreNamespacedCache("test", 4, quotas={"small": 0.5, "large": 1.0})
+        cache.put("small", "hot", 1)
+        for key in range(6):
+            cache.put("large", key, key)
+
+        # The large store is the fullest relative to its quota and loses its own entries
+        self.assertEqual(cache.get("small", "hot"), 1)
+        self.assertEqual(len(cache), 4)
+        self.assertEqual(cache.stats()["stores"]["large"]["entries"], 3)
+
+    def test_invalidate_store(self):
+        cache = StoreNamespacedCache("test", 10, quotas={})
+        cache.put("s1", "a", 1)
+        cache.put("s1", "b", 2)
+        cache.put("s2", "a", 3)
+
+        self.assertEqual(cache.invalidate_store("s1"), 2)
+        self.assertEqual(cache.invalidate_store("s1"), 0)
+        self.assertEqual(len(cache), 1)
+
+        cache.put("s1", "c", 4)
+        self.assertEqual(len(cache), 2)
+
+    def test_stats_hit_rate(self):
+        cache = StoreNamespacedCache("test", 10, quotas={})
+        for counter in (COUNTER_HITS, COUNTER_HITS, COUNTER_HITS, COUNTER_MISSES):
+            cache.record("s1", counter)
+        cache.put("s2", "a", 1)
+
+        stores = cache.stats()["stores"]
+        self.assertEqual(stores["s1"]["hit_rate"], 0.75)
+        self.assertIsNone(stores["s2"]["hit_rate"])
+        self.assertEqual(cache.total(COUNTER_HITS), 3)
+
+    def test_concurrent_use_from_threads(self):
+        cache = StoreNamespacedCache("test", 50, quotas={"s0": 0.3})
+        errors = []
+
+        def worker(worker_id):
+            try:
+                for step in range(3000):
+                    store_code = f"s{step % 3}"
+                    cache.put(store_code, (worker_id, step % 40), step)
+                    cache.get(store_code, (worker_id, (step * 7) % 40))
+                    if step % 5 == 0:
+                        cache.pop(store_code, (worker_id, (step * 3) % 40))
+                    cache.record(store_code, COUNTER_HITS)
+            except Exception as e:
+                errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        stats = cache.stats()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(cache), sum(store["entries"] for store in stats["stores"].values()))
+        self.assertLessEqual(len(cache), 50)
+        self.assertLessEqual(stats["stores"]["s0"]["entries"], cache.quota("s0"))
+        self.assertEqual(cache.total(COUNTER_HITS), 4 * 3000)
+
+    def test_invalidate_store_across_caches(self):
+        first = StoreNamespacedCache("first_test", 10, quotas={})
+        second = StoreNamespacedCache("second_test", 10, quotas={})
+        first.put("test_store", "a", 1)
+        second.put("test_store", "a", 1)
+        second.put("test_store", "b", 2)
+        second.put("kept_store", "a", 3)
+
+        removed = invalidate_store("test_store")
+
+        self.assertEqual((removed["first_test"], removed["second_test"]), (1, 2))
+        self.assertEqual(len(second), 1)
+        self.assertIn("second_test", store_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
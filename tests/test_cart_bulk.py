@@ -0,0 +1,141 @@
+"""
+Unit tests for adding several products to the cart in one mutation.
+"""
+
+import unittest
+
+from app.tools.cng.api_client.cart import CartAPI
+from app.tools.cng.api_client.config import Config
+
+
+def _response(user_errors=(), total_quantity=0):
+    return {
+        "success": True,
+        "data": {
+            "addProductsToCart": {
+                "cart": {"id": "cart-1", "itemsV2": {"total_quantity": total_quantity}},
+                "user_errors": list(user_errors)
+            }
+        }
+    }
+
+
+class TestAddManyToCart(unittest.IsolatedAsyncioTestCase):
+    """Test case for CartAPI.add_many_to_cart."""
+
+    def setUp(self):
+        self.api = CartAPI(Config.API_URL)
+        self.api._cart_id = "cart-1"
+        self.responses = []
+        self.requests = []
+
+        async def ensure_session():
+            return None
+
+        async def execute_graphql(query, variables=None, **kwargs):
+            self.requests.append((query, variables))
+            return self.responses.pop(0)
+
+        self.api.ensure_session = ensure_session
+        self.api.execute_graphql = execute_graphql
+
+    def _sent_skus(self, request):
+        return [item["sku"] for item in request[1]["items"]]
+
+    async def test_all_added(self):
+        self.responses = [_response(total_quantity=3)]
+
+        result = await self.api.add_many_to_cart(
+            None, [{"sku": "111", "quantity": 2}, {"product_id": "222"}]
+        )
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["data"]["added"], ["111", "222"])
+        self.assertEqual(result["data"]["failed"], [])
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_duplicate_skus_merged(self):
+        self.responses = [_response(total_quantity=3)]
+
+        await self.api.add_many_to_cart(None, [{"sku": "111"}, {"sku": "111", "quantity": 2}])
+
+        self.assertEqual(self.requests[0][1]["items"], [{"quantity": 3, "sku": "111"}])
+
+    async def test_attributed_error_is_partial(self):
+        self.responses = [_response(
+            [{"code": "INSUFFICIENT_STOCK", "message": "Sản phẩm 222 không đủ hàng"}], total_quantity=1
+        )]
+
+        result = await self.api.add_many_to_cart(None, [{"sku": "111"}, {"sku": "222"}])
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["code"], "PARTIAL_ADD_TO_CART")
+        self.assertEqual(result["data"]["added"], ["111"])
+        self.assertEqual([item["sku"] for item in result["data"]["failed"]], ["222"])
+
+    async def test_unattributed_error_is_not_reported_as_added(self):
+        self.responses = [_response([{"code": "UNDEFINED", "message": "Có lỗi xảy ra"}])]
+
+        result = await self.api.add_many_to_cart(None, [{"sku": "111"}, {"sku": "222"}])
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["code"], "UNCONFIRMED_ADD_TO_CART")
+        self.assertEqual(result["data"]["added"], [])
+        self.assertEqual([item["sku"] for item in result["data"]["unconfirmed"]], ["111", "222"])
+        self.assertEqual(result["data"]["errors"], [{"code": "UNDEFINED", "message": "Có lỗi xảy ra"}])
+        self.assertIn("Có lỗi xảy ra", result["message"])
+        # Not resent, since some products may already be in the cart
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_unattributed_error_with_attributed_error(self):
+        self.responses = [_response([
+            {"code": "INSUFFICIENT_STOCK", "message": "Sản phẩm 222 không đủ hàng"},
+            {"code": "UNDEFINED", "message": "Có lỗi xảy ra"}
+        ])]
+
+        result = await self.api.add_many_to_cart(None, [{"sku": "111"}, {"sku": "222"}])
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["data"]["added"], [])
+        self.assertEqual([item["sku"] for item in result["data"]["failed"]], ["222"])
+        self.assertEqual([item["sku"] for item in result["data"]["unconfirmed"]], ["111"])
+
+    async def test_product_not_found_retried_without_art_no(self):
+        self.responses = [
+            _response([{"code": "PRODUCT_NOT_FOUND", "message": "Không tìm thấy sản phẩm 222"}]),
+            _response(total_quantity=2)
+        ]
+
+        result = await self.api.add_many_to_cart(None, [{"sku": "111"}, {"sku": "222"}])
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["data"]["added"], ["111", "222"])
+        self.assertEqual(self._sent_skus(self.requests[1]), ["222"])
+        self.assertIn("use_art_no: true", self.requests[0][0])
+        self.assertNotIn("use_art_no: true", self.requests[1][0])
+
+    async def test_expired_cart_resends_batch(self):
+        async def create_cart(is_guest=True):
+            return {"success": True, "cart_id": "cart-2"}
+
+        self.api.create_cart = create_cart
+        self.responses = [
+            _response([{"code": "CART_NOT_FOUND", "message": "Không tìm thấy giỏ hàng"}]),
+            _response(total_quantity=2)
+        ]
+
+        result = await self.api.add_many_to_cart(None, [{"sku": "111"}, {"sku": "222"}])
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.requests[1][1]["cartId"], "cart-2")
+        self.assertEqual(self._sent_skus(self.requests[1]), ["111", "222"])
+
+    async def test_no_items(self):
+        result = await self.api.add_many_to_cart(None, [{"quantity": 1}])
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["code"], "NO_ITEMS")
+
+
+if __name__ == "__main__":
+    unittest.main()
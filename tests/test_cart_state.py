@@ -0,0 +1,153 @@
+"""
+Unit tests for the client-side cart state cache.
+"""
+
+import unittest
+
+from app.tools.cng.api_client.cart_profiles import (
+    CART_PROFILE_CHECKOUT, CART_PROFILE_ITEMS, CART_PROFILE_SUMMARY
+)
+from app.tools.cng.api_client.cart_state import CartStateCache
+
+
+def _line(line_id, sku, quantity, price=10000):
+    return {
+        "id": line_id,
+        "product": {"sku": sku, "name": f"Sản phẩm {sku}"},
+        "quantity": quantity,
+        "prices": {"price": {"value": price, "currency": "VND"}}
+    }
+
+
+def _cart(lines, grand_total=None):
+    total_quantity = sum(line["quantity"] for line in lines)
+    return {
+        "id": "cart-1",
+        "itemsV2": {"items": lines, "total_quantity": total_quantity},
+        "prices": {"grand_total": {"value": grand_total or 10000 * total_quantity, "currency": "VND"}}
+    }
+
+
+def _summary(total_quantity, grand_total):
+    return {
+        "id": "cart-1",
+        "itemsV2": {"total_quantity": total_quantity},
+        "prices": {"grand_total": {"value": grand_total, "currency": "VND"}}
+    }
+
+
+class TestCartStateCache(unittest.TestCase):
+    """Test case for optimistic cart state and reconciliation."""
+
+    def setUp(self):
+        self.cache = CartStateCache(reconcile_interval=60, reconcile_mutations=5)
+        self.cache.record_fetch("cart-1", CART_PROFILE_CHECKOUT, _cart([_line("1", "A", 1)]))
+
+    def test_fetched_cart_served_locally(self):
+        cart = self.cache.get("cart-1", CART_PROFILE_ITEMS)
+
+        self.assertEqual(cart["itemsV2"]["items"][0]["id"], "1")
+        self.assertEqual(self.cache.stats()["local_hits"], 1)
+
+    def test_less_detailed_state_not_served(self):
+        self.cache.record_fetch("cart-2", CART_PROFILE_SUMMARY, _summary(1, 10000))
+
+        self.assertIsNone(self.cache.get("cart-2", CART_PROFILE_ITEMS))
+        self.assertIsNotNone(self.cache.get("cart-2", CART_PROFILE_SUMMARY))
+
+    def test_pending_line_not_served_as_item(self):
+        # Added by art_no, which does not match the SKU of the existing line
+        self.cache.apply_add("cart-1", "art-123", 1)
+        # Summary totals agree with the local lines, so no conflict is detected
+        self.cache.confirm("cart-1", _summary(2, 20000))
+
+        self.assertEqual(self.cache.stats()["conflicts"], 0)
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_CHECKOUT))
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_ITEMS))
+
+        summary = self.cache.get("cart-1", CART_PROFILE_SUMMARY)
+        self.assertEqual(summary["itemsV2"]["total_quantity"], 2)
+        self.assertEqual(summary["prices"]["grand_total"]["value"], 20000)
+
+    def test_server_items_replace_pending_line(self):
+        self.cache.apply_add("cart-1", "art-123", 1)
+        self.cache.confirm("cart-1", _cart([_line("1", "A", 1), _line("2", "B", 1)]))
+
+        cart = self.cache.get("cart-1", CART_PROFILE_ITEMS)
+        self.assertEqual([line["id"] for line in cart["itemsV2"]["items"]], ["1", "2"])
+        self.assertFalse(any(line.get("pending") for line in cart["itemsV2"]["items"]))
+        # Taxes and discounts of the checkout profile are not part of the returned items
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_CHECKOUT))
+
+    def test_add_matching_sku_increments_line(self):
+        self.cache.apply_add("cart-1", "A", 2)
+
+        # Served locally until the server confirms the mutation
+        cart = self.cache.get("cart-1", CART_PROFILE_ITEMS)
+        self.assertEqual(len(cart["itemsV2"]["items"]), 1)
+        self.assertEqual(cart["itemsV2"]["items"][0]["quantity"], 3)
+
+        self.cache.confirm("cart-1", _summary(3, 30000))
+        self.assertEqual(self.cache.stats()["conflicts"], 0)
+        self.assertEqual(self.cache.get("cart-1", CART_PROFILE_SUMMARY)["itemsV2"]["total_quantity"], 3)
+
+    def test_update_then_checkout_fetched_from_server(self):
+        checkout = _cart([_line("1", "A", 1)])
+        checkout["itemsV2"]["items"][0]["prices"]["row_total"] = {"value": 10000, "currency": "VND"}
+        checkout["prices"]["subtotal_excluding_tax"] = {"value": 9000, "currency": "VND"}
+        checkout["prices"]["discounts"] = [{"amount": {"value": 1000}, "label": "Khuyến mãi"}]
+        self.cache.record_fetch("cart-1", CART_PROFILE_CHECKOUT, checkout)
+
+        self.cache.apply_update("cart-1", "1", 3)
+        self.cache.confirm("cart-1", _summary(3, 30000))
+
+        # Line totals, taxes and discounts from before the update must not be served
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_CHECKOUT))
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_ITEMS))
+        summary = self.cache.get("cart-1", CART_PROFILE_SUMMARY)
+        self.assertEqual(summary, _summary(3, 30000))
+
+    def test_remove(self):
+        self.cache.apply_remove("cart-1", "1")
+        self.assertEqual(self.cache.get("cart-1", CART_PROFILE_ITEMS)["itemsV2"]["items"], [])
+
+        self.cache.confirm("cart-1", _summary(0, 0))
+        self.assertEqual(self.cache.stats()["conflicts"], 0)
+        self.assertEqual(self.cache.get("cart-1", CART_PROFILE_SUMMARY)["itemsV2"]["total_quantity"], 0)
+
+    def test_total_mismatch_marks_dirty(self):
+        self.cache.apply_update("cart-1", "1", 2)
+        self.cache.confirm("cart-1", _summary(5, 50000))
+
+        self.assertGreater(self.cache.stats()["conflicts"], 0)
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_SUMMARY))
+
+    def test_unknown_line_marks_dirty(self):
+        self.cache.apply_update("cart-1", "missing", 2)
+
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_ITEMS))
+        self.assertEqual(self.cache.stats()["conflicts"], 1)
+
+    def test_reconcile_after_mutation_budget(self):
+        cache = CartStateCache(reconcile_interval=60, reconcile_mutations=2)
+        cache.record_fetch("cart-1", CART_PROFILE_ITEMS, _cart([_line("1", "A", 1)]))
+        cache.apply_update("cart-1", "1", 2)
+        cache.apply_update("cart-1", "1", 3)
+
+        self.assertIsNone(cache.get("cart-1", CART_PROFILE_ITEMS))
+        self.assertEqual(cache.stats()["reconciles"], 1)
+
+    def test_returned_cart_is_a_copy(self):
+        cart = self.cache.get("cart-1", CART_PROFILE_ITEMS)
+        cart["itemsV2"]["items"].clear()
+
+        self.assertEqual(len(self.cache.get("cart-1", CART_PROFILE_ITEMS)["itemsV2"]["items"]), 1)
+
+    def test_invalidate(self):
+        self.cache.invalidate("cart-1")
+
+        self.assertIsNone(self.cache.get("cart-1", CART_PROFILE_SUMMARY))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Unit tests for streamed GraphQL response decoding.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.tools.cng.api_client.base import APIClientBase
+from app.tools.cng.api_client.decoding import DecodeStats, ResponseDecoder, get_operation_name
+from app.tools.cng.api_client.retry import RetryPolicy
+
+LARGE = {"data": {"products": {"items": [{"sku": str(sku), "name": "Sữa tươi " * 20} for sku in range(2000)]}}}
+SMALL = {"data": {"products": {"items": [{"sku": "111"}]}}}
+
+
+class TestOperationName(unittest.TestCase):
+    """Test case for get_operation_name."""
+
+    def test_operation_name(self):
+        self.assertEqual(get_operation_name("query ProductSearch($q: String) { products }"), "ProductSearch")
+        self.assertEqual(get_operation_name("\n  mutation AddToCart { addProductsToCart }"), "AddToCart")
+        self.assertEqual(get_operation_name("{ products { total_count } }"), "anonymous")
+        self.assertEqual(get_operation_name("query { products }"), "anonymous")
+
+
+class TestDecodeStats(unittest.TestCase):
+    """Test case for DecodeStats."""
+
+    def test_snapshot_averages(self):
+        stats = DecodeStats()
+        stats.record("Products", 100, 0.002, False)
+        stats.record("Products", 300, 0.004, True)
+
+        snapshot = stats.snapshot()["Products"]
+        self.assertEqual((snapshot["count"], snapshot["offloaded"], snapshot["max_bytes"]), (2, 1, 300))
+        self.assertEqual(snapshot["avg_bytes"], 200)
+        self.assertAlmostEqual(snapshot["avg_ms"], 3)
+
+        stats.reset()
+        self.assertEqual(stats.snapshot(), {})
+
+
+class TestResponseDecoder(unittest.IsolatedAsyncioTestCase):
+    """Test case for ResponseDecoder against a local server."""
+
+    async def asyncSetUp(self):
+        async def payload(request):
+            if request.path == "/large":
+                return web.json_response(LARGE)
+            if request.path == "/html":
+                return web.Response(status=502, text="<html>Bad gateway</html>", content_type="text/html")
+            return web.json_response(SMALL)
+
+        app = web.Application()
+        app.router.add_route("*", "/{name}", payload)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = aiohttp.ClientSession()
+        self.decoder = ResponseDecoder(offload_threshold=64 * 1024)
+
+    async def asyncTearDown(self):
+        self.decoder.shutdown()
+        await self.session.close()
+        await self.server.close()
+
+    async def _decode(self, path):
+        async with self.session.get(self.server.make_url(path)) as response:
+            return await self.decoder.decode(response, path.strip("/"))
+
+    async def test_small_payload_parsed_inline(self):
+        self.assertEqual(await self._decode("/small"), SMALL)
+
+        stats = self.decoder.stats.snapshot()["small"]
+        self.assertEqual(stats["offloaded"], 0)
+        self.assertIsNone(self.decoder._executor)
+
+    async def test_large_payload_offloaded(self):
+        self.assertEqual(await self._decode("/large"), LARGE)
+
+        stats = self.decoder.stats.snapshot()["large"]
+        self.assertEqual(stats["offloaded"], 1)
+        self.assertGreaterEqual(stats["max_bytes"], 64 * 1024)
+
+    async def test_invalid_json(self):
+        with self.assertRaises(ValueError):
+            await self._decode("/html")
+
+    async def test_non_json_error_page_keeps_status(self):
+        client = APIClientBase(str(self.server.make_url("/html")))
+        try:
+            with patch("app.tools.cng.api_client.base.get_retry_policy", return_value=RetryPolicy(max_attempts=1)):
+                result = await client.execute_graphql("query Products { products { total_count } }")
+        finally:
+            await client.close()
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["code"], "HTTP_502")
+
+
+if __name__ == "__main__":
+    unittest.main()
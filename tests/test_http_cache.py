@@ -0,0 +1,162 @@
+"""
+Unit tests for the HTTP cache of GraphQL GET requests.
+"""
+
+import time
+import unittest
+from email.utils import formatdate
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.tools.cng.api_client.base import APIClientBase
+from app.tools.cng.api_client.config import Config
+from app.tools.cng.api_client.http_cache import (
+    HTTPResponseCache, get_http_cache, is_cacheable_request, make_cache_key, parse_cache_control
+)
+
+KEY = make_cache_key("https://api.example/graphql", {"query": "{ products }"}, "b2c_10010_vi")
+RESULT = {"success": True, "data": {"products": {"items": [{"sku": "111"}]}}}
+
+
+class TestHTTPResponseCache(unittest.TestCase):
+    """Test case for HTTPResponseCache."""
+
+    def setUp(self):
+        self.cache = HTTPResponseCache(max_entries=10)
+
+    def test_parse_cache_control(self):
+        self.assertEqual(
+            parse_cache_control('public, max-age=60, , no-cache="Set-Cookie"'),
+            {"public": None, "max-age": "60", "no-cache": "Set-Cookie"}
+        )
+        self.assertEqual(parse_cache_control(None), {})
+
+    def test_private_requests_not_cacheable(self):
+        url = "https://api.example/graphql"
+        self.assertTrue(is_cacheable_request(url, "{ products(search: \"sua\") { items { sku } } }", {}))
+        self.assertFalse(is_cacheable_request(url, "{ products { items { sku } } }", {"Authorization": "Bearer t"}))
+        self.assertFalse(is_cacheable_request(url, "{ cart(cart_id: \"c1\") { id } }", {}))
+        self.assertFalse(is_cacheable_request(url, "{ customer { email } }", {}))
+        self.assertFalse(is_cacheable_request("https://api.example/rest/V1/carts/mine", "", {}))
+
+    def test_key_depends_on_params_and_store(self):
+        url = "https://api.example/graphql"
+        self.assertEqual(make_cache_key(url, {"b": "2", "a": "1"}, "s1"), make_cache_key(url, {"a": "1", "b": "2"}, "s1"))
+        self.assertNotEqual(make_cache_key(url, {"a": "1"}, "s1"), make_cache_key(url, {"a": "1"}, "s2"))
+
+    def test_fresh_hit_returns_copy(self):
+        self.assertTrue(self.cache.store(KEY, RESULT, {"Cache-Control": "max-age=60"}))
+
+        cached = self.cache.get_fresh(KEY)
+        self.assertEqual(cached, RESULT)
+        cached["data"]["products"]["items"].clear()
+        self.assertEqual(self.cache.get_fresh(KEY), RESULT)
+        self.assertEqual(self.cache.hits, 2)
+
+    def test_miss(self):
+        self.assertIsNone(self.cache.get_fresh(KEY))
+        self.assertIsNone(self.cache.lookup(KEY))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_stale_entry_revalidated_with_etag(self):
+        self.cache.store(KEY, RESULT, {"Cache-Control": "max-age=60", "ETag": '"v1"'})
+
+        with patch("time.monotonic", return_value=time.monotonic() + 120):
+            self.assertIsNone(self.cache.get_fresh(KEY))
+            self.assertEqual(self.cache.lookup(KEY).etag, '"v1"')
+            revalidated = self.cache.revalidated(KEY, {"Cache-Control": "max-age=60", "ETag": '"v2"'})
+            self.assertEqual(revalidated, RESULT)
+            self.assertEqual(self.cache.get_fresh(KEY), RESULT)
+
+        self.assertEqual(self.cache.lookup(KEY).etag, '"v2"')
+        self.assertEqual(self.cache.revalidations, 1)
+
+    def test_no_cache_kept_only_for_revalidation(self):
+        self.assertTrue(self.cache.store(KEY, RESULT, {"Cache-Control": "no-cache", "ETag": '"v1"'}))
+        self.assertIsNone(self.cache.get_fresh(KEY))
+        self.assertIsNotNone(self.cache.lookup(KEY))
+
+    def test_uncacheable_responses(self):
+        for headers in ({"Cache-Control": "no-store"}, {"Cache-Control": "private, max-age=60"}, {}, {"Cache-Control": "no-cache"}):
+            self.cache.store(KEY, RESULT, {"Cache-Control": "max-age=60"})
+            self.assertFalse(self.cache.store(KEY, RESULT, headers), headers)
+            self.assertIsNone(self.cache.lookup(KEY))
+
+    def test_expires_header(self):
+        self.cache.store(KEY, RESULT, {"Expires": formatdate(time.time() + 60, usegmt=True)})
+        self.assertEqual(self.cache.get_fresh(KEY), RESULT)
+
+        self.cache.store(KEY, RESULT, {"Expires": "0", "ETag": '"v1"'})
+        self.assertIsNone(self.cache.get_fresh(KEY))
+
+    def test_invalidate_store(self):
+        other = make_cache_key("https://api.example/graphql", {"query": "{ products }"}, "other")
+        self.cache.store(KEY, RESULT, {"Cache-Control": "max-age=60"})
+        self.cache.store(other, RESULT, {"Cache-Control": "max-age=60"})
+
+        self.assertEqual(self.cache.invalidate_store("other"), 1)
+        self.assertIsNone(self.cache.get_fresh(other))
+        self.assertEqual(self.cache.get_fresh(KEY), RESULT)
+
+
+class TestExecuteGraphQLGet(unittest.IsolatedAsyncioTestCase):
+    """GET requests served from the cache, revalidated with If-None-Match."""
+
+    QUERY = "query Products { products(search: \"sua\") { items { sku } } }"
+
+    async def asyncSetUp(self):
+        self.requests = []
+        self.cache_control = "max-age=60"
+
+        async def graphql(request):
+            self.requests.append(request.headers.get("If-None-Match"))
+            if request.headers.get("If-None-Match") == '"v1"':
+                return web.Response(status=304, headers={"Cache-Control": self.cache_control, "ETag": '"v1"'})
+            return web.json_response(
+                {"data": {"products": {"items": [{"sku": "111"}]}}},
+                headers={"Cache-Control": self.cache_control, "ETag": '"v1"'}
+            )
+
+        app = web.Application()
+        app.router.add_get("/graphql", graphql)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.client = APIClientBase(str(self.server.make_url("/graphql")))
+        get_http_cache().clear()
+        self.enabled = patch.object(Config, "HTTP_CACHE_ENABLED", True)
+        self.enabled.start()
+
+    async def asyncTearDown(self):
+        self.enabled.stop()
+        get_http_cache().clear()
+        await self.client.close()
+        await self.server.close()
+
+    async def test_fresh_hit_skips_request(self):
+        first = await self.client.execute_graphql(self.QUERY, method="GET")
+        second = await self.client.execute_graphql(self.QUERY, method="GET")
+
+        self.assertTrue(first["success"])
+        self.assertEqual(second["data"], first["data"])
+        self.assertEqual(self.requests, [None])
+
+    async def test_stale_entry_revalidated(self):
+        self.cache_control = "no-cache"
+        first = await self.client.execute_graphql(self.QUERY, method="GET")
+        second = await self.client.execute_graphql(self.QUERY, method="GET")
+
+        self.assertEqual(second["data"], first["data"])
+        self.assertEqual(self.requests, [None, '"v1"'])
+
+    async def test_authenticated_request_bypasses_cache(self):
+        self.client.set_auth_token("token")
+        await self.client.execute_graphql(self.QUERY, method="GET")
+        await self.client.execute_graphql(self.QUERY, method="GET")
+
+        self.assertEqual(self.requests, [None, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
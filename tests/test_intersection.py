@@ -0,0 +1,128 @@
+"""
+Unit tests for progressive multi-keyword intersections.
+"""
+
+import unittest
+
+from app.tools.cng.api_client.intersection import progressive_intersection
+
+
+class _Catalog:
+    """Fake suggest_products over keyword -> ranked product ids, recording every call."""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+        self.failing = set()
+
+    async def suggest_products(self, keyword, filters=None, sort=None, page_size=10, current_page=1):
+        self.calls.append((keyword, filters, current_page))
+        if keyword in self.failing:
+            return {"success": False, "code": "HTTP_503", "message": "HTTP error: 503"}
+
+        ids = self.results.get(keyword, [])
+        skus = ((filters or {}).get("sku") or {}).get("in")
+        if skus is not None:
+            ids = [product_id for product_id in ids if f"sku-{product_id}" in skus]
+        start = (current_page - 1) * page_size
+        return {
+            "success": True,
+            "data": {"products": {
+                "items": [{"id": product_id, "sku": f"sku-{product_id}"} for product_id in ids[start:start + page_size]],
+                "total_count": len(ids)
+            }}
+        }
+
+    def pages_of(self, keyword):
+        return [page for name, filters, page in self.calls if name == keyword and not filters]
+
+
+def _ids(result):
+    return [item["id"] for item in result["items"]]
+
+
+class TestProgressiveIntersection(unittest.IsolatedAsyncioTestCase):
+    """Test case for progressive_intersection."""
+
+    async def test_matches_in_order_of_most_selective_keyword(self):
+        catalog = _Catalog({
+            "sua": list(range(1, 41)),
+            "tuoi": [30, 5, 12, 7, 99, 3]
+        })
+
+        result = await progressive_intersection(catalog, ["sua", "tuoi"], limit=10, page_size=4)
+
+        self.assertTrue(result["success"])
+        # "tuoi" drives the search since it has fewer results, so its ranking is kept
+        self.assertEqual(_ids(result), [30, 5, 12, 7, 3])
+        self.assertEqual(result["matched"], 5)
+        self.assertFalse(result["has_more"])
+        self.assertEqual(catalog.pages_of("sua"), [1])
+
+    async def test_stops_once_enough_matches(self):
+        catalog = _Catalog({
+            "a": list(range(1, 101)),
+            "b": list(range(1, 201))
+        })
+
+        result = await progressive_intersection(catalog, ["a", "b"], limit=3, page_size=5)
+
+        self.assertEqual(_ids(result), [1, 2, 3])
+        self.assertTrue(result["has_more"])
+        self.assertEqual(catalog.pages_of("a"), [1])
+        self.assertLess(result["upstream_calls"], 5)
+
+    async def test_skip_pages_through_matches(self):
+        catalog = _Catalog({
+            "a": list(range(1, 31)),
+            "b": list(range(2, 61, 2))
+        })
+
+        result = await progressive_intersection(catalog, ["a", "b"], skip=3, limit=3, page_size=5)
+
+        self.assertEqual(_ids(result), [8, 10, 12])
+        self.assertTrue(result["has_more"])
+
+    async def test_three_keywords(self):
+        catalog = _Catalog({
+            "a": [1, 2, 3, 4, 5, 6],
+            "b": [6, 4, 2],
+            "c": [2, 3, 4, 6, 8, 10, 12]
+        })
+
+        result = await progressive_intersection(catalog, ["a", "b", "c"], limit=10, page_size=2)
+
+        self.assertEqual(_ids(result), [6, 4, 2])
+
+    async def test_max_pages(self):
+        catalog = _Catalog({
+            "a": list(range(1, 101)),
+            "b": list(range(50, 151))
+        })
+
+        result = await progressive_intersection(catalog, ["a", "b"], limit=5, page_size=10, max_pages=2)
+
+        self.assertEqual(_ids(result), [])
+        self.assertEqual(catalog.pages_of("a"), [1, 2])
+
+    async def test_no_common_results(self):
+        catalog = _Catalog({"a": [1, 2], "b": []})
+
+        result = await progressive_intersection(catalog, ["a", "b"], limit=5)
+
+        self.assertEqual(result["items"], [])
+        self.assertFalse(result["has_more"])
+
+    async def test_upstream_error_returned(self):
+        catalog = _Catalog({"a": [1, 2], "b": [1]})
+        catalog.failing.add("b")
+
+        result = await progressive_intersection(catalog, ["a", "b"], limit=5)
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["code"], "HTTP_503")
+        self.assertEqual(result["upstream_calls"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Unit tests for the BM25 inverted-index memory service.
+"""
+
+import os
+import sys
+import unittest
+
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types
+
+# The memory services are imported as top-level modules of the app directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from memory_index import IndexedMemoryService, fold_accents, tokenize  # noqa: E402
+
+
+def _event(event_id, text):
+    return Event(
+        id=event_id,
+        author="user",
+        invocation_id="inv",
+        content=types.Content(role="user", parts=[types.Part(text=text)])
+    )
+
+
+def _session(events, session_id="s1"):
+    return Session(id=session_id, app_name="app", user_id="u1", events=list(events))
+
+
+class TestTokenize(unittest.TestCase):
+    """Test case for accent folding and tokenization."""
+
+    def test_fold_accents(self):
+        self.assertEqual(fold_accents("Sữa Tươi Đà Lạt"), "sua tuoi da lat")
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Mua 2 hộp sữa, giao ở Q.7!"), ["mua", "2", "hop", "sua", "giao", "o", "q", "7"])
+
+
+class TestIndexedMemoryService(unittest.IsolatedAsyncioTestCase):
+    """Test case for IndexedMemoryService."""
+
+    async def _search(self, service, query, user_id="u1"):
+        response = await service.search_memory(app_name="app", user_id=user_id, query=query)
+        return [memory.id for memory in response.memories]
+
+    async def test_ranking(self):
+        service = IndexedMemoryService()
+        await service.add_session_to_memory(_session([
+            _event("e1", "Tôi muốn mua sữa tươi Vinamilk"),
+            _event("e2", "Giao hàng đến quận 7"),
+            _event("e3", "Sữa tươi không đường loại nào rẻ nhất")
+        ]))
+
+        results = await self._search(service, "sua tuoi khong duong")
+        self.assertEqual(results, ["e3", "e1"])
+        self.assertEqual(await self._search(service, "sua", user_id="u2"), [])
+        self.assertEqual(await self._search(service, "banh mi"), [])
+
+    async def test_ties_go_to_recent_event(self):
+        service = IndexedMemoryService()
+        await service.add_session_to_memory(_session([_event("old", "mua gạo"), _event("new", "mua gạo")]))
+
+        self.assertEqual(await self._search(service, "gao"), ["new", "old"])
+
+    async def test_top_k(self):
+        service = IndexedMemoryService(top_k=2)
+        await service.add_session_to_memory(_session([_event(f"e{i}", f"mua dầu ăn {i}") for i in range(5)]))
+
+        self.assertEqual(len(await self._search(service, "dau an")), 2)
+
+    async def test_rewound_events_removed(self):
+        service = IndexedMemoryService()
+        events = [_event("e1", "mua bia Tiger"), _event("e2", "mua bia Heineken")]
+        await service.add_session_to_memory(_session(events))
+        await service.add_session_to_memory(_session(events[:1] + [_event("e3", "đổi sang nước ngọt")]))
+
+        self.assertEqual(await self._search(service, "bia"), ["e1"])
+        self.assertEqual(await self._search(service, "heineken"), [])
+        self.assertEqual(service.stats(), {"users": 1, "documents": 2, "terms": 7})
+
+    async def test_events_indexed_once(self):
+        service = IndexedMemoryService()
+        event = _event("e1", "đặt bánh sinh nhật")
+        await service.add_session_to_memory(_session([event]))
+        await service.add_events_to_memory(app_name="app", user_id="u1", session_id="s1", events=[event])
+
+        self.assertEqual(await self._search(service, "banh"), ["e1"])
+        self.assertEqual(service.stats()["documents"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
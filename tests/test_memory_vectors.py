@@ -0,0 +1,137 @@
+"""
+Unit tests for the sparse TF-IDF vector memory service.
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types
+
+# The memory services are imported as top-level modules of the app directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+from memory_vectors import VectorMemoryService  # noqa: E402
+
+
+def _event(event_id, text):
+    return Event(
+        id=event_id,
+        author="user",
+        invocation_id="inv",
+        content=types.Content(role="user", parts=[types.Part(text=text)])
+    )
+
+
+def _session(events, session_id="s1"):
+    return Session(id=session_id, app_name="app", user_id="u1", events=list(events))
+
+
+class TestVectorMemoryService(unittest.IsolatedAsyncioTestCase):
+    """Test case for VectorMemoryService."""
+
+    async def _search(self, service, query, user_id="u1"):
+        response = await service.search_memory(app_name="app", user_id=user_id, query=query)
+        return [memory.id for memory in response.memories]
+
+    def _vectors(self, service):
+        return service._vectors[("app", "u1")]
+
+    async def test_ranking_and_accent_folding(self):
+        service = VectorMemoryService()
+        await service.add_session_to_memory(_session([
+            _event("e1", "Tôi muốn mua sữa tươi Vinamilk"),
+            _event("e2", "Giao hàng đến quận 7"),
+            _event("e3", "Sữa tươi không đường loại nào rẻ nhất")
+        ]))
+
+        results = await self._search(service, "sua tuoi khong duong")
+        self.assertEqual(results[0], "e3")
+        self.assertIn("e1", results)
+        self.assertNotIn("e2", results)
+        self.assertEqual(await self._search(service, "sua", user_id="u2"), [])
+        self.assertEqual(await self._search(service, "banh mi"), [])
+
+    async def test_long_event_returned_once(self):
+        service = VectorMemoryService(chunk_words=2)
+        await service.add_session_to_memory(_session([
+            _event("long", "sữa sữa sữa tươi sữa tươi sữa tươi"),
+            _event("short", "sữa chua")
+        ]))
+
+        self.assertEqual(await self._search(service, "sữa"), ["long", "short"])
+
+    async def test_rewound_events_removed(self):
+        service = VectorMemoryService()
+        events = [_event("e1", "mua bia Tiger"), _event("e2", "mua bia Heineken")]
+        await service.add_session_to_memory(_session(events))
+        await service.add_session_to_memory(_session(events[:1] + [_event("e3", "đổi sang nước ngọt")]))
+
+        self.assertEqual(await self._search(service, "bia"), ["e1"])
+        self.assertEqual(await self._search(service, "nuoc ngot"), ["e3"])
+
+    async def test_top_k_filled_despite_removed_chunks(self):
+        service = VectorMemoryService(top_k=3)
+        kept = [_event(f"keep{i}", f"mua gạo loại {i}") for i in range(5)]
+        # Removed chunks score higher than the kept ones on "gạo"
+        removed = [_event(f"drop{i}", "gạo gạo gạo") for i in range(40)]
+        await service.add_session_to_memory(_session(kept + removed))
+        await service.add_session_to_memory(_session(kept))
+
+        results = await self._search(service, "gạo")
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(event_id.startswith("keep") for event_id in results))
+
+    async def test_postings_compacted_after_removals(self):
+        service = VectorMemoryService()
+        kept = _event("keep", "mua nước mắm Nam Ngư")
+        # Each rewrite replaces a large batch of events of the session
+        for round_number in range(5):
+            batch = [_event(f"r{round_number}-{i}", f"nước mắm chai {i}") for i in range(100)]
+            await service.add_session_to_memory(_session([kept] + batch))
+        await service.add_session_to_memory(_session([kept]))
+
+        vectors = self._vectors(service)
+        self.assertLess(vectors.size, 2 * vectors.MIN_COMPACT + 1)
+        self.assertLessEqual(sum(len(rows) for rows in vectors.posting_rows), len(vectors.indices))
+        self.assertEqual(await self._search(service, "nuoc mam"), ["keep"])
+
+    async def test_compaction_keeps_rankings(self):
+        service = VectorMemoryService(top_k=5)
+        kept = [_event(f"keep{i}", " ".join(["cà phê"] * (i + 1) + ["sữa đặc"])) for i in range(5)]
+        await service.add_session_to_memory(_session(kept))
+        before = await self._search(service, "ca phe sua")
+
+        removed = [_event(f"drop{i}", f"trà xanh {i}") for i in range(200)]
+        await service.add_session_to_memory(_session(kept + removed))
+        await service.add_session_to_memory(_session(kept))
+
+        vectors = self._vectors(service)
+        self.assertLess(vectors.size - vectors.live, max(vectors.live, vectors.MIN_COMPACT))
+        self.assertEqual(await self._search(service, "ca phe sua"), before)
+        self.assertEqual(await self._search(service, "tra xanh"), [])
+        # Postings and CSR rows describe the same renumbered chunks
+        for term_id, rows in enumerate(vectors.posting_rows):
+            for chunk in rows:
+                chunk_terms = vectors.indices[vectors.indptr[chunk]:vectors.indptr[chunk + 1]]
+                self.assertIn(term_id, chunk_terms)
+        self.assertTrue(np.all(np.diff(np.frombuffer(vectors.indptr, dtype=np.int64)) > 0))
+
+    async def test_incremental_events(self):
+        service = VectorMemoryService()
+        await service.add_events_to_memory(
+            app_name="app", user_id="u1", session_id="s1", events=[_event("e1", "đặt bánh sinh nhật")]
+        )
+        await service.add_events_to_memory(
+            app_name="app", user_id="u1", session_id="s1", events=[_event("e1", "đặt bánh sinh nhật")]
+        )
+
+        self.assertEqual(await self._search(service, "banh sinh nhat"), ["e1"])
+        self.assertEqual(service.stats()["chunks"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""
+Unit tests for streaming k-way merges of multi-keyword searches.
+"""
+
+import unittest
+
+from app.tools.cng.api_client.merge import (
+    ORDER_PRICE_ASC, ORDER_PRICE_DESC, ORDER_RELEVANCE, merge_order, merge_product_streams, product_price
+)
+from app.tools.cng.api_client.pagination import ProductPageIterator
+
+
+def _product(product_id, price=None):
+    product = {"id": product_id, "sku": f"sku-{product_id}"}
+    if price is not None:
+        product["price"] = {"regularPrice": {"amount": {"value": price}}}
+    return product
+
+
+class _Stream:
+    """Paged fake search results of one keyword, recording the pages fetched."""
+
+    def __init__(self, products, page_size=2):
+        self.products = products
+        self.page_size = page_size
+        self.pages = []
+
+    async def fetch(self, page):
+        self.pages.append(page)
+        start = (page - 1) * self.page_size
+        return {
+            "success": True,
+            "data": {"products": {
+                "items": self.products[start:start + self.page_size],
+                "total_count": len(self.products)
+            }}
+        }
+
+    def iterator(self):
+        return ProductPageIterator(self.fetch, page_size=self.page_size, read_ahead=0)
+
+
+def _ids(products):
+    return [product["id"] for product in products]
+
+
+class TestMergeOrder(unittest.TestCase):
+    """Test case for merge_order and product_price."""
+
+    def test_merge_order(self):
+        self.assertEqual(merge_order({"price": "ASC"}), ORDER_PRICE_ASC)
+        self.assertEqual(merge_order({"price": "DESC"}), ORDER_PRICE_DESC)
+        self.assertEqual(merge_order({"name": "ASC"}), ORDER_RELEVANCE)
+        self.assertEqual(merge_order(None), ORDER_RELEVANCE)
+
+    def test_product_price(self):
+        self.assertEqual(product_price(_product(1, "12.5")), 12.5)
+        self.assertEqual(product_price(_product(1)), 0.0)
+        self.assertEqual(product_price({"price": None}), 0.0)
+
+
+class TestMergeProductStreams(unittest.IsolatedAsyncioTestCase):
+    """Test case for merge_product_streams."""
+
+    async def test_relevance_interleaves_streams_by_rank(self):
+        first = _Stream([_product(i) for i in (1, 2, 3)])
+        second = _Stream([_product(i) for i in (10, 20, 30)])
+
+        products, has_more, seen = await merge_product_streams([first.iterator(), second.iterator()], limit=6)
+
+        self.assertEqual(_ids(products), [1, 10, 2, 20, 3, 30])
+        self.assertFalse(has_more)
+        self.assertEqual(seen, 6)
+
+    async def test_duplicates_kept_at_best_rank(self):
+        first = _Stream([_product(i) for i in (1, 2, 3)])
+        second = _Stream([_product(i) for i in (2, 1, 4)])
+
+        products, _, _ = await merge_product_streams([first.iterator(), second.iterator()], limit=10)
+
+        self.assertEqual(_ids(products), [1, 2, 3, 4])
+
+    async def test_no_more_when_only_duplicates_remain(self):
+        first = _Stream([_product(i) for i in (1, 2)])
+        second = _Stream([_product(i) for i in (2, 1)])
+
+        products, has_more, seen = await merge_product_streams([first.iterator(), second.iterator()], limit=2)
+
+        self.assertEqual(_ids(products), [1, 2])
+        self.assertFalse(has_more)
+        self.assertEqual(seen, 2)
+
+    async def test_price_order(self):
+        cheap = _Stream([_product("a", 5), _product("b", 20), _product("c", 40)])
+        mixed = _Stream([_product("x", 10), _product("y", 30)])
+
+        ascending, _, _ = await merge_product_streams([cheap.iterator(), mixed.iterator()], ORDER_PRICE_ASC, limit=5)
+        self.assertEqual(_ids(ascending), ["a", "x", "b", "y", "c"])
+
+        cheap_desc = _Stream([_product("c", 40), _product("b", 20), _product("a", 5)])
+        mixed_desc = _Stream([_product("y", 30), _product("x", 10)])
+        descending, _, _ = await merge_product_streams(
+            [cheap_desc.iterator(), mixed_desc.iterator()], ORDER_PRICE_DESC, limit=5
+        )
+        self.assertEqual(_ids(descending), ["c", "y", "b", "x", "a"])
+
+    async def test_skip_and_limit_read_only_needed_pages(self):
+        first = _Stream([_product(i) for i in range(1, 21)])
+        second = _Stream([_product(i) for i in range(101, 121)])
+
+        products, has_more, _ = await merge_product_streams(
+            [first.iterator(), second.iterator()], skip=2, limit=3
+        )
+
+        self.assertEqual(_ids(products), [2, 102, 3])
+        self.assertTrue(has_more)
+        # Five products merged out of 2 x 20 pages of 2: the streams stop after their second page
+        self.assertEqual(first.pages, [1, 2])
+        self.assertEqual(second.pages, [1, 2])
+
+    async def test_streams_closed(self):
+        streams = [_Stream([_product(i) for i in range(10)]).iterator() for _ in range(2)]
+
+        await merge_product_streams(streams, limit=1)
+
+        self.assertFalse(any(stream.has_more for stream in streams))
+
+    async def test_empty_streams(self):
+        products, has_more, seen = await merge_product_streams([_Stream([]).iterator()], limit=5)
+
+        self.assertEqual((products, has_more, seen), ([], False, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Unit tests for the negative cache of identifiers without results.
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from app.tools.cng.api_client.config import Config
+from app.tools.cng.api_client.negative_cache import (
+    KIND_ART_NO, KIND_SEARCH, KIND_SKU, NegativeCache, get_negative_cache
+)
+from app.tools.cng.api_client.product import ProductAPI
+from app.tools.cng.api_client.product_cache import get_product_detail_cache
+
+
+def _products(*skus):
+    return {"success": True, "data": {"products": {"items": [{"sku": sku} for sku in skus], "total_count": len(skus)}}}
+
+
+class TestNegativeCache(unittest.TestCase):
+    """Test case for NegativeCache."""
+
+    def setUp(self):
+        self.cache = NegativeCache(ttl=60, max_entries=10)
+
+    def test_known_miss_until_ttl(self):
+        self.assertFalse(self.cache.is_known_miss(KIND_SKU, "s1", "111"))
+        self.cache.record_miss(KIND_SKU, "s1", "111")
+
+        self.assertTrue(self.cache.is_known_miss(KIND_SKU, "s1", "111"))
+        with patch("time.monotonic", return_value=time.monotonic() + 61):
+            self.assertFalse(self.cache.is_known_miss(KIND_SKU, "s1", "111"))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_identifiers_normalized(self):
+        self.cache.record_miss(KIND_SEARCH, "s1", "  Sữa Hạt ")
+
+        self.assertTrue(self.cache.is_known_miss(KIND_SEARCH, "s1", "sữa hạt"))
+
+    def test_keyed_by_kind_and_store(self):
+        self.cache.record_miss(KIND_SKU, "s1", "111")
+
+        self.assertFalse(self.cache.is_known_miss(KIND_ART_NO, "s1", "111"))
+        self.assertFalse(self.cache.is_known_miss(KIND_SKU, "s2", "111"))
+        self.assertEqual(self.cache.invalidate_store("s1"), 1)
+        self.assertFalse(self.cache.is_known_miss(KIND_SKU, "s1", "111"))
+
+    def test_forget_and_saved_calls(self):
+        self.cache.record_miss(KIND_SKU, "s1", "111")
+        self.cache.record_miss(KIND_SEARCH, "s1", "xyz")
+        self.cache.is_known_miss(KIND_SKU, "s1", "111")
+        self.cache.is_known_miss(KIND_SEARCH, "s1", "xyz")
+        self.cache.is_known_miss(KIND_SEARCH, "s1", "xyz")
+        self.cache.forget(KIND_SKU, "s1", "111")
+
+        self.assertFalse(self.cache.is_known_miss(KIND_SKU, "s1", "111"))
+        stats = self.cache.stats()
+        self.assertEqual(stats["saved_calls"], {KIND_SKU: 1, KIND_SEARCH: 2})
+        self.assertEqual(stats["total_saved_calls"], 3)
+
+
+class TestProductLookupsUseNegativeCache(unittest.IsolatedAsyncioTestCase):
+    """Product lookups skip the API for identifiers known to have no result."""
+
+    def setUp(self):
+        self.api = ProductAPI(Config.API_URL)
+        self.api.set_store_code("test_store")
+        self.calls = []
+        self.result = _products()
+
+        async def execute_graphql(query, variables=None, **kwargs):
+            self.calls.append(variables)
+            return self.result
+
+        self.api.execute_graphql = execute_graphql
+        get_negative_cache().invalidate_store("test_store")
+        get_product_detail_cache().invalidate_store("test_store")
+
+    def tearDown(self):
+        get_negative_cache().invalidate_store("test_store")
+        get_product_detail_cache().invalidate_store("test_store")
+
+    async def test_empty_search_remembered(self):
+        first = await self.api.search_products("không tồn tại")
+        second = await self.api.search_products("không tồn tại")
+
+        self.assertEqual(second, first)
+        self.assertEqual(len(self.calls), 1)
+
+    async def test_failed_search_not_remembered(self):
+        self.result = {"success": False, "code": "HTTP_503", "message": "HTTP error: 503"}
+        await self.api.search_products("sữa")
+        await self.api.search_products("sữa")
+
+        self.assertEqual(len(self.calls), 2)
+
+    async def test_later_pages_not_remembered(self):
+        await self.api.search_products("sữa", current_page=3)
+        await self.api.search_products("sữa", current_page=3)
+
+        self.assertEqual(len(self.calls), 2)
+
+    async def test_unknown_sku_remembered(self):
+        await self.api.get_product_by_sku("999")
+        result = await self.api.get_product_by_sku("999")
+
+        self.assertEqual(result["data"]["products"]["items"], [])
+        self.assertEqual(len(self.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
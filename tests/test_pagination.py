@@ -0,0 +1,108 @@
+"""
+Unit tests for the prefetching product page iterator.
+"""
+
+import asyncio
+import unittest
+
+from app.tools.cng.api_client.pagination import ProductPageIterator
+
+
+class _Pages:
+    """Fake paged search, recording started and cancelled page fetches."""
+
+    def __init__(self, total_count, page_size=2, failing_page=None):
+        self.total_count = total_count
+        self.page_size = page_size
+        self.failing_page = failing_page
+        self.started = []
+        self.cancelled = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def fetch(self, page):
+        self.started.append(page)
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(page)
+            raise
+        if page == self.failing_page:
+            return {"success": False, "code": "HTTP_503", "message": "HTTP error: 503"}
+        start = (page - 1) * self.page_size
+        count = max(0, min(self.page_size, self.total_count - start))
+        return {
+            "success": True,
+            "data": {"products": {
+                "items": [{"sku": str(start + offset)} for offset in range(count)],
+                "total_count": self.total_count
+            }}
+        }
+
+
+class TestProductPageIterator(unittest.IsolatedAsyncioTestCase):
+    """Test case for ProductPageIterator."""
+
+    async def test_iterates_all_pages(self):
+        pages = _Pages(total_count=5)
+        products = ProductPageIterator(pages.fetch, page_size=2)
+
+        skus = [product["sku"] async for product in products]
+
+        self.assertEqual(skus, ["0", "1", "2", "3", "4"])
+        self.assertEqual(pages.started, [1, 2, 3])
+        self.assertEqual((products.total_count, products.total_pages, products.pages_fetched), (5, 3, 3))
+        self.assertFalse(products.has_more)
+
+    async def test_next_pages_prefetched(self):
+        pages = _Pages(total_count=20)
+        products = ProductPageIterator(pages.fetch, page_size=2, read_ahead=2)
+
+        await products.next_page()
+        await asyncio.sleep(0)
+
+        # The first page alone is fetched until the total is known, then two pages ahead
+        self.assertEqual(pages.started, [1, 2, 3])
+        await products.aclose()
+
+    async def test_early_stop_cancels_prefetch(self):
+        pages = _Pages(total_count=20)
+        async with ProductPageIterator(pages.fetch, page_size=2, read_ahead=2) as products:
+            await products.next_page()
+            pages.release.clear()
+            await asyncio.sleep(0)
+
+        self.assertEqual(sorted(pages.cancelled), [2, 3])
+        self.assertFalse(products.has_more)
+
+    async def test_start_and_max_pages(self):
+        pages = _Pages(total_count=20)
+        products = ProductPageIterator(pages.fetch, page_size=2, start_page=3, max_pages=2)
+
+        skus = [product["sku"] async for product in products]
+
+        self.assertEqual(skus, ["4", "5", "6", "7"])
+        self.assertEqual(pages.started, [3, 4])
+
+    async def test_error_stops_iteration(self):
+        pages = _Pages(total_count=20, failing_page=2)
+        products = ProductPageIterator(pages.fetch, page_size=2, read_ahead=0)
+
+        skus = [product["sku"] async for product in products]
+
+        self.assertEqual(skus, ["0", "1"])
+        self.assertEqual(products.error["code"], "HTTP_503")
+
+    async def test_fetch_exception_reported_as_error(self):
+        async def fetch(page):
+            raise RuntimeError("boom")
+
+        products = ProductPageIterator(fetch, page_size=2)
+
+        with self.assertLogs("app.tools.cng.api_client.pagination", level="ERROR"):
+            self.assertIsNone(await products.next_page())
+        self.assertEqual(products.error["code"], "PAGINATION_ERROR")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the stale-while-revalidate product detail cache.
+"""
+
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from app.tools.cng.api_client.product_cache import FRESH, MISS, STALE, ProductDetailCache
+
+DETAIL = {"success": True, "data": {"products": {"items": [{"sku": "111", "price": 10}]}}}
+
+
+def _is_cacheable(result):
+    return result.get("success", False)
+
+
+class TestProductDetailCache(unittest.IsolatedAsyncioTestCase):
+    """Test case for ProductDetailCache."""
+
+    def setUp(self):
+        self.cache = ProductDetailCache(ttl=60, grace=120, max_entries=10)
+
+    def _at(self, offset):
+        return patch("time.monotonic", return_value=time.monotonic() + offset)
+
+    def test_fresh_stale_and_miss(self):
+        self.assertEqual(self.cache.get("s1", "111"), (None, MISS))
+        self.cache.put("s1", "111", DETAIL)
+
+        self.assertEqual(self.cache.get("s1", "111"), (DETAIL, FRESH))
+        with self._at(90):
+            self.assertEqual(self.cache.get("s1", "111"), (DETAIL, STALE))
+        with self._at(200):
+            self.assertEqual(self.cache.get("s1", "111"), (None, MISS))
+        # Entries past the grace period are dropped
+        self.assertEqual(self.cache.get("s1", "111"), (None, MISS))
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["stale_hits"], stats["misses"]), (1, 1, 3))
+        self.assertEqual(stats["entries"], 0)
+
+    def test_entries_copied(self):
+        value = {"sku": "111", "tags": ["sữa"]}
+        self.cache.put("s1", "111", value)
+        value["tags"].append("changed")
+
+        cached, _ = self.cache.get("s1", "111")
+        cached["tags"].clear()
+        self.assertEqual(self.cache.get("s1", "111")[0], {"sku": "111", "tags": ["sữa"]})
+
+    def test_stores_isolated(self):
+        self.cache.put("s1", "111", DETAIL)
+
+        self.assertEqual(self.cache.get("s2", "111"), (None, MISS))
+        self.assertEqual(self.cache.invalidate_store("s1"), 1)
+        self.assertEqual(self.cache.get("s1", "111"), (None, MISS))
+
+    def test_entry_ttl(self):
+        self.cache.put("s1", "111", DETAIL, ttl=0)
+        self.assertEqual(self.cache.get("s1", "111")[1], STALE)
+
+    async def test_refresh_replaces_entry_once(self):
+        self.cache.put("s1", "111", DETAIL, ttl=0)
+        loads = []
+        refreshed = {"success": True, "data": {"products": {"items": [{"sku": "111", "price": 12}]}}}
+
+        async def loader():
+            loads.append(1)
+            await asyncio.sleep(0)
+            return refreshed
+
+        self.cache.refresh("s1", "111", loader, _is_cacheable)
+        self.cache.refresh("s1", "111", loader, _is_cacheable)
+        self.assertEqual(self.cache.stats()["refreshing"], 1)
+        await asyncio.gather(*self.cache._tasks)
+
+        self.assertEqual(loads, [1])
+        self.assertEqual(self.cache.get("s1", "111"), (refreshed, FRESH))
+        self.assertEqual(self.cache.stats()["refreshing"], 0)
+
+    async def test_failed_refresh_keeps_stale_entry(self):
+        self.cache.put("s1", "111", DETAIL, ttl=0)
+
+        async def failing_loader():
+            return {"success": False, "code": "HTTP_503"}
+
+        async def raising_loader():
+            raise RuntimeError("boom")
+
+        self.cache.refresh("s1", "111", failing_loader, _is_cacheable)
+        await asyncio.gather(*self.cache._tasks)
+        with self.assertLogs("app.tools.cng.api_client.product_cache", level="WARNING"):
+            self.cache.refresh("s1", "111", raising_loader, _is_cacheable)
+            await asyncio.gather(*self.cache._tasks)
+
+        self.assertEqual(self.cache.get("s1", "111"), (DETAIL, STALE))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Unit tests for resolving product identifiers of unknown kind.
+"""
+
+import asyncio
+import unittest
+
+from app.tools.cng.api_client.product_resolver import is_unambiguous_sku, resolve_product
+
+
+def _found(source):
+    return {"success": True, "data": {"products": {"items": [{"sku": "111", "source": source}]}}}
+
+
+EMPTY = {"success": True, "data": {"products": {"items": []}}}
+
+
+class _ProductAPI:
+    """Fake product lookups with per-strategy results and delays, recording calls and cancellations."""
+
+    def __init__(self, by_id=None, by_sku=None, by_art_no=None, delays=None):
+        self.results = {"id": by_id, "sku": by_sku, "art_no": by_art_no}
+        self.delays = delays or {}
+        self.calls = []
+        self.cancelled = []
+
+    async def _lookup(self, name, result):
+        self.calls.append(name)
+        try:
+            await asyncio.sleep(self.delays.get(name, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result or EMPTY
+
+    async def suggest_products(self, query, filters, sort, page_size, current_page):
+        result = self.results["id"]
+        if result is None:
+            return await self._lookup("id", EMPTY)
+        return await self._lookup("id", {"success": True, "data": {"products": {"items": [{"sku": "id-sku"}]}}})
+
+    async def get_product_by_sku(self, sku):
+        if sku == "id-sku":
+            return self.results["id"]
+        return await self._lookup("sku", self.results["sku"])
+
+    async def get_product_by_art_no(self, art_no):
+        return await self._lookup("art_no", self.results["art_no"])
+
+
+def _source(result):
+    return result["data"]["products"]["items"][0]["source"]
+
+
+class TestProductResolver(unittest.IsolatedAsyncioTestCase):
+    """Test case for resolve_product."""
+
+    def test_unambiguous_sku(self):
+        self.assertTrue(is_unambiguous_sku("415883_24158831"))
+        self.assertTrue(is_unambiguous_sku("p123"))
+        self.assertFalse(is_unambiguous_sku("24158831"))
+
+    async def test_unambiguous_sku_looked_up_by_sku_only(self):
+        api = _ProductAPI(by_sku=_found("sku"))
+
+        result = await resolve_product(api, "415883_24158831", parallel=True)
+
+        self.assertEqual(_source(result), "sku")
+        self.assertEqual(api.calls, ["sku"])
+
+    async def test_priority_kept_when_lower_strategy_answers_first(self):
+        for parallel in (False, True):
+            api = _ProductAPI(by_id=_found("id"), by_sku=_found("sku"), delays={"id": 0.02})
+
+            result = await resolve_product(api, "24158831", parallel=parallel)
+
+            self.assertEqual(_source(result), "id", parallel)
+
+    async def test_parallel_cancels_remaining_strategies(self):
+        api = _ProductAPI(by_id=_found("id"), delays={"sku": 1, "art_no": 1})
+
+        result = await resolve_product(api, "24158831", parallel=True)
+
+        self.assertEqual(_source(result), "id")
+        self.assertEqual(sorted(api.cancelled), ["art_no", "sku"])
+
+    async def test_falls_through_to_art_no(self):
+        for parallel in (False, True):
+            api = _ProductAPI(by_art_no=_found("art_no"))
+
+            result = await resolve_product(api, "24158831", parallel=parallel)
+
+            self.assertEqual(_source(result), "art_no", parallel)
+            self.assertEqual(sorted(api.calls), ["art_no", "id", "sku"])
+
+    async def test_not_found_returns_last_result(self):
+        api = _ProductAPI()
+
+        result = await resolve_product(api, "24158831", parallel=True)
+
+        self.assertEqual(result, EMPTY)
+
+    async def test_parallel_strategy_error_skipped(self):
+        api = _ProductAPI(by_sku=RuntimeError("boom"), by_art_no=_found("art_no"))
+
+        with self.assertLogs("app.tools.cng.api_client.product_resolver", level="WARNING"):
+            result = await resolve_product(api, "24158831", parallel=True)
+
+        self.assertEqual(_source(result), "art_no")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Unit tests for the shared product post-processing stage.
+"""
+
+import unittest
+
+from app.tools.cng.product_tools import process_products
+
+
+class TestProcessProducts(unittest.TestCase):
+    """Test case for process_products."""
+
+    def test_product_code_and_url(self):
+        products = process_products([
+            {"sku": "111", "url_key": "sua-tuoi", "url_suffix": ".htm"},
+            {"sku": "222", "url_key": "bia"},
+            {"sku": "333", "url_path": "/catalog/nuoc-mam.html"},
+            {"sku": "444", "canonical_url": "https://mmpro.vn/product/gao.html"},
+            {"name": "no url"}
+        ])
+
+        self.assertEqual([product.get("product_code") for product in products], ["111", "222", "333", "444", None])
+        self.assertEqual([product.get("product_url") for product in products], [
+            "https://online.mmvietnam.com/product/sua-tuoi.htm",
+            "https://online.mmvietnam.com/product/bia.html",
+            "https://online.mmvietnam.com/catalog/nuoc-mam.html",
+            "https://online.mmvietnam.com/product/gao.html",
+            None
+        ])
+
+    def test_url_follows_changed_fields(self):
+        product = {"sku": "111", "url_key": "sua-tuoi", "url_suffix": ".html"}
+        process_products([product])
+
+        changed = process_products([{"sku": "111", "url_key": "sua-tuoi", "url_suffix": ".htm"}])[0]
+        self.assertEqual(changed["product_url"], "https://online.mmvietnam.com/product/sua-tuoi.htm")
+
+        moved = process_products([{"sku": "111", "url_path": "/catalog/sua.html"}])[0]
+        self.assertEqual(moved["product_url"], "https://online.mmvietnam.com/catalog/sua.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
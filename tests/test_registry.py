@@ -0,0 +1,125 @@
+"""
+Unit tests for the per-event-loop connection pool registry.
+"""
+
+import asyncio
+import gc
+import socket
+import threading
+import unittest
+import warnings
+
+import aiohttp
+
+from app.tools.cng.api_client.registry import LoopSessionRegistry
+
+
+class _KeepAliveServer:
+    """HTTP server answering one keep-alive request, recording when the client closes."""
+
+    def __init__(self):
+        self._sock = socket.socket()
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen()
+        self.url = f"http://127.0.0.1:{self._sock.getsockname()[1]}/"
+        self.client_closed = threading.Event()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        conn, _ = self._sock.accept()
+        with conn, self._sock:
+            conn.recv(65536)
+            conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok")
+            conn.settimeout(5)
+            try:
+                if conn.recv(1) == b"":
+                    self.client_closed.set()
+            except OSError:
+                pass
+
+
+class TestLoopSessionRegistry(unittest.TestCase):
+    """Test case for LoopSessionRegistry."""
+
+    def setUp(self):
+        self.registry = LoopSessionRegistry()
+        # Connections abandoned on a closed loop are released when collected
+        catcher = warnings.catch_warnings()
+        catcher.__enter__()
+        self.addCleanup(catcher.__exit__, None, None, None)
+        warnings.simplefilter("ignore", ResourceWarning)
+
+    def _request(self, server):
+        async def request():
+            session = self.registry.get_or_create("pool", aiohttp.ClientSession)
+            async with session.get(server.url) as response:
+                await response.text()
+            return session
+        return request()
+
+    def test_one_session_per_loop(self):
+        async def sessions():
+            first = self.registry.get_or_create("pool", aiohttp.ClientSession)
+            second = self.registry.get_or_create("pool", aiohttp.ClientSession)
+            other = self.registry.get_or_create("other", aiohttp.ClientSession)
+            return first, second, other
+
+        first, second, other = asyncio.run(sessions())
+        again, _, _ = asyncio.run(sessions())
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertIsNot(first, again)
+
+    def test_put_keeps_existing_open_session(self):
+        async def race():
+            kept = self.registry.put("pool", aiohttp.ClientSession())
+            late = aiohttp.ClientSession()
+            result = self.registry.put("pool", late)
+            await late.close()
+            return kept, result
+
+        kept, result = asyncio.run(race())
+        self.assertIs(result, kept)
+
+    def test_pools_closed_when_loop_shuts_down(self):
+        server = _KeepAliveServer()
+        session = asyncio.run(self._request(server))
+
+        self.assertTrue(session.closed)
+        self.assertTrue(server.client_closed.wait(2))
+        self.assertEqual(self.registry.stats()["sessions"], 0)
+
+    def test_close_loop(self):
+        async def open_and_close():
+            session = self.registry.get_or_create("pool", aiohttp.ClientSession)
+            await self.registry.close_loop()
+            return session, self.registry.stats()
+
+        session, stats = asyncio.run(open_and_close())
+        self.assertTrue(session.closed)
+        self.assertEqual(stats["sessions"], 0)
+
+    def test_connections_of_closed_loop_released(self):
+        server = _KeepAliveServer()
+        loop = asyncio.new_event_loop()
+        # Closed without shutdown_asyncgens: the pool cannot be closed on its loop
+        session = loop.run_until_complete(self._request(server))
+        loop.close()
+
+        async def access():
+            return self.registry.get("pool")
+
+        with self.assertLogs("app.tools.cng.api_client.registry", level="WARNING"):
+            self.assertIsNone(asyncio.run(access()))
+
+        self.assertTrue(session.closed)
+        # Dropped without touching aiohttp internals: released once collected
+        del session, loop
+        gc.collect()
+        self.assertTrue(server.client_closed.wait(2))
+        self.assertEqual(self.registry.stats(), {"loops": 0, "sessions": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
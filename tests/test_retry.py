@@ -0,0 +1,147 @@
+"""
+Unit tests for the GraphQL retry policy.
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from app.tools.cng.api_client.base import APIClientBase
+from app.tools.cng.api_client.config import Config
+from app.tools.cng.api_client.retry import (
+    PERMANENT, TRANSIENT, RetryBudget, RetryPolicy, classify_error
+)
+
+
+def _error(code):
+    return {"success": False, "code": code, "message": code}
+
+
+class TestClassifyError(unittest.TestCase):
+    """Test case for classify_error."""
+
+    def test_success(self):
+        self.assertIsNone(classify_error({"success": True, "data": {}}))
+
+    def test_transient(self):
+        for code in ("TIMEOUT", "CONNECTION_ERROR", "CONNECTION_RESET", "HTTP_408", "HTTP_429", "HTTP_500", "HTTP_503"):
+            self.assertEqual(classify_error(_error(code)), TRANSIENT, code)
+
+    def test_permanent(self):
+        for code in ("GRAPHQL_ERROR", "graphql-input", "HTTP_400", "HTTP_404", "HTTP_", None):
+            self.assertEqual(classify_error(_error(code)), PERMANENT, code)
+        self.assertEqual(classify_error({"success": False}), PERMANENT)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test case for RetryPolicy and RetryBudget."""
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=3, base_delay=1, max_delay=4)
+
+    def test_retries_transient_errors_up_to_max_attempts(self):
+        self.assertTrue(self.policy.should_retry(_error("HTTP_502"), 0))
+        self.assertTrue(self.policy.should_retry(_error("HTTP_502"), 1))
+        self.assertFalse(self.policy.should_retry(_error("HTTP_502"), 2))
+        self.assertFalse(self.policy.should_retry(_error("HTTP_400"), 0))
+        self.assertFalse(self.policy.should_retry({"success": True}, 0))
+
+    def test_mutation_retried_only_when_not_processed(self):
+        for code in ("CONNECTION_ERROR", "HTTP_429", "HTTP_503"):
+            self.assertTrue(self.policy.should_retry(_error(code), 0, idempotent=False), code)
+        for code in ("TIMEOUT", "CONNECTION_RESET", "HTTP_500", "HTTP_502"):
+            self.assertFalse(self.policy.should_retry(_error(code), 0, idempotent=False), code)
+
+    def test_budget_limits_retries(self):
+        policy = RetryPolicy(max_attempts=5, budget=RetryBudget(ratio=0.5, min_per_second=0, max_tokens=2))
+
+        self.assertEqual([policy.should_retry(_error("TIMEOUT"), 0) for _ in range(3)], [True, True, False])
+        policy.budget.record_request()
+        policy.budget.record_request()
+        self.assertTrue(policy.should_retry(_error("TIMEOUT"), 0))
+        self.assertEqual(policy.budget.stats()["granted"], 3)
+        self.assertEqual(policy.budget.stats()["denied"], 1)
+
+    def test_budget_refills_over_time(self):
+        budget = RetryBudget(ratio=0, min_per_second=1, max_tokens=1)
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+
+        with patch("time.monotonic", return_value=time.monotonic() + 2):
+            self.assertTrue(budget.try_acquire())
+            self.assertFalse(budget.try_acquire())
+
+    def test_backoff_jitter_capped(self):
+        for attempt in range(6):
+            delay = self.policy.backoff(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(4, 2 ** attempt))
+
+
+class TestExecuteGraphQLRetries(unittest.IsolatedAsyncioTestCase):
+    """execute_graphql retries through the shared policy."""
+
+    def setUp(self):
+        self.client = APIClientBase(Config.API_URL)
+        self.results = []
+        self.calls = 0
+
+        async def execute_once(query, variables=None, headers=None, timeout=None, method="POST"):
+            self.calls += 1
+            return self.results.pop(0)
+
+        self.client._execute_graphql_once = execute_once
+        policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+        patcher = patch("app.tools.cng.api_client.base.get_retry_policy", return_value=policy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_query_retried_after_transient_error(self):
+        self.results = [_error("HTTP_502"), _error("TIMEOUT"), {"success": True, "data": {}}]
+
+        result = await self.client.execute_graphql("query Products { products { total_count } }")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.calls, 3)
+
+    async def test_permanent_error_not_retried(self):
+        self.results = [_error("graphql-input")]
+
+        result = await self.client.execute_graphql("{ products { total_count } }")
+
+        self.assertEqual(result["code"], "graphql-input")
+        self.assertEqual(self.calls, 1)
+
+    async def test_mutation_not_resent_after_timeout(self):
+        self.results = [_error("TIMEOUT")]
+
+        result = await self.client.execute_graphql("  mutation AddToCart { addProductsToCart { cart { id } } }")
+
+        self.assertEqual(result["code"], "TIMEOUT")
+        self.assertEqual(self.calls, 1)
+
+    async def test_mutation_resent_when_not_processed(self):
+        self.results = [_error("CONNECTION_ERROR"), {"success": True, "data": {}}]
+
+        result = await self.client.execute_graphql("mutation CreateCart { createEmptyCart }")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(self.calls, 2)
+
+    async def test_ping_not_retried_nor_counted_in_budget(self):
+        budget = RetryBudget(ratio=1, min_per_second=0, max_tokens=5)
+        while budget.try_acquire():
+            pass
+        self.results = [_error("TIMEOUT"), {"success": True, "data": {}}, {"success": True, "data": {}}]
+
+        with patch("app.tools.cng.api_client.base.get_retry_policy", return_value=RetryPolicy(budget=budget)):
+            results = [await self.client.ping() for _ in range(3)]
+        await self.client.close()
+
+        self.assertEqual([result["success"] for result in results], [False, True, True])
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(budget.stats()["tokens"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for incremental session ingestion into memory.
+"""
+
+import os
+import sys
+import unittest
+
+from google.adk.events import Event
+from google.adk.sessions import Session
+from google.genai import types
+
+# The runner configuration is imported as a top-level module of the app directory
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app")))
+
+import runner_config  # noqa: E402
+
+
+def _event(event_id, text):
+    return Event(
+        id=event_id,
+        author="user",
+        invocation_id="inv",
+        content=types.Content(role="user", parts=[types.Part(text=text)])
+    )
+
+
+class _SessionService:
+    """Fake session service returning one session."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def get_session(self, app_name, user_id, session_id):
+        return self.session
+
+
+class _WholeSessionMemory:
+    """Fake memory service of an older google-adk, without add_events_to_memory."""
+
+    def __init__(self):
+        self.sessions = []
+
+    async def add_session_to_memory(self, session):
+        self.sessions.append([event.id for event in session.events])
+
+
+class _Runner:
+    def __init__(self, session, memory_service):
+        self.app_name = "app"
+        self.session_service = _SessionService(session)
+        self.memory_service = memory_service
+
+
+class TestAddSessionToMemory(unittest.IsolatedAsyncioTestCase):
+    """Test case for add_session_to_memory."""
+
+    def setUp(self):
+        runner_config._ingested.clear()
+        self.addCleanup(runner_config._ingested.clear)
+
+    async def test_whole_session_fallback_without_add_events(self):
+        session = Session(id="s1", app_name="app", user_id="u1", events=[_event("e1", "sữa")])
+        memory = _WholeSessionMemory()
+        runner = _Runner(session, memory)
+
+        await runner_config.add_session_to_memory(runner, "u1", "s1")
+        session.events.append(_event("e2", "bia"))
+        with self.assertNoLogs(runner_config.logger, level="ERROR"):
+            await runner_config.add_session_to_memory(runner, "u1", "s1")
+
+        self.assertEqual(memory.sessions, [["e1"], ["e1", "e2"]])
+        self.assertEqual(runner_config._ingested[("app", "u1", "s1")], (2, "e2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
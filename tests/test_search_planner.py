@@ -0,0 +1,117 @@
+"""
+Unit tests for planned parallel product searches.
+"""
+
+import asyncio
+import unittest
+
+from app.tools.cng.api_client.search_planner import (
+    STRATEGY_ART_NO, STRATEGY_SIMPLE, STRATEGY_SUGGEST, execute_search_plan, plan_search
+)
+
+
+def _products(*skus):
+    return {"success": True, "data": {"products": {"items": [{"sku": sku} for sku in skus]}}}
+
+
+FAILED = {"success": False, "code": "HTTP_503", "message": "HTTP error: 503"}
+
+
+class _ProductAPI:
+    """Fake search strategies with per-strategy results and delays, recording calls and cancellations."""
+
+    def __init__(self, results, delays=None):
+        self.results = results
+        self.delays = delays or {}
+        self.calls = []
+        self.cancelled = []
+
+    async def _run(self, name):
+        self.calls.append(name)
+        try:
+            await asyncio.sleep(self.delays.get(name, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+        result = self.results.get(name, _products())
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def search_products(self, query, page_size, current_page):
+        return await self._run(STRATEGY_SIMPLE)
+
+    async def suggest_products(self, query, filters, sort, page_size, current_page):
+        return await self._run(STRATEGY_SUGGEST)
+
+    async def get_product_by_art_no(self, art_no):
+        return await self._run(STRATEGY_ART_NO)
+
+
+class TestPlanSearch(unittest.TestCase):
+    """Test case for plan_search."""
+
+    def test_plans(self):
+        self.assertEqual(plan_search("sữa tươi"), ([STRATEGY_SIMPLE], [STRATEGY_SUGGEST, STRATEGY_ART_NO]))
+        self.assertEqual(plan_search(" 24158831 "), ([STRATEGY_ART_NO, STRATEGY_SIMPLE], [STRATEGY_SUGGEST]))
+        self.assertEqual(
+            plan_search("sữa", sort={"price": "ASC"}), ([STRATEGY_SUGGEST, STRATEGY_SIMPLE], [STRATEGY_ART_NO])
+        )
+
+
+class TestExecuteSearchPlan(unittest.IsolatedAsyncioTestCase):
+    """Test case for execute_search_plan."""
+
+    async def test_priority_kept_when_lower_strategy_answers_first(self):
+        api = _ProductAPI({STRATEGY_ART_NO: _products("art"), STRATEGY_SIMPLE: _products("simple")},
+                          delays={STRATEGY_ART_NO: 0.02})
+
+        result = await execute_search_plan(api, "24158831")
+
+        self.assertEqual(result["data"]["products"]["items"], [{"sku": "art"}])
+        self.assertEqual(result["data"]["strategy"], STRATEGY_ART_NO)
+
+    async def test_empty_result_falls_to_next_planned(self):
+        api = _ProductAPI({STRATEGY_SUGGEST: _products(), STRATEGY_SIMPLE: _products("simple")})
+
+        result = await execute_search_plan(api, "sữa", filters={"category_id": {"eq": "1"}})
+
+        self.assertEqual(result["data"]["strategy"], STRATEGY_SIMPLE)
+
+    async def test_remaining_strategies_cancelled(self):
+        api = _ProductAPI({STRATEGY_SUGGEST: _products("suggest")}, delays={STRATEGY_SIMPLE: 1})
+
+        result = await execute_search_plan(api, "sữa", sort={"price": "ASC"})
+
+        self.assertEqual(result["data"]["strategy"], STRATEGY_SUGGEST)
+        self.assertEqual(api.cancelled, [STRATEGY_SIMPLE])
+
+    async def test_no_items_returns_first_success(self):
+        api = _ProductAPI({STRATEGY_ART_NO: FAILED, STRATEGY_SIMPLE: _products()})
+
+        result = await execute_search_plan(api, "24158831")
+
+        self.assertTrue(result["success"])
+        self.assertEqual(result["data"]["strategy"], STRATEGY_SIMPLE)
+        self.assertEqual(api.calls, [STRATEGY_ART_NO, STRATEGY_SIMPLE])
+
+    async def test_fallbacks_after_all_planned_fail(self):
+        api = _ProductAPI({STRATEGY_SIMPLE: RuntimeError("boom"), STRATEGY_SUGGEST: FAILED,
+                           STRATEGY_ART_NO: _products("art")})
+
+        with self.assertLogs("app.tools.cng.api_client.search_planner", level="WARNING"):
+            result = await execute_search_plan(api, "sữa")
+
+        self.assertEqual(result["data"]["strategy"], STRATEGY_ART_NO)
+        self.assertEqual(api.calls, [STRATEGY_SIMPLE, STRATEGY_SUGGEST, STRATEGY_ART_NO])
+
+    async def test_all_failed_returns_first_error(self):
+        api = _ProductAPI({STRATEGY_SIMPLE: FAILED, STRATEGY_SUGGEST: FAILED, STRATEGY_ART_NO: FAILED})
+
+        result = await execute_search_plan(api, "sữa")
+
+        self.assertEqual(result, FAILED)
+
+
+if __name__ == "__main__":
+    unittest.main()
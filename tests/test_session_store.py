@@ -0,0 +1,188 @@
+"""
+Unit tests for the SQLite session service.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events import Event, EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
+from google.genai import types
+
+from app.session_store import SQLiteSessionService
+
+
+def _event(text, state_delta=None):
+    return Event(
+        author="user",
+        invocation_id="inv",
+        content=types.Content(role="user", parts=[types.Part(text=text)]),
+        actions=EventActions(state_delta=state_delta or {})
+    )
+
+
+class TestSQLiteSessionService(unittest.IsolatedAsyncioTestCase):
+    """Test case for SQLiteSessionService."""
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.directory, "sessions.db")
+        self.services = []
+        self.service = self._open()
+
+    async def asyncTearDown(self):
+        for service in self.services:
+            await service.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _open(self, **kwargs):
+        service = SQLiteSessionService(self.db_path, flush_interval=60, **kwargs)
+        self.services.append(service)
+        return service
+
+    async def _get(self, service, session_id, user_id="u1", **kwargs):
+        return await service.get_session(app_name="app", user_id=user_id, session_id=session_id, **kwargs)
+
+    async def test_round_trip_across_instances(self):
+        session = await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        await self.service.append_event(session, _event("xin chào", {"cart": "c1"}))
+        await self.service.append_event(session, _event("mua sữa", {"cart": "c2", "temp:draft": 1}))
+        await self.service.flush()
+
+        loaded = await self._get(self._open(), "s1")
+        self.assertEqual([event.content.parts[0].text for event in loaded.events], ["xin chào", "mua sữa"])
+        self.assertEqual(loaded.state, {"cart": "c2"})
+
+    async def test_buffered_events_visible_locally(self):
+        session = await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        await self.service.append_event(session, _event("một"))
+
+        self.assertEqual(self.service.stats()["pending_events"], 1)
+        self.assertEqual(len((await self._get(self.service, "s1")).events), 1)
+
+        await self.service.close()
+        self.services.remove(self.service)
+        self.assertEqual(len((await self._get(self._open(), "s1")).events), 1)
+
+    async def test_state_scopes(self):
+        first = await self.service.create_session(
+            app_name="app", user_id="u1", session_id="s1", state={"app:banner": "a", "user:store": "x", "page": 1}
+        )
+        second = await self.service.create_session(app_name="app", user_id="u2", session_id="s2")
+
+        self.assertEqual(first.state, {"app:banner": "a", "user:store": "x", "page": 1})
+        self.assertEqual(second.state, {"app:banner": "a"})
+        self.assertEqual(await self.service.get_user_state(app_name="app", user_id="u1"), {"store": "x"})
+
+    async def test_cached_session_sees_scoped_state_from_other_session(self):
+        first = await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        second = await self.service.create_session(app_name="app", user_id="u1", session_id="s2")
+        await self._get(self.service, "s2")
+
+        await self.service.append_event(first, _event("đổi cửa hàng", {"user:store": "y", "app:banner": "b"}))
+
+        # s2 is served from the cache, its own state is unchanged
+        refreshed = await self._get(self.service, "s2")
+        self.assertEqual(refreshed.state, {"user:store": "y", "app:banner": "b"})
+        self.assertEqual(second.state, {})
+
+    async def test_cached_session_sees_scoped_state_from_other_process(self):
+        await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        await self._get(self.service, "s1")
+
+        other = self._open()
+        session = await other.create_session(app_name="app", user_id="u1", session_id="s9")
+        await other.append_event(session, _event("khác", {"user:store": "z", "app:banner": "c"}))
+        await other.flush()
+
+        refreshed = await self._get(self.service, "s1")
+        self.assertEqual(refreshed.state, {"user:store": "z", "app:banner": "c"})
+        self.assertEqual(refreshed.events, [])
+
+    async def test_reload_after_other_process_appends(self):
+        session = await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        await self._get(self.service, "s1")
+
+        other = self._open()
+        await other.append_event(await self._get(other, "s1"), _event("từ tiến trình khác", {"page": 2}))
+        await other.flush()
+
+        loaded = await self._get(self.service, "s1")
+        self.assertEqual(len(loaded.events), 1)
+        self.assertEqual(loaded.state, {"page": 2})
+        self.assertEqual(session.events, [])
+
+    async def test_reload_after_other_process_appends_older_event(self):
+        await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        session = await self._get(self.service, "s1")
+        await self.service.append_event(session, _event("mới"))
+        await self.service.flush()
+
+        other = self._open()
+        older = _event("đồng hồ chậm", {"page": 3})
+        older.timestamp = session.events[-1].timestamp - 10
+        await other.append_event(await self._get(other, "s1"), older)
+        await other.flush()
+
+        loaded = await self._get(self.service, "s1")
+        self.assertEqual([event.content.parts[0].text for event in loaded.events], ["mới", "đồng hồ chậm"])
+        self.assertEqual(loaded.state, {"page": 3})
+
+    async def test_own_flush_keeps_other_process_write_visible(self):
+        await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        session = await self._get(self.service, "s1")
+
+        other = self._open()
+        await other.append_event(await self._get(other, "s1"), _event("khác", {"page": 2}))
+        await other.flush()
+        await self.service.append_event(session, _event("mình"))
+        await self.service.flush()
+
+        loaded = await self._get(self.service, "s1")
+        self.assertEqual([event.content.parts[0].text for event in loaded.events], ["khác", "mình"])
+        self.assertEqual(loaded.state, {"page": 2})
+
+    async def test_compaction_keeps_state(self):
+        service = self._open(compact_after=2)
+        session = await service.create_session(app_name="app", user_id="u1", session_id="s1")
+        for page in range(1, 6):
+            await service.append_event(session, _event(f"trang {page}", {"page": page}))
+        await service.flush()
+
+        for _ in range(2):
+            loaded = await self._get(self._open(), "s1")
+            self.assertEqual(loaded.state, {"page": 5})
+            self.assertEqual(len(loaded.events), 5)
+
+    async def test_recent_events_config(self):
+        session = await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        for text in ("một", "hai", "ba"):
+            await self.service.append_event(session, _event(text))
+
+        loaded = await self._get(self.service, "s1", config=GetSessionConfig(num_recent_events=2))
+        self.assertEqual([event.content.parts[0].text for event in loaded.events], ["hai", "ba"])
+
+    async def test_list_and_delete(self):
+        await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+        await self.service.create_session(app_name="app", user_id="u1", session_id="s2")
+        await self.service.create_session(app_name="app", user_id="u2", session_id="s3")
+
+        listed = await self.service.list_sessions(app_name="app", user_id="u1")
+        self.assertEqual(sorted(session.id for session in listed.sessions), ["s1", "s2"])
+
+        await self.service.delete_session(app_name="app", user_id="u1", session_id="s1")
+        self.assertIsNone(await self._get(self.service, "s1"))
+        self.assertIsNone(await self._get(self._open(), "s1"))
+
+    async def test_duplicate_session_rejected(self):
+        await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+
+        with self.assertRaises(AlreadyExistsError):
+            await self.service.create_session(app_name="app", user_id="u1", session_id="s1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Unit tests for per-session API client views.
+"""
+
+import asyncio
+import contextvars
+import unittest
+
+from app.tools.cng.api_client.background_loop import BackgroundLoop
+from app.tools.cng.api_client.config import Config
+from app.tools.cng.api_client.product import ProductAPI
+from app.tools.cng.api_client.session_view import SessionClientView
+
+
+def _page(page, total_count):
+    return {
+        "success": True,
+        "data": {"products": {"items": [{"sku": f"sku-{page}"}], "total_count": total_count}}
+    }
+
+
+class TestSessionViewLazyResults(unittest.IsolatedAsyncioTestCase):
+    """Lazy results created through a view keep the view's session state."""
+
+    def setUp(self):
+        self.client = ProductAPI(Config.API_URL)
+        self.fetches = []
+
+        async def search_products(query, page_size, page):
+            self.fetches.append((query, page, self.client._store_code, self.client._auth_token))
+            await asyncio.sleep(0)
+            return _page(page, total_count=3)
+
+        self.client.search_products = search_products
+
+    async def test_iterator_pages_use_view_state(self):
+        view = SessionClientView(self.client, auth_token="view-token", store_code="b2c_OTHER")
+        products = view.iter_products("sua", page_size=1, read_ahead=2)
+
+        # Iterated outside of any call through the view
+        skus = [product["sku"] async for product in products]
+
+        self.assertEqual(skus, ["sku-1", "sku-2", "sku-3"])
+        self.assertEqual({fetch[2:] for fetch in self.fetches}, {("b2c_OTHER", "view-token")})
+        self.assertEqual(self.client._store_code, Config.STORE_CODE)
+        self.assertIsNone(self.client._auth_token)
+
+    async def test_interleaved_views_stay_isolated(self):
+        first = SessionClientView(self.client, auth_token="token-a", store_code="store_a")
+        second = SessionClientView(self.client, auth_token="token-b", store_code="store_b")
+
+        async def collect(view, query):
+            return [product["sku"] async for product in view.iter_products(query, page_size=1)]
+
+        await asyncio.gather(collect(first, "a"), collect(second, "b"))
+
+        by_query = {}
+        for query, _, store_code, token in self.fetches:
+            by_query.setdefault(query, set()).add((store_code, token))
+        self.assertEqual(by_query, {"a": {("store_a", "token-a")}, "b": {("store_b", "token-b")}})
+
+    async def test_direct_iterator_uses_client_state(self):
+        self.client.set_store_code("b2c_DIRECT")
+        skus = [product["sku"] async for product in self.client.iter_products("sua", page_size=1)]
+
+        self.assertEqual(len(skus), 3)
+        self.assertEqual({fetch[2] for fetch in self.fetches}, {"b2c_DIRECT"})
+
+
+class TestBackgroundLoopContext(unittest.TestCase):
+    """Coroutines sent to the background loop run in the caller's context."""
+
+    def test_run_propagates_context(self):
+        marker = contextvars.ContextVar("marker", default="loop")
+        loop = BackgroundLoop(name="test-loop")
+
+        async def read_marker():
+            return marker.get()
+
+        try:
+            marker.set("caller")
+            self.assertEqual(loop.run(read_marker(), timeout=5), "caller")
+        finally:
+            loop.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""
+Unit tests for local token lifetime tracking.
+"""
+
+import asyncio
+import base64
+import json
+import time
+import unittest
+
+from app.tools.cng.api_client.auth import AuthAPI
+from app.tools.cng.api_client.config import Config
+from app.tools.cng.api_client.token_manager import (
+    TOKEN_EXPIRED, TOKEN_UNKNOWN, TOKEN_VALID, TokenManager, token_expiry
+)
+
+
+def _jwt(payload):
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+    return f"{encode({'alg': 'HS256'})}.{encode(payload)}.signature"
+
+
+def _lifetime(hours):
+    async def loader():
+        return {"success": True, "lifetime_hours": hours}
+    return loader
+
+
+class TestTokenExpiry(unittest.TestCase):
+    """Test case for reading the expiry of JWT tokens."""
+
+    def test_jwt_exp(self):
+        self.assertEqual(token_expiry(_jwt({"uid": 1, "exp": 1700000000})), 1700000000.0)
+
+    def test_opaque_and_malformed_tokens(self):
+        self.assertIsNone(token_expiry("a1b2c3d4e5"))
+        self.assertIsNone(token_expiry("a.b.c"))
+        self.assertIsNone(token_expiry(_jwt({"uid": 1})))
+        self.assertIsNone(token_expiry(_jwt({"exp": "soon"})))
+        self.assertIsNone(token_expiry(None))
+
+
+class TestTokenManagerLoops(unittest.TestCase):
+    """Test case for a TokenManager shared by several event loops."""
+
+    def test_lifetime_loaded_from_two_loops(self):
+        async def slow_loader():
+            await asyncio.sleep(0.01)
+            return {"success": True, "lifetime_hours": 2}
+
+        manager = TokenManager(slow_loader, lifetime_ttl=0)
+
+        async def concurrent_loads():
+            # Contended loads make the lock wait on the running loop
+            return await asyncio.gather(manager.lifetime_seconds(), manager.lifetime_seconds())
+
+        self.assertEqual(asyncio.run(concurrent_loads()), [7200, 7200])
+        self.assertEqual(asyncio.run(concurrent_loads()), [7200, 7200])
+
+
+class TestTokenManager(unittest.IsolatedAsyncioTestCase):
+    """Test case for TokenManager."""
+
+    async def test_lifetime_from_store_config(self):
+        manager = TokenManager(_lifetime(2))
+        await manager.track("token")
+
+        status = manager.status("token")
+        self.assertEqual(status["state"], TOKEN_VALID)
+        self.assertAlmostEqual(status["expires_in"], 7200, delta=5)
+        self.assertEqual(manager.status("other")["state"], TOKEN_UNKNOWN)
+
+    async def test_jwt_exp_overrides_lifetime(self):
+        manager = TokenManager(_lifetime(2))
+        fresh = _jwt({"uid": 1, "exp": time.time() + 60})
+        expired = _jwt({"uid": 2, "exp": time.time() - 60})
+        await manager.track(fresh)
+        await manager.track(expired)
+
+        self.assertAlmostEqual(manager.status(fresh)["expires_in"], 60, delta=5)
+        self.assertEqual(manager.status(expired)["state"], TOKEN_EXPIRED)
+
+    async def test_background_refresh_notifies_listener(self):
+        # Refresh margin longer than the lifetime: refresh right away
+        manager = TokenManager(_lifetime(1), refresh_margin=3600)
+        notified = []
+        refreshed = asyncio.Event()
+
+        def listener(old, new):
+            notified.append((old, new))
+            refreshed.set()
+
+        manager.add_listener(listener)
+        relogins = iter(range(1, 100))
+
+        async def relogin():
+            return {"success": True, "token": f"new-token-{next(relogins)}"}
+
+        await manager.track("old-token", relogin=relogin)
+        await asyncio.wait_for(refreshed.wait(), 1)
+
+        self.assertEqual(notified[0], ("old-token", "new-token-1"))
+        self.assertEqual(manager.status("old-token")["state"], TOKEN_UNKNOWN)
+        self.assertGreaterEqual(manager.stats()["refreshes"], 1)
+        await manager.close()
+
+
+class TestCheckAuthStatus(unittest.IsolatedAsyncioTestCase):
+    """External tokens are only trusted for as long as they are known to be valid."""
+
+    def setUp(self):
+        self.auth = AuthAPI(Config.API_URL)
+        self.customer_calls = 0
+        self.customer_result = {"success": True, "data": {}}
+
+        async def get_customer_info():
+            self.customer_calls += 1
+            return self.customer_result
+
+        self.auth.get_customer_info = get_customer_info
+
+    async def asyncTearDown(self):
+        await self.auth.token_manager.close()
+
+    async def test_opaque_external_token_verified_every_time(self):
+        self.auth.set_auth_token("opaque-token")
+
+        for _ in range(2):
+            result = await self.auth.check_auth_status()
+            self.assertTrue(result["is_authenticated"])
+        self.assertEqual(self.customer_calls, 2)
+
+        self.customer_result = {"success": False, "code": "AUTHENTICATION_ERROR", "message": "expired"}
+        result = await self.auth.check_auth_status()
+        self.assertFalse(result["is_authenticated"])
+        self.assertIsNone(self.auth._auth_token)
+
+    async def test_jwt_external_token_tracked_until_exp(self):
+        self.auth.set_auth_token(_jwt({"uid": 1, "exp": time.time() + 600}))
+
+        await self.auth.check_auth_status()
+        result = await self.auth.check_auth_status()
+
+        self.assertTrue(result["is_authenticated"])
+        self.assertAlmostEqual(result["expires_in"], 600, delta=5)
+        self.assertEqual(self.customer_calls, 1)
+
+    async def test_jwt_external_token_expires_locally(self):
+        self.auth.set_auth_token(_jwt({"uid": 1, "exp": time.time() - 1}))
+
+        await self.auth.check_auth_status()
+        result = await self.auth.check_auth_status()
+
+        self.assertFalse(result["is_authenticated"])
+        self.assertIsNone(self.auth._auth_token)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for upstream connection warm-up.
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from app import warmup
+from app.tools.cng.api_client.config import Config
+
+
+class TestWarmUp(unittest.IsolatedAsyncioTestCase):
+    """Test case for warm-up scheduling."""
+
+    async def asyncSetUp(self):
+        self.pings = 0
+
+        async def ping():
+            self.pings += 1
+            return True
+
+        self.patches = [
+            patch.dict(warmup._UPSTREAM_PINGS, {"ecommerce": ping, "antsomi": ping}, clear=True),
+            patch.object(Config, "WARMUP_ENABLED", True),
+            patch.object(warmup, "_keepalive_task", None),
+        ]
+        for patcher in self.patches:
+            patcher.start()
+
+    async def asyncTearDown(self):
+        await warmup.stop_warm_up()
+        for patcher in reversed(self.patches):
+            patcher.stop()
+
+    async def test_warm_up_counts_connections(self):
+        summary = await warmup.warm_up(connections=3)
+
+        self.assertEqual(summary, {"ecommerce": 3, "antsomi": 3})
+        self.assertEqual(self.pings, 6)
+
+    async def test_first_request_starts_warm_up_once(self):
+        warmup.warm_up_on_first_request(callback_context=None)
+        task = warmup._keepalive_task
+        warmup.warm_up_on_first_request(callback_context=None)
+        await asyncio.sleep(0.01)
+
+        self.assertIsNotNone(task)
+        self.assertIs(warmup._keepalive_task, task)
+        self.assertEqual(self.pings, 2 * Config.WARMUP_CONNECTIONS)
+
+    async def test_disabled(self):
+        with patch.object(Config, "WARMUP_ENABLED", False):
+            self.assertIsNone(warmup.schedule_warm_up())
+
+
+class TestWarmUpWithoutLoop(unittest.TestCase):
+    """Warm-up at import time, before the server loop runs."""
+
+    def test_skipped_and_logged_without_loop(self):
+        with patch.object(Config, "WARMUP_ENABLED", True), patch.object(warmup, "_keepalive_task", None):
+            with self.assertLogs(warmup.logger, level="INFO") as logs:
+                self.assertIsNone(warmup.schedule_warm_up())
+
+        self.assertIn("skipped until the first request", logs.output[0])
+
+    def test_agent_warms_up_on_first_request(self):
+        from app.agent import root_agent
+
+        self.assertIn(warmup.warm_up_on_first_request, root_agent.canonical_before_agent_callbacks)
+
+
+if __name__ == "__main__":
+    unittest.main()